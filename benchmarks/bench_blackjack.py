@@ -0,0 +1,116 @@
+"""Blackjack engine: games per second and memory of 100k open games, old vs blackjack.py.
+
+    python benchmarks/bench_blackjack.py [games] [open_games]
+
+"old" is the string-card BlackjackGame that used to live in main.py (single,
+wrongly built deck; hand_value rescans the hand on every call), stored the way
+main.py stored it ({"game": ..., "bet": ...}). Each simulated game deals, hits
+until 17 and stands.
+"""
+import os
+import sys
+import time
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from blackjack import BlackjackGame
+
+
+class OldBlackjackGame:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.deck = [str(i) for i in range(2, 11)] + ["J", "Q", "K", "A"] * 4
+        random.shuffle(self.deck)
+        self.player_hand = []
+        self.dealer_hand = []
+        self.finished = False
+
+    def deal_card(self):
+        return self.deck.pop()
+
+    def hand_value(self, hand):
+        value = 0
+        aces = 0
+        for card in hand:
+            if card.isdigit():
+                value += int(card)
+            elif card in ["J", "Q", "K"]:
+                value += 10
+            else:  # Ace
+                aces += 1
+        for _ in range(aces):
+            if value + 11 <= 21:
+                value += 11
+            else:
+                value += 1
+        return value
+
+
+def old_open(uid):
+    game = OldBlackjackGame(uid)
+    for _ in range(2):
+        game.player_hand.append(game.deal_card())
+        game.dealer_hand.append(game.deal_card())
+    return {"game": game, "bet": 100}
+
+
+def old_play(uid):
+    game = old_open(uid)["game"]
+    while game.hand_value(game.player_hand) < 17:
+        game.player_hand.append(game.deal_card())
+    player = game.hand_value(game.player_hand)
+    if player > 21:
+        return -1
+    dealer = game.hand_value(game.dealer_hand)
+    while dealer < 17:
+        game.dealer_hand.append(game.deal_card())
+        dealer = game.hand_value(game.dealer_hand)
+    return 1 if dealer > 21 or player > dealer else 0 if player == dealer else -1
+
+
+def new_open(uid):
+    game = BlackjackGame(uid, 100)
+    game.deal()
+    return game
+
+
+def new_play(uid):
+    game = new_open(uid)
+    while game.player.total < 17:
+        game.hit()
+    if not game.finished:
+        game.stand()
+    return game.outcome()
+
+
+def games_per_second(play, games):
+    t0 = time.perf_counter()
+    for uid in range(games):
+        play(uid)
+    return games / (time.perf_counter() - t0)
+
+
+def open_games_memory(open_game, n):
+    tracemalloc.start()
+    games = {10**17 + i: open_game(10**17 + i) for i in range(n)}
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del games
+    return size
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    open_games = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    random.seed(1)
+    for name, play, open_game in (("old", old_play, old_open), ("new", new_play, new_open)):
+        rate = games_per_second(play, games)
+        size = open_games_memory(open_game, open_games)
+        print(f"{name}: {rate:>9,.0f} games/s   {open_games:,} open games: {size / 2**20:6.1f} MiB "
+              f"({size / open_games:.0f} B/game)")
+
+
+if __name__ == "__main__":
+    main()
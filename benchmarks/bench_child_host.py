@@ -0,0 +1,88 @@
+"""Memory per persona: one process per child bot vs. personas hosted by child_host.
+
+    python benchmarks/bench_child_host.py [personas]
+
+Both sides build the same ChildBot objects without logging in (no tokens needed),
+so the comparison covers interpreter, imports, client and LLM client overhead but
+not gateway caches, which are the same per persona either way.
+"""
+import os
+import sys
+import time
+import asyncio
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SINGLE = """
+import sys, time, asyncio
+sys.path[:0] = [{root!r}, {bench!r}]
+from child_bot import ChildBot
+from generation import GenerationPool
+from response_cache import ResponseCache
+import google.generativeai as genai
+genai.configure(api_key="benchmark")
+model = genai.GenerativeModel("models/gemini-1.5-flash")
+async def main():
+    bot = ChildBot("persona", model, GenerationPool(), ResponseCache())
+    print("ready", flush=True)
+    await asyncio.sleep(3600)
+asyncio.run(main())
+"""
+
+
+def rss_of(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def per_process(n: int) -> float:
+    code = SINGLE.format(root=ROOT, bench=os.path.dirname(os.path.abspath(__file__)))
+    procs = [subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) for _ in range(n)]
+    try:
+        for p in procs:
+            p.stdout.readline()
+        time.sleep(0.5)
+        return sum(rss_of(p.pid) for p in procs) / n
+    finally:
+        for p in procs:
+            p.kill()
+            p.wait()
+
+
+async def hosted(n: int) -> tuple[float, float]:
+    import google.generativeai as genai
+    from child_bot import ChildBot
+    from child_host import SharedConnector
+    from generation import GenerationPool
+    from response_cache import ResponseCache
+
+    genai.configure(api_key="benchmark")
+    model = genai.GenerativeModel("models/gemini-1.5-flash")
+    pool, cache = GenerationPool(), ResponseCache()
+    connector = SharedConnector(limit=0)
+    base = rss_of(os.getpid())
+    bots = [ChildBot(f"persona {i}", model, pool, cache, connector=connector) for i in range(n)]
+    total = rss_of(os.getpid())
+    await connector.close_shared()
+    del bots
+    return base, (total - base) / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    separate = per_process(n)
+    base, marginal = asyncio.run(hosted(n))
+    print(f"personas:                    {n}")
+    print(f"separate processes:          {separate / 2**20:6.1f} MiB each, {separate * n / 2**20:7.1f} MiB total")
+    print(f"child_host base process:     {base / 2**20:6.1f} MiB")
+    print(f"child_host marginal persona: {marginal / 2**10:6.1f} KiB each, {(base + marginal * n) / 2**20:7.1f} MiB total")
+
+
+if __name__ == "__main__":
+    main()
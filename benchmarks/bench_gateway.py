@@ -0,0 +1,104 @@
+"""Resident memory and ready-time cost of one large guild: Intents.all() vs LEAN_GATEWAY=1.
+
+    python benchmarks/bench_gateway.py [members] [online]
+
+Feeds a synthetic GUILD_CREATE (with `online` members and presences) and, for the
+default mode, the GUILD_MEMBERS_CHUNK payloads that startup chunking would receive,
+through discord.py's real ConnectionState. Each mode runs in a fresh process. Ready
+time here is CPU time only; real chunking also waits for members/1000 gateway
+round-trips, which lean mode skips entirely.
+"""
+import os
+import sys
+import time
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+GUILD_ID = 1388197138487574742
+BASE_USER = 10**17
+
+
+def rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def member(i: int) -> dict:
+    uid = str(BASE_USER + i)
+    return {
+        "user": {"id": uid, "username": f"drone{i}", "discriminator": "0", "avatar": None, "global_name": f"Drone {i}"},
+        "roles": [],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def presence(i: int) -> dict:
+    return {
+        "user": {"id": str(BASE_USER + i)},
+        "status": "online",
+        "activities": [{"name": "Murder Drones", "type": 0, "created_at": 0}],
+        "client_status": {"desktop": "online"},
+    }
+
+
+def guild_payload(members: int, online: int) -> dict:
+    return {
+        "id": str(GUILD_ID),
+        "name": "Copper 9",
+        "owner_id": str(BASE_USER),
+        "member_count": members,
+        "large": True,
+        "roles": [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                   "hoist": False, "managed": False, "mentionable": False, "flags": 0}],
+        "channels": [],
+        "emojis": [],
+        "features": [],
+        "members": [member(i) for i in range(online)],
+        "presences": [presence(i) for i in range(online)],
+        "voice_states": [],
+    }
+
+
+def run_mode(mode: str, members: int, online: int):
+    if mode == "lean":
+        os.environ["LEAN_GATEWAY"] = "1"
+    import discord
+    from discord.member import Member
+    from gateway import gateway_options_from_env
+
+    options = gateway_options_from_env()
+    client = discord.Client(**options)
+    state = client._connection
+    create = guild_payload(members, online)
+    chunks = [[member(i) for i in range(start, min(members, start + 1000))] for start in range(0, members, 1000)]
+
+    base = rss()
+    t0 = time.perf_counter()
+    guild = state._add_guild_from_data(create)
+    if state._guild_needs_chunking(guild):
+        # What discord.py's startup chunker does with each GUILD_MEMBERS_CHUNK.
+        for chunk in chunks:
+            for data in chunk:
+                guild._add_member(Member(data=data, guild=guild, state=state))
+    elapsed = time.perf_counter() - t0
+    grown = rss() - base
+    print(f"{mode:<8} cached members {len(guild.members):>7,}  RSS +{grown / 2**20:7.1f} MiB  ready CPU {elapsed * 1000:8.1f} ms")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ("default", "lean"):
+        run_mode(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]))
+        return
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    online = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    print(f"synthetic guild: {members:,} members, {online:,} online")
+    for mode in ("default", "lean"):
+        subprocess.run([sys.executable, __file__, mode, str(members), str(online)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Event-loop responsiveness while child bot generations are in flight.
+
+    python benchmarks/bench_generation.py [channels] [messages_per_channel]
+
+Compares the old path (blocking `model.generate_content` inside the handler) with
+generation.GenerationPool against benchmarks/fake_model.FakeModel, reporting the
+worst event-loop stall (what delays gateway heartbeats) and per-channel latency.
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from generation import GenerationPool, generate_text
+from fake_model import FakeModel
+
+
+async def watch_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        t = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - t - interval)
+    return worst
+
+
+async def run(mode: str, channels: int, per_channel: int):
+    model = FakeModel(latency=0.3)
+    pool = GenerationPool(workers=4, max_pending=channels * per_channel, per_channel=per_channel)
+    pool.start()
+    latencies = {c: [] for c in range(channels)}
+
+    async def handle(channel: int, i: int):
+        prompt = f"persona\nUser: !question {i}"
+        if mode == "blocking":
+            model.generate_content(prompt)
+        else:
+            await pool.submit(channel, lambda: generate_text(model, prompt))
+        # Every message "arrives" at t0, so this is time-to-reply.
+        latencies[channel].append(time.perf_counter() - t0)
+
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_lag(stop))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(handle(c, i) for c in range(channels) for i in range(per_channel)))
+    total = time.perf_counter() - t0
+    stop.set()
+    worst_lag = await watcher
+    await pool.close()
+
+    print(f"[{mode}]")
+    print(f"  wall time:           {total:.2f}s for {channels * per_channel} generations")
+    print(f"  worst loop stall:    {worst_lag * 1000:.0f} ms")
+    for c, lat in latencies.items():
+        print(f"  channel {c} first reply after {min(lat):.2f}s, last after {max(lat):.2f}s")
+
+
+async def main():
+    channels = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    per_channel = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    await run("blocking", channels, per_channel)
+    await run("pool", channels, per_channel)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""Concurrency stress test for economy.Ledger: throughput and lost updates.
+
+    python benchmarks/bench_ledger.py [users] [workers] [ops_per_worker]
+
+Workers run a random mix of transfers, debits, credits, one-shot wagers,
+escrowed bets settled after a pause, and read-modify-write transactions that
+await between the read and the write (like a command doing a REST call
+mid-update). Oil is conserved by construction, so after the run
+balances + escrowed must equal the starting total plus net credits and wager
+payouts; any difference is a lost or duplicated update. "naive" runs the same
+mix against the records directly, the way commands used to.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from storage import UserStore, DEFAULT_OIL
+from economy import Ledger, InsufficientFunds
+
+
+async def run(mode: str, users: int, workers: int, ops: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UserStore(os.path.join(tmp, "economy.sqlite3"), flush_interval=0.5)
+        store.start()
+        ledger = Ledger(store)
+        ids = [10**17 + i for i in range(users)]
+        start_total = DEFAULT_OIL * users
+        net = 0  # oil created by credits and wager payouts
+
+        async def naive_take(uid, amount):
+            rec = store.get(uid)
+            balance = rec["oil"]
+            await asyncio.sleep(0)
+            if balance < amount:
+                raise InsufficientFunds(uid, balance, amount)
+            rec["oil"] = balance - amount
+
+        async def naive_give(uid, amount):
+            rec = store.get(uid)
+            balance = rec["oil"]
+            await asyncio.sleep(0)
+            rec["oil"] = balance + amount
+
+        async def worker(seed):
+            nonlocal net
+            rng = random.Random(seed)
+            for _ in range(ops):
+                a, b = rng.sample(ids, 2)
+                amount = rng.randint(1, 50)
+                op = rng.random()
+                try:
+                    if mode == "naive":
+                        if op < 0.4:
+                            await naive_take(a, amount)
+                            await naive_give(b, amount)
+                        elif op < 0.7:
+                            await naive_take(a, amount)
+                            net -= amount
+                        else:
+                            await naive_give(a, amount)
+                            net += amount
+                        continue
+                    if op < 0.3:
+                        await ledger.transfer(a, b, amount)
+                    elif op < 0.45:
+                        await ledger.debit(a, amount)
+                        net -= amount
+                    elif op < 0.6:
+                        await ledger.credit(a, amount)
+                        net += amount
+                    elif op < 0.75:
+                        payout = rng.choice((-amount, 0, amount))
+                        await ledger.wager(a, amount, payout)
+                        net += payout
+                    elif op < 0.9:
+                        stake = await ledger.escrow(a, amount)
+                        await asyncio.sleep(0)
+                        payout = rng.choice((-amount, 0, amount))
+                        await stake.settle(payout)
+                        net += payout
+                    else:
+                        async with ledger.transaction(a) as (rec,):
+                            balance = rec["oil"]
+                            await asyncio.sleep(0)
+                            rec["oil"] = balance + amount
+                        net += amount
+                except InsufficientFunds:
+                    pass
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(workers)))
+        elapsed = time.perf_counter() - t0
+        await store.flush_async()
+
+        actual = sum(store.get(uid)["oil"] for uid in ids) + ledger.held()
+        expected = start_total + net
+        stats = ledger.stats()
+        print(f"{mode:<7} {workers * ops / elapsed:>9,.0f} ops/s  lost/duplicated oil: {actual - expected:+}  "
+              f"(contended waits {stats['contended']}, locks left {stats['locked_users']}, escrows left {stats['escrows']})")
+        store.close()
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    ops = int(sys.argv[3]) if len(sys.argv) > 3 else 400
+    print(f"{users} users, {workers} concurrent workers x {ops} ops")
+    for mode in ("naive", "ledger"):
+        asyncio.run(run(mode, users, workers, ops))
+
+
+if __name__ == "__main__":
+    main()
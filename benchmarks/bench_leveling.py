@@ -0,0 +1,98 @@
+"""Level-up math and bulk XP grants.
+
+    python benchmarks/bench_leveling.py [users] [xp]
+
+1. The old one-level-at-a-time loop vs main.levels_gained for `xp` XP.
+2. Granting `xp` XP to `users` members: one /givexp-style single-user grant
+   per member vs one main.grant for all of them, against benchmarks/fake_interactions
+   (5 ms fake REST), counting ledger transactions and member edits until the
+   REST queue drains. "bulk-lean" repeats the grant with no members cached,
+   as under LEAN_GATEWAY, so each role sync first fetches its member and then
+   adds the level role on its own instead of rewriting the member's role list.
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+
+from fake_interactions import fake_login, FakeRest, FakeGuild, FakeMember
+
+
+def loop_levels(level: int, xp: int, xp_to_next_level) -> int:
+    start = level
+    while xp >= xp_to_next_level(level):
+        xp -= xp_to_next_level(level)
+        level += 1
+    return level - start
+
+
+def bench_math(main, xp: int):
+    runs = 2000
+    t0 = time.perf_counter()
+    for level in range(runs):
+        loop_levels(level % 50, xp, main.xp_to_next_level)
+    loop = (time.perf_counter() - t0) / runs
+    t0 = time.perf_counter()
+    for level in range(runs):
+        main.levels_gained(level % 50, xp)
+    closed = (time.perf_counter() - t0) / runs
+    levels = main.levels_gained(0, xp)
+    print(f"{xp:,} XP from level 0 = {levels} levels: loop {loop * 1e6:.1f} us, closed form {closed * 1e6:.2f} us")
+
+
+async def bench_grant(main, mode: str, users: int, xp: int):
+    rest = FakeRest(latency=0.005, jitter=0.0)
+    guild = FakeGuild(rest, cached=mode != "bulk-lean")
+    members = [FakeMember(guild) for _ in range(users)]
+    main.role_index.invalidate(guild.id)
+    before = main.ledger.transactions
+
+    t0 = time.perf_counter()
+    if mode == "per-user":
+        for member in members:
+            await main.grant(guild, [member.id], xp=xp)
+    else:
+        await main.grant(guild, [m.id for m in members], xp=xp)
+    applied = time.perf_counter() - t0
+    while sum(main.rest.depth.values()) or main.rest.stats()["in_flight"]:
+        await asyncio.sleep(0.005)
+    drained = time.perf_counter() - t0
+    print(f"{mode:<9} {users} users: applied in {applied * 1000:7.1f} ms, "
+          f"{main.ledger.transactions - before:>5} ledger transactions, "
+          f"{rest.calls['PATCH /guilds/{guild}/members/{user}']} member edits, "
+          f"{rest.calls['PUT /guilds/{guild}/members/{user}/roles/{role}']} role adds, "
+          f"{rest.calls['GET /guilds/{guild}/members/{user}']} member fetches, "
+          f"{rest.calls['POST /guilds/{guild}/roles']} roles created, roles synced after {drained:.2f}s")
+
+
+async def run(main, users: int, xp: int):
+    fake_login(main.bot)
+    await main.setup_hook()
+    bench_math(main, xp)
+    for mode in ("per-user", "bulk", "bulk-lean"):
+        await bench_grant(main, mode, users, xp)
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    xp = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ECONOMY_DB_PATH"] = os.path.join(tmp, "economy.sqlite3")
+        os.environ["REMINDER_DB_PATH"] = os.path.join(tmp, "reminders.sqlite3")
+        os.environ["STATE_DIR"] = os.path.join(tmp, "state")
+        os.environ.pop("PORT", None)
+        import main as bot_main
+        try:
+            asyncio.run(run(bot_main, users, xp))
+        finally:
+            bot_main.user_data.close()
+            bot_main.reminders.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Offline load test: synthetic traffic through main.py's real handlers.
+
+    python benchmarks/bench_load.py [--users 5000] [--channels 20] [--concurrency 64] [--ops 20000]
+                                    [--latency 0.05] [--rate-429 0.01] [--mix gamble=3,slots=3,...]
+
+Imports main.py (which only registers commands when imported), runs its
+setup_hook, and has --concurrency virtual clients run slash commands (gamble,
+slots, blackjack/hit/stand, buy, leaderboard) and on_message for random users
+in random channels, against the fakes in fake_interactions.py. Commands are
+dispatched through CommandTree._call with a synthetic interaction payload, so
+the tree's interaction_check, command checks, argument transforms, error
+handler and the metrics hooks all run as they would for a real interaction. Per
+handler it prints p50/p99 latency; overall it prints ops/s, failed commands,
+fake REST calls and 429s, how long the REST queue took to drain, and RSS growth. Economy and
+reminder databases and runtime state go to a temporary directory.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+
+from fake_interactions import fake_login, FakeRest, FakeGuild, FakeMember, FakeChannel, FakeMessage, command_interaction
+
+DEFAULT_MIX = "gamble=3,slots=3,blackjack=2,buy=1,leaderboard=1,message=10"
+
+
+def rss() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(args, main):
+    rest = FakeRest(latency=args.latency, jitter=args.latency / 2, rate_429=args.rate_429, retry_after=args.retry_after)
+    guild = FakeGuild(rest)
+    channels = [FakeChannel(guild) for _ in range(args.channels)]
+    members = [FakeMember(guild) for _ in range(args.users)]
+    items = list(main.shop_items)
+
+    # Some chat goes through talk mode and the length limit, like a busy server
+    main.length_limits[guild.id] = {"max_len": 120, "character": "N"}
+    main.talk_enabled_users.update(m.id for m in members[: max(1, args.users // 100)])
+
+    fake_login(main.bot)
+    await main.setup_hook()
+    for member in members:
+        await main.ledger.credit(member.id, 10_000)
+
+    latencies: dict[str, list[float]] = {}
+    failed = 0
+
+    async def timed(name: str, call):
+        t = time.perf_counter()
+        await call
+        latencies.setdefault(name, []).append(time.perf_counter() - t)
+
+    async def invoke(name: str, user, channel, **options):
+        nonlocal failed
+        interaction = command_interaction(user, channel, name, main.TEST_GUILD.id, **options)
+        await main.tree._call(interaction)
+        failed += interaction.command_failed
+
+    def command(name: str, user, channel, **options):
+        return timed(name, invoke(name, user, channel, **options))
+
+    async def blackjack_round(user, channel):
+        await command("blackjack", user, channel, bet=random.randint(10, 200))
+        entry = main.blackjack_games.get(user.id)
+        while entry is not None and entry[0].player.total < 17:
+            await command("hit", user, channel)
+            entry = main.blackjack_games.get(user.id)
+        if entry is not None:
+            await command("stand", user, channel)
+
+    def operation(kind: str, user):
+        channel = random.choice(channels)
+        if kind in ("gamble", "slots"):
+            return command(kind, user, channel, amount=random.randint(10, 200))
+        if kind == "blackjack":
+            return blackjack_round(user, channel)
+        if kind == "buy":
+            return command("buy", user, channel, item_key=random.choice(items))
+        if kind == "leaderboard":
+            return command("leaderboard", user, channel)
+        content = "x" * random.choice((20, 60, 200))
+        return timed("on_message", main.on_message(FakeMessage(user, channel, content)))
+
+    kinds, weights = zip(*((k, float(w)) for k, w in (part.split("=") for part in args.mix.split(","))))
+    remaining = args.ops
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await operation(random.choices(kinds, weights)[0], random.choice(members))
+
+    before = rss()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - t0
+    while sum(main.rest.depth.values()) or main.rest.stats()["in_flight"]:
+        await asyncio.sleep(0.01)
+    drained = time.perf_counter() - t0 - elapsed
+    growth = rss() - before
+
+    calls = sum(len(v) for v in latencies.values())
+    print(f"{'handler':<12} {'calls':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, values in sorted(latencies.items()):
+        print(f"{name:<12} {len(values):>7} {percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.99) * 1000:>8.1f}")
+    print(f"\n{args.ops} ops ({calls} handler calls) at concurrency {args.concurrency} in {elapsed:.2f}s: "
+          f"{args.ops / elapsed:.0f} ops/s, {calls / elapsed:.0f} handler calls/s, {failed} commands failed")
+    print(f"fake REST: {sum(rest.calls.values())} calls, {rest.rate_limited} 429s; "
+          f"background queue drained {drained * 1000:.0f} ms after the last op; coalesced {main.rest.stats()['coalesced']}")
+    print(f"RSS growth {growth / 2**20:+.1f} MiB ({rss() / 2**20:.1f} MiB total)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of main.py's command handlers")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake REST latency in seconds")
+    parser.add_argument("--rate-429", type=float, default=0.01, help="share of fake REST calls answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ECONOMY_DB_PATH"] = os.path.join(tmp, "economy.sqlite3")
+        os.environ["REMINDER_DB_PATH"] = os.path.join(tmp, "reminders.sqlite3")
+        os.environ["STATE_DIR"] = os.path.join(tmp, "state")
+        os.environ.pop("PORT", None)
+        import main as bot_main
+        try:
+            asyncio.run(run(args, bot_main))
+        finally:
+            bot_main.user_data.close()
+            bot_main.reminders.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Bulk kick throughput against a local fake Discord REST endpoint.
+
+    python benchmarks/bench_moderation.py [users]
+
+Compares the old sequential masskick loop, an unbudgeted asyncio.gather, and
+moderation.BulkModerator, all through discord.py's real HTTP client against
+benchmarks/fake_discord.FakeDiscord (80 ms latency, 50 requests/s per route).
+"""
+import os
+import sys
+import time
+import asyncio
+import discord
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import moderation
+from moderation import BulkModerator
+from fake_discord import FakeDiscord, use
+
+GUILD_ID = 1388197138487574742
+
+
+async def run(mode: str, users: int):
+    server = FakeDiscord(latency=0.08, limit=50, window=1.0)
+    await server.start()
+    use(server)
+    client = discord.Client(intents=discord.Intents.none())
+    await client.http.static_login("bench-token")
+    guild = discord.Guild(data={"id": str(GUILD_ID), "name": "bench"}, state=client._connection)
+    user_ids = [10**17 + i for i in range(users)]
+
+    t0 = time.perf_counter()
+    if mode == "sequential":
+        for uid in user_ids:
+            await moderation.kick(guild, uid)
+    elif mode == "gather":
+        await asyncio.gather(*(moderation.kick(guild, uid) for uid in user_ids))
+    else:
+        report = await BulkModerator(concurrency=16, rate=40, burst=5).run(guild, "kick", moderation.kick, user_ids)
+        assert len(report.succeeded) == users, report.failed
+    elapsed = time.perf_counter() - t0
+    print(f"{mode:<10} {users / elapsed:7.1f} kicks/s  total {elapsed:6.2f}s  requests {server.requests:>5}  429s {server.rate_limited}")
+
+    await client.close()
+    await server.close()
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    for mode in ("sequential", "gather", "bulk"):
+        asyncio.run(run(mode, users))
+
+
+if __name__ == "__main__":
+    main()
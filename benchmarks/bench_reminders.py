@@ -0,0 +1,73 @@
+"""100k pending reminders: heap memory and dispatch jitter of scheduler.ReminderScheduler.
+
+    python benchmarks/bench_reminders.py [reminders] [window_seconds]
+
+Reminders are spread uniformly over the window; jitter is delivery time minus due time.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from scheduler import ReminderScheduler
+
+
+def rss() -> int:
+    # Current resident set size in bytes (Linux).
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def pct(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    window = float(sys.argv[2]) if len(sys.argv) > 2 else 60.0
+    lateness = []
+    due_at = {}
+
+    async def deliver(user_id, message):
+        lateness.append(time.time() - due_at[user_id])
+        await asyncio.sleep(0.005)  # a DM round-trip
+
+    path = os.path.join(tempfile.mkdtemp(), "reminders.sqlite3")
+    sched = ReminderScheduler(path, deliver, concurrency=50)
+
+    # Schedule everything through the real path first, relative to a common base
+    # time far enough out that none of it is overdue once dispatch starts.
+    base_mem = rss()
+    rng = random.Random(1)
+    base = time.time() + n / 5000 + 2
+    t0 = time.perf_counter()
+    for chunk in range(0, n, 1000):
+        uids = range(chunk, min(n, chunk + 1000))
+        dues = await asyncio.gather(*(
+            sched.schedule(uid, "ping", base + rng.random() * window - time.time()) for uid in uids
+        ))
+        due_at.update(zip(uids, dues))
+    scheduled = time.perf_counter() - t0
+    pending = rss()
+    sched.start()
+    assert time.time() < base, "scheduling took longer than the lead time"
+
+    while sched.delivered + sched.failed < n:
+        await asyncio.sleep(0.1)
+    drained = rss()
+    sched.close()
+
+    lateness.sort()
+    print(f"reminders:        {n:,} over {window:.0f}s")
+    print(f"schedule time:    {scheduled:.2f}s ({n / scheduled:,.0f}/s, includes SQLite inserts)")
+    print(f"pending memory:   {(pending - base_mem) / 2**20:.1f} MiB RSS growth ({(pending - base_mem) / n:.0f} B/reminder)")
+    print(f"after dispatch:   {(drained - base_mem) / 2**20:.1f} MiB RSS growth")
+    print(f"jitter p50/p99/max: {pct(lateness, .5) * 1000:.1f} / {pct(lateness, .99) * 1000:.1f} / {lateness[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
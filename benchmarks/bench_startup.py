@@ -0,0 +1,102 @@
+"""Cold start of a child bot and command syncs across manager reconnects.
+
+    python benchmarks/bench_startup.py [reconnects]
+
+1. Child bot: time from interpreter start until a model object exists, with
+   google.generativeai imported up front (the old child_bot) vs child_bot's
+   LazyModel. Each is the median of 5 fresh interpreters.
+2. Manager: `reconnects` on_ready calls against benchmarks/fake_discord with a
+   60-command tree, calling tree.sync every time (old) vs
+   command_sync.sync_commands.
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import statistics
+import subprocess
+import discord
+from discord import app_commands
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from command_sync import sync_commands
+from fake_discord import FakeDiscord, use
+
+GUILD = discord.Object(id=1388197138487574742)
+
+EAGER = """
+import sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import google.generativeai as genai
+import child_bot
+genai.configure(api_key="benchmark")
+model = genai.GenerativeModel("models/gemini-1.5-flash")
+print(time.perf_counter() - t0)
+"""
+
+LAZY = """
+import sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import child_bot
+model = child_bot.create_model("benchmark")
+print(time.perf_counter() - t0)
+"""
+
+
+def child_startup(source: str) -> float:
+    runs = []
+    for _ in range(5):
+        out = subprocess.run([sys.executable, "-W", "ignore", "-c", source.format(root=ROOT)],
+                             capture_output=True, text=True, check=True)
+        runs.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(runs)
+
+
+def build_tree(client) -> app_commands.CommandTree:
+    tree = app_commands.CommandTree(client)
+    for i in range(60):
+        async def callback(interaction: discord.Interaction, amount: int, note: str = None):
+            pass
+        tree.add_command(app_commands.Command(name=f"command{i}", description=f"Benchmark command {i}", callback=callback),
+                         guild=GUILD)
+    return tree
+
+
+async def reconnects(mode: str, count: int, hash_path: str):
+    server = FakeDiscord(latency=0.08)
+    await server.start()
+    use(server)
+    client = discord.Client(intents=discord.Intents.none())
+    await client.http.static_login("bench-token")
+    client._connection.application_id = 42
+    tree = build_tree(client)
+
+    t0 = time.perf_counter()
+    for _ in range(count):
+        if mode == "always":
+            await tree.sync(guild=GUILD)
+        else:
+            await sync_commands(tree, GUILD, path=hash_path)
+    elapsed = time.perf_counter() - t0
+    print(f"{mode:<12} {count} on_ready calls: {server.syncs:>3} uploads, {elapsed * 1000:8.1f} ms total")
+
+    await client.close()
+    await server.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    eager, lazy = child_startup(EAGER), child_startup(LAZY)
+    print(f"child_bot cold start: eager genai {eager * 1000:.0f} ms, lazy {lazy * 1000:.0f} ms ({eager / lazy:.1f}x)")
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(reconnects("always", count, os.path.join(tmp, "hashes.json")))
+        asyncio.run(reconnects("fingerprint", count, os.path.join(tmp, "hashes.json")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Runtime state snapshot/delta size and restore time at scale.
+
+    python benchmarks/bench_state.py [talk_users] [games]
+
+Imports main.py (databases and state in a temp directory) and fills the state
+it persists: `talk_users` talk-mode users, `games` open blackjack games and as
+many trivia questions, 10k guild length limits. Then it writes a snapshot,
+changes 1% of the entries into the delta log, and restores everything in a
+fresh interpreter, checking the restored state matches. The first snapshot
+sorts every id; the one taken after the restart starts from the mapped array.
+"""
+import os
+import sys
+import json
+import hashlib
+import time
+import random
+import asyncio
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+
+def digest(items) -> str:
+    # hash() of strings is salted per process, so compare a stable digest instead
+    return hashlib.sha1(repr(sorted(items)).encode()).hexdigest()
+
+
+def fingerprint(main) -> dict:
+    games = [(uid, game.bet, stake.amount, guild, bytes(game.player.cards).hex(), bytes(game.dealer.cards).hex())
+             for uid, (game, stake, guild) in main.blackjack_games.items()]
+    return {
+        "gambling": main.gambling_enabled,
+        "talk": len(main.talk_enabled_users), "talk_sum": sum(main.talk_enabled_users),
+        "limits": sorted([g, v["max_len"], v["character"]] for g, v in main.length_limits.items()),
+        "games": digest(games), "game_count": len(games),
+        "trivia": digest((uid, q["q"]) for uid, q in main.active_trivia.items()),
+        "held": main.ledger.held(),
+    }
+
+
+async def write(talk_users: int, games: int):
+    import main
+    state = main.runtime
+    main.talk_enabled_users.update(random.sample(range(10**17, 10**18), talk_users))
+    for i in range(10_000):
+        main.length_limits[10**17 + i] = {"max_len": random.randint(50, 500), "character": f"Character {i} ✨"}
+    for i in range(games):
+        uid = 2 * 10**17 + i
+        game = main.BlackjackGame(uid, random.randint(10, 500), main.BLACKJACK_DECKS)
+        game.deal()
+        while game.player.total < 15:
+            game.hit()
+        # Held in the economy database, as Ledger.escrow would, so the restart reopens it
+        main.user_data.hold(main.user_data.get(uid), game.bet)
+        main.blackjack_games[uid] = (game, main.ledger.restore_escrow(uid, game.bet), 10**17 + i % 10_000)
+        main.active_trivia[uid] = random.choice(main.trivia_questions)
+    main.gambling_enabled = False
+
+    t0 = time.perf_counter()
+    state.snapshot()
+    snap_ms = (time.perf_counter() - t0) * 1000
+    snap_size = os.path.getsize(state.snapshot_path)
+
+    # 1% churn into the delta log
+    talk = list(main.talk_enabled_users)
+    for uid in talk[: talk_users // 100]:
+        main.talk_enabled_users.discard(uid)
+        state.changed("talk", uid)
+    for uid in list(main.blackjack_games)[: games // 100]:
+        game = main.blackjack_games[uid][0]
+        if game.player.total < 21:
+            game.hit()
+        main.blackjack_games.touch(uid)
+    for uid in list(main.active_trivia)[: games // 100]:
+        del main.active_trivia[uid]
+    state.changed("flags")
+    t0 = time.perf_counter()
+    records = state.flush()
+    delta_ms = (time.perf_counter() - t0) * 1000
+    state._close_delta()
+    main.user_data.flush()
+
+    print(f"snapshot: {snap_size / 2**20:.1f} MiB written in {snap_ms:.0f} ms "
+          f"({talk_users:,} talk users, {games:,} games, {games:,} trivia, 10,000 length limits)")
+    print(f"delta:    {records:,} records, {os.path.getsize(state.delta_path) / 2**10:.0f} KiB appended in {delta_ms:.1f} ms")
+    return fingerprint(main)
+
+
+async def load():
+    import main
+    main.runtime.load()
+    main.reopen_restored_bets()
+    state = fingerprint(main)
+    # Next snapshot after a restart: the id set is already a sorted array
+    t0 = time.perf_counter()
+    main.runtime.snapshot()
+    print(json.dumps({"ms": main.runtime.restore_ms, "count": main.runtime.restored, "state": state,
+                      "resnapshot_ms": (time.perf_counter() - t0) * 1000}))
+
+
+def main():
+    if sys.argv[1:2] == ["--load"]:
+        asyncio.run(load())
+        return
+    talk_users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "ECONOMY_DB_PATH": os.path.join(tmp, "economy.sqlite3"),
+               "REMINDER_DB_PATH": os.path.join(tmp, "reminders.sqlite3"), "STATE_DIR": os.path.join(tmp, "state")}
+        os.environ.update(env)
+        expected = asyncio.run(write(talk_users, games))
+        out = subprocess.run([sys.executable, __file__, "--load"], env=env, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"restore:  {result['count']:,} entries (snapshot + delta) in {result['ms']:.0f} ms, "
+              f"state {'matches' if result['state'] == expected else 'DIFFERS'}")
+        print(f"snapshot after restart: {result['resnapshot_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
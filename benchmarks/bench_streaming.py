@@ -0,0 +1,74 @@
+"""Time to first visible token: streamed, edited replies vs. one send at the end.
+
+    python benchmarks/bench_streaming.py [reply_chars] [generation_seconds]
+
+Uses benchmarks/fake_model.FakeModel and a fake channel whose send/edit calls
+take a fixed REST round-trip. "Visible" means the first send() returned.
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from generation import generate_text, stream_text
+from streaming import StreamingReply, split_message
+from fake_model import FakeModel
+
+REST_LATENCY = 0.08
+
+
+class FakeMessage:
+    def __init__(self, channel, content):
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, content):
+        await asyncio.sleep(REST_LATENCY)
+        self.content = content
+        self.channel.edits += 1
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sent = []
+        self.edits = 0
+        self.first_visible = None
+
+    async def send(self, content):
+        assert 0 < len(content) <= 2000, len(content)
+        await asyncio.sleep(REST_LATENCY)
+        if self.first_visible is None:
+            self.first_visible = time.perf_counter()
+        msg = FakeMessage(self, content)
+        self.sent.append(msg)
+        return msg
+
+
+async def run(mode: str, model: FakeModel):
+    channel = FakeChannel()
+    t0 = time.perf_counter()
+    if mode == "stream":
+        text = await StreamingReply(channel).consume(stream_text(model, "persona\nUser: !hi"))
+    else:
+        text = await generate_text(model, "persona\nUser: !hi")
+        for part in split_message(text):
+            await channel.send(part)
+    total = time.perf_counter() - t0
+    assert "".join(m.content for m in channel.sent) == text
+    print(f"[{mode}] first visible {channel.first_visible - t0:.2f}s, complete {total:.2f}s, "
+          f"{len(channel.sent)} message(s), {channel.edits} edit(s)")
+
+
+async def main():
+    chars = int(sys.argv[1]) if len(sys.argv) > 1 else 4500
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 6.0
+    model = FakeModel(latency=seconds, reply_chars=chars, chunk_chars=60, first_chunk=0.3)
+    print(f"reply: {chars} chars generated over {seconds:.1f}s, {REST_LATENCY * 1000:.0f} ms per REST call")
+    await run("send-at-end", model)
+    await run("stream", model)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
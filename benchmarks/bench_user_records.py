@@ -0,0 +1,72 @@
+"""Memory of 1M synthetic users: the old per-user dict layout vs storage.UserRecord.
+
+    python benchmarks/bench_user_records.py [users]
+"""
+import os
+import sys
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from storage import UserStore, UserRecord
+
+SHOP_KEYS = [
+    "worker_drone_arm", "worker_drone_leg", "disassembly_drone_limb",
+    "murder_drone_eye", "electrician_circuit", "solver_brain_chip",
+]
+
+
+def synthetic_users(n):
+    rng = random.Random(42)
+    for uid in range(10**17, 10**17 + n):
+        # Roughly one in ten players has bought something.
+        inv = {rng.choice(SHOP_KEYS): rng.randint(1, 3)} if rng.random() < 0.1 else {}
+        yield uid, rng.randint(0, 50_000), rng.randint(0, 500), rng.randint(0, 30), inv
+
+
+def dict_layout(n):
+    return {
+        uid: {
+            "oil": oil,
+            "xp": xp,
+            "level": level,
+            "inventory": dict(inv),
+            "blackjack": None,
+            "slots_cooldown": 0,
+            "roulette_cooldown": 0,
+        }
+        for uid, oil, xp, level, inv in synthetic_users(n)
+    }
+
+
+def record_layout(n, store):
+    return {
+        uid: UserRecord(store, uid, oil, xp, level, {store.item_id(k): v for k, v in inv.items()} or None)
+        for uid, oil, xp, level, inv in synthetic_users(n)
+    }
+
+
+def measure(build, *args):
+    tracemalloc.start()
+    data = build(*args)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    store = UserStore(":memory:")
+    store.register_items(SHOP_KEYS)
+    old = measure(dict_layout, n)
+    new = measure(record_layout, n, store)
+    print(f"users:        {n:,}")
+    print(f"dict layout:  {old / 2**20:8.1f} MiB  ({old / n:.0f} B/user)")
+    print(f"UserRecord:   {new / 2**20:8.1f} MiB  ({new / n:.0f} B/user)")
+    print(f"saving:       {1 - new / old:.0%}")
+
+
+if __name__ == "__main__":
+    main()
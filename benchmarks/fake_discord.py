@@ -0,0 +1,99 @@
+"""A local stand-in for the Discord REST API, for benchmarks.
+
+Answers GET /users/@me, guild command syncs and the member/ban routes used by
+moderation.py after `latency` seconds, with Discord-style rate-limit headers: each route bucket
+(method + guild) allows `limit` requests per `window` seconds and answers 429
+beyond that. Point discord.py at it with `use(server)`.
+"""
+import json
+import time
+import asyncio
+import discord
+from aiohttp import web
+
+
+def _json(data, status: int = 200, headers: dict = None):
+    # discord.py only decodes bodies whose Content-Type is exactly application/json.
+    return web.Response(body=json.dumps(data).encode(), status=status, headers={**(headers or {}), "Content-Type": "application/json"})
+
+
+class FakeDiscord:
+    def __init__(self, latency: float = 0.08, limit: int = 50, window: float = 1.0):
+        self.latency = latency
+        self.limit = limit
+        self.window = window
+        self.requests = 0
+        self.rate_limited = 0
+        self.syncs = 0
+        self._buckets: dict[str, tuple[float, int]] = {}
+        self._runner = None
+        self.port = None
+
+    def _take(self, bucket: str):
+        now = time.monotonic()
+        reset, used = self._buckets.get(bucket, (now + self.window, 0))
+        if now >= reset:
+            reset, used = now + self.window, 0
+        used += 1
+        self._buckets[bucket] = (reset, used)
+        return reset - now, self.limit - used
+
+    async def _me(self, request):
+        return _json({"id": "1", "username": "bench", "discriminator": "0", "avatar": None, "bot": True})
+
+    async def _moderate(self, request):
+        self.requests += 1
+        bucket = f"{request.method}:{request.match_info['guild']}"
+        reset_after, remaining = self._take(bucket)
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Bucket": bucket,
+        }
+        await asyncio.sleep(self.latency)
+        if remaining < 0:
+            self.rate_limited += 1
+            headers["X-RateLimit-Scope"] = "user"
+            # Without Via, discord.py treats a 429 as a Cloudflare ban and does not retry.
+            headers["Via"] = "1.1 google"
+            return _json(
+                {"message": "You are being rate limited.", "retry_after": reset_after, "global": False},
+                status=429, headers=headers,
+            )
+        if request.method in ("GET", "PATCH"):
+            return _json({"user": {"id": request.match_info["user"], "username": "x", "discriminator": "0", "avatar": None},
+                                      "roles": [], "joined_at": None, "deaf": False, "mute": False, "flags": 0}, headers=headers)
+        return web.Response(status=204, headers=headers)
+
+    async def _sync_commands(self, request):
+        self.syncs += 1
+        app_id = request.match_info["app"]
+        payload = await request.json()
+        await asyncio.sleep(self.latency)
+        return _json([
+            {"id": str(1000 + i), "application_id": app_id, "version": "1", "default_member_permissions": None,
+             "guild_id": request.match_info["guild"], **command}
+            for i, command in enumerate(payload)
+        ])
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/api/v10/users/@me", self._me)
+        for method in ("GET", "DELETE", "PATCH"):
+            app.router.add_route(method, "/api/v10/guilds/{guild}/members/{user}", self._moderate)
+        app.router.add_put("/api/v10/guilds/{guild}/bans/{user}", self._moderate)
+        app.router.add_put("/api/v10/applications/{app}/guilds/{guild}/commands", self._sync_commands)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        await self._runner.cleanup()
+
+
+def use(server: FakeDiscord):
+    discord.http.Route.BASE = f"http://127.0.0.1:{server.port}/api/v10"
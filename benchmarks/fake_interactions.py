@@ -0,0 +1,203 @@
+"""In-process stand-ins for the discord.py objects main.py's handlers touch.
+
+Every call that would reach Discord (interaction responses, channel sends,
+message deletes, role creation, member edits) goes through FakeRest, which
+waits `latency` seconds (plus up to `jitter`) and answers a `rate_429` share
+of calls with a 429, retried after `retry_after` the way discord.py's HTTP
+client would. No sockets, no tokens.
+"""
+import random
+import asyncio
+import itertools
+from collections import Counter
+import discord
+
+_ids = itertools.count(10**17)
+
+
+def fake_login(client: discord.Client):
+    """Give a client that never connected a bot user (commands.Bot.process_commands needs one) and
+    the running loop (event dispatch needs it). Call it from inside that loop."""
+    client.loop = asyncio.get_running_loop()
+    state = client._connection
+    state.user = discord.ClientUser(state=state, data={"id": next(_ids), "username": "bench", "discriminator": "0",
+                                                       "avatar": None, "bot": True})
+
+
+class _NotFoundResponse:
+    status = 404
+    reason = "Not Found"
+
+
+class FakeRest:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, rate_429: float = 0.0, retry_after: float = 0.5):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.rate_limited = 0
+
+    async def call(self, route: str):
+        self.calls[route] += 1
+        while True:
+            await asyncio.sleep(self.latency + random.random() * self.jitter)
+            if random.random() >= self.rate_429:
+                return
+            self.rate_limited += 1
+            await asyncio.sleep(self.retry_after)
+
+
+class FakeRole:
+    def __init__(self, guild: "FakeGuild", name: str):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = name
+
+    def __repr__(self):
+        return f"<FakeRole {self.name}>"
+
+
+class FakeGuild:
+    """`cached=False` behaves like LEAN_GATEWAY: get_member finds nobody, fetch_member costs a REST call."""
+
+    def __init__(self, rest: FakeRest, name: str = "bench", cached: bool = True):
+        self.id = next(_ids)
+        self.name = name
+        self.rest = rest
+        self.cached = cached
+        self.shard_id = 0
+        self.default_role = FakeRole(self, "@everyone")
+        self.roles = [self.default_role]
+        self.members: dict[int, "FakeMember"] = {}
+
+    async def create_role(self, name: str, reason: str = None) -> FakeRole:
+        await self.rest.call("POST /guilds/{guild}/roles")
+        role = FakeRole(self, name)
+        self.roles.append(role)
+        return role
+
+    def get_member(self, user_id: int):
+        return self.members.get(user_id) if self.cached else None
+
+    async def fetch_member(self, user_id: int):
+        await self.rest.call("GET /guilds/{guild}/members/{user}")
+        if user_id not in self.members:
+            raise discord.NotFound(_NotFoundResponse(), "Unknown Member")
+        return self.members[user_id]
+
+
+class FakeMember:
+    def __init__(self, guild: FakeGuild, admin: bool = False):
+        self.id = next(_ids)
+        self.name = f"user{self.id % 100000}"
+        self.display_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.bot = False
+        self.guild = guild
+        self.roles = [guild.default_role]
+        self.guild_permissions = discord.Permissions.all() if admin else discord.Permissions.none()
+        guild.members[self.id] = self
+
+    async def edit(self, roles=None, reason: str = None, **fields):
+        await self.guild.rest.call("PATCH /guilds/{guild}/members/{user}")
+        if roles is not None:
+            self.roles = [self.guild.default_role, *roles]
+
+    async def add_roles(self, *roles, reason: str = None):
+        for role in roles:
+            await self.guild.rest.call("PUT /guilds/{guild}/members/{user}/roles/{role}")
+            if role not in self.roles:
+                self.roles.append(role)
+
+    async def remove_roles(self, *roles, reason: str = None):
+        for role in roles:
+            await self.guild.rest.call("DELETE /guilds/{guild}/members/{user}/roles/{role}")
+            if role in self.roles:
+                self.roles.remove(role)
+
+    def __str__(self):
+        return self.name
+
+
+class FakeChannel:
+    def __init__(self, guild: FakeGuild):
+        self.id = next(_ids)
+        self.guild = guild
+
+    async def send(self, content: str = None, **fields):
+        await self.guild.rest.call("POST /channels/{channel}/messages")
+
+
+class FakeMessage:
+    _state = None  # commands.Context copies it; nothing reads it for messages without the prefix
+
+    def __init__(self, author: FakeMember, channel: FakeChannel, content: str):
+        self.id = next(_ids)
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+        self.mentions = []
+        self.webhook_id = None
+
+    async def delete(self):
+        await self.guild.rest.call("DELETE /channels/{channel}/messages/{message}")
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, content: str = None, **fields):
+        self._done = True
+        await self.interaction.guild.rest.call("POST /interactions/{interaction}/callback")
+
+    async def defer(self, **fields):
+        self._done = True
+        await self.interaction.guild.rest.call("POST /interactions/{interaction}/callback")
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+
+    async def send(self, content: str = None, **fields):
+        await self.interaction.guild.rest.call("POST /webhooks/{application}/{token}")
+
+
+class FakeInteraction:
+    def __init__(self, user: FakeMember, channel: FakeChannel, data: dict = None):
+        self.id = next(_ids)
+        self.type = discord.InteractionType.application_command
+        self.data = data
+        self._state = None
+        self.user = user
+        self.guild = user.guild
+        self.guild_id = user.guild.id
+        self.channel = channel
+        self.command_failed = False
+        self.extras = {}
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    @property
+    def command(self):
+        # Filled in by CommandTree._call, like discord.Interaction.command
+        return getattr(self, "_cs_command", None)
+
+
+_OPTION_TYPES = ((bool, 5), (int, 4), (float, 10), (str, 3))
+
+
+def command_interaction(user: FakeMember, channel: FakeChannel, name: str, guild_id: int, **options) -> FakeInteraction:
+    """A FakeInteraction carrying the payload of `/name` registered in `guild_id`, for CommandTree._call."""
+    data = {"type": 1, "name": name, "guild_id": str(guild_id), "options": [
+        {"name": key, "type": next(t for cls, t in _OPTION_TYPES if isinstance(value, cls)), "value": value}
+        for key, value in options.items()
+    ]}
+    return FakeInteraction(user, channel, data)
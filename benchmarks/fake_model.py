@@ -0,0 +1,35 @@
+"""Local stand-in for google.generativeai.GenerativeModel used by the benchmarks.
+
+Only the surface the bots use is implemented: a blocking `generate_content(prompt)`
+returning an object with `.text`, and `stream=True` yielding chunks with `.text`.
+"""
+import time
+from types import SimpleNamespace
+
+
+class FakeModel:
+    def __init__(self, latency: float = 0.5, reply_chars: int = 400, chunk_chars: int = 40, first_chunk: float = 0.1):
+        self.latency = latency            # total generation time
+        self.reply_chars = reply_chars
+        self.chunk_chars = chunk_chars
+        self.first_chunk = first_chunk    # time to first streamed chunk
+        self.calls = 0
+
+    def _reply(self, prompt: str) -> str:
+        words = f"echo:{prompt[-40:]} " + "lorem ipsum dolor sit amet " * (self.reply_chars // 27 + 1)
+        return words[: self.reply_chars]
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        self.calls += 1
+        text = self._reply(prompt)
+        if not stream:
+            time.sleep(self.latency)
+            return SimpleNamespace(text=text)
+        return self._stream(text)
+
+    def _stream(self, text: str):
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        rest = (self.latency - self.first_chunk) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            time.sleep(self.first_chunk if i == 0 else rest)
+            yield SimpleNamespace(text=chunk)
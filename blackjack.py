@@ -0,0 +1,123 @@
+"""Blackjack engine.
+
+A card is an int 0-51: rank = card % 13 (0 = ace, 1-9 = 2-10, 10-12 = J/Q/K),
+suit = card // 13. A game deals from a virtual shoe of `decks` * 52 cards: each
+draw picks a uniformly random position that has not been drawn yet, recorded in
+one int bitmask, which is the same distribution as shuffling the whole shoe
+without allocating it. Hand totals are kept incrementally, with the number of
+aces still counted as 11 ("soft" aces).
+"""
+import random
+
+RANKS = ("A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K")
+SUITS = ("♠", "♥", "♦", "♣")
+VALUES = (11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10)
+
+# Dealer draws to 16 and stands on all 17s
+DEALER_STANDS = 17
+
+
+def card_name(card: int) -> str:
+    return RANKS[card % 13] + SUITS[card // 13 % 4]
+
+
+class Hand:
+    __slots__ = ("cards", "total", "soft_aces")
+
+    def __init__(self):
+        self.cards = bytearray()
+        self.total = 0
+        self.soft_aces = 0
+
+    def add(self, card: int) -> int:
+        self.cards.append(card)
+        rank = card % 13
+        self.total += VALUES[rank]
+        if rank == 0:
+            self.soft_aces += 1
+        while self.total > 21 and self.soft_aces:
+            self.total -= 10
+            self.soft_aces -= 1
+        return card
+
+    @property
+    def soft(self) -> bool:
+        return self.soft_aces > 0
+
+    @property
+    def busted(self) -> bool:
+        return self.total > 21
+
+    @property
+    def blackjack(self) -> bool:
+        return self.total == 21 and len(self.cards) == 2
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __str__(self):
+        return " ".join(card_name(c) for c in self.cards)
+
+
+class BlackjackGame:
+    __slots__ = ("user_id", "bet", "shoe_size", "drawn", "player", "dealer", "finished")
+
+    def __init__(self, user_id: int, bet: int, decks: int = 6):
+        self.user_id = user_id
+        self.bet = bet
+        self.shoe_size = decks * 52
+        self.drawn = 0
+        self.player = Hand()
+        self.dealer = Hand()
+        self.finished = False
+
+    @classmethod
+    def restore(cls, user_id: int, bet: int, shoe_size: int, player: bytes, dealer: bytes, finished: bool = False):
+        """Rebuild a game from its cards. Each dealt card takes the lowest free shoe position of its
+        kind; positions are only bookkeeping, so the remaining shoe is the same."""
+        game = cls(user_id, bet, shoe_size // 52)
+        for hand, cards in ((game.player, player), (game.dealer, dealer)):
+            for card in cards:
+                pos = card
+                while game.drawn >> pos & 1:
+                    pos += 52
+                game.drawn |= 1 << pos
+                hand.add(card)
+        game.finished = finished
+        return game
+
+    def draw(self, _random=random.random) -> int:
+        size = self.shoe_size
+        while True:
+            pos = int(_random() * size)
+            bit = 1 << pos
+            if not self.drawn & bit:
+                self.drawn |= bit
+                return pos % 52
+
+    def deal(self):
+        self.player.add(self.draw())
+        self.dealer.add(self.draw())
+        self.player.add(self.draw())
+        self.dealer.add(self.draw())
+
+    def hit(self) -> int:
+        card = self.player.add(self.draw())
+        if self.player.busted:
+            self.finished = True
+        return card
+
+    def stand(self):
+        dealer = self.dealer
+        while dealer.total < DEALER_STANDS:
+            dealer.add(self.draw())
+        self.finished = True
+
+    def outcome(self) -> int:
+        """+1 player wins, 0 push, -1 dealer wins (only meaningful once finished)."""
+        player, dealer = self.player.total, self.dealer.total
+        if player > 21:
+            return -1
+        if dealer > 21 or player > dealer:
+            return 1
+        return 0 if player == dealer else -1
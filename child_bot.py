@@ -1,43 +1,122 @@
+import os
 import sys
+import asyncio
+import threading
 import discord
-import google.generativeai as genai
+from generation import GenerationPool, PoolBusy, generate_text, stream_text
+from streaming import StreamingReply, split_message
+from response_cache import ResponseCache, cache_key
 
-# --- Argument Parsing ---
-try:
-    prompt_base = sys.argv[1]
-    gemini_key = sys.argv[2]
-    discord_token = sys.argv[3]
-except IndexError:
-    raise ValueError("❌ Missing required arguments: prompt, Gemini key, and Discord token.")
-
-if not gemini_key or gemini_key == "None":
-    raise ValueError("❌ Gemini API key is missing or invalid.")
+# Stream replies into progressively edited messages (LLM_STREAM=0 to send once at the end)
+STREAM_REPLIES = os.getenv("LLM_STREAM", "1") != "0"
 
 # --- Gemini Setup ---
-genai.configure(api_key=gemini_key)
-model = genai.GenerativeModel("models/gemini-1.5-flash")
+def create_model(gemini_key: str):
+    if not gemini_key or gemini_key == "None":
+        raise ValueError("❌ Gemini API key is missing or invalid.")
+    return LazyModel(gemini_key, "models/gemini-1.5-flash")
+
+class LazyModel:
+    """Imports google.generativeai (about a second of imports) and builds the model on first use.
+
+    ChildBot.setup_hook warms it in a worker thread, so neither startup nor the
+    event loop waits for the import. Code on the event loop must get the model
+    through `loaded()`: plain attribute access loads synchronously, and while the
+    warm-up holds the lock that would block the loop for the rest of the import.
+    """
+
+    def __init__(self, api_key: str, name: str):
+        self.api_key = api_key
+        self.name = name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                self._model = genai.GenerativeModel(self.name)
+        return self._model
+
+    async def loaded(self):
+        """The real model, waiting on a worker thread for the import if it has not finished."""
+        if self._model is None:
+            await asyncio.to_thread(self.load)
+        return self._model
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
 
 # --- Discord Setup ---
-intents = discord.Intents.default()
-intents.message_content = True
-bot = discord.Client(intents=intents)
-
-@bot.event
-async def on_ready():
-    print(f"✅ Child bot logged in as {bot.user}")
-
-@bot.event
-async def on_message(message):
-    if message.author == bot.user:
-        return
-
-    if bot.user.mentioned_in(message) or message.content.startswith("!"):
-        try:
-            full_prompt = f"{prompt_base}\nUser: {message.content}"
-            response = model.generate_content(full_prompt)
-            await message.channel.send(response.text)
-        except Exception as e:
-            await message.channel.send("❌ Something went wrong.")
-            print(f"[ERROR] {e}")
-
-bot.run(discord_token)
+class ChildBot(discord.Client):
+    """One persona. The model, generation pool and reply cache may be shared with other personas."""
+
+    def __init__(self, prompt_base: str, model, pool: GenerationPool, cache: ResponseCache, **options):
+        intents = discord.Intents.default()
+        intents.message_content = True
+        super().__init__(intents=intents, **options)
+        self.prompt_base = prompt_base
+        self.model = model
+        self.pool = pool
+        self.cache = cache
+
+    async def setup_hook(self):
+        self.pool.start()
+        if isinstance(self.model, LazyModel):
+            asyncio.create_task(asyncio.to_thread(self.model.load))
+
+    async def on_ready(self):
+        print(f"✅ Child bot logged in as {self.user}")
+
+    async def generate_reply(self, channel, full_prompt: str) -> str:
+        # generation.py probes the model's attributes; a LazyModel must be loaded before that
+        model = await self.model.loaded() if isinstance(self.model, LazyModel) else self.model
+        if STREAM_REPLIES:
+            return await StreamingReply(channel).consume(stream_text(model, full_prompt))
+        text = await generate_text(model, full_prompt)
+        for part in split_message(text):
+            await channel.send(part)
+        return text
+
+    async def on_message(self, message):
+        if message.author == self.user:
+            return
+
+        if self.user.mentioned_in(message) or message.content.startswith("!"):
+            try:
+                full_prompt = f"{self.prompt_base}\nUser: {message.content}"
+                # Only the caller that actually generates takes a pool slot; it also posts the reply.
+                text, generated = await self.cache.fetch(
+                    cache_key(self.prompt_base, message.content),
+                    lambda: self.pool.submit(message.channel.id, lambda: self.generate_reply(message.channel, full_prompt)),
+                )
+                if not generated:
+                    for part in split_message(text):
+                        await message.channel.send(part)
+            except PoolBusy:
+                await message.channel.send("⏳ I'm busy right now, try again in a moment.")
+            except asyncio.TimeoutError:
+                await message.channel.send("❌ That took too long, try again.")
+            except Exception as e:
+                await message.channel.send("❌ Something went wrong.")
+                print(f"[ERROR] {e}")
+
+def main():
+    # --- Argument Parsing ---
+    try:
+        prompt_base = sys.argv[1]
+        gemini_key = sys.argv[2]
+        discord_token = sys.argv[3]
+    except IndexError:
+        raise ValueError("❌ Missing required arguments: prompt, Gemini key, and Discord token.")
+
+    model = create_model(gemini_key)
+    # Generations run off the event loop, bounded and fair across channels
+    pool = GenerationPool.from_env()
+    # Identical prompts are answered from cache and share one in-flight generation
+    cache = ResponseCache.from_env()
+    ChildBot(prompt_base, model, pool, cache).run(discord_token)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Run many child bot personas in one process.
+
+    python child_host.py personas.json
+
+personas.json maps a persona name to its prompt and Discord token:
+
+    {"uzi": {"prompt": "You are Uzi Doorman...", "token": "..."},
+     "n":   {"prompt": "You are N...", "token": "..."}}
+
+All personas share one event loop, one aiohttp connector (connection pool), one
+Gemini model and one generation pool/reply cache. The file is re-read every
+HOST_RELOAD_INTERVAL seconds: new names are started, removed names are logged out,
+and changed entries are restarted, without touching the other personas. A persona
+that stops on its own (failed login, lost connection) is restarted by a later pass,
+waiting twice as long after each failure in a row, up to HOST_RETRY_MAX seconds.
+"""
+import os
+import sys
+import json
+import asyncio
+import aiohttp
+from child_bot import ChildBot, create_model
+from generation import GenerationPool
+from response_cache import ResponseCache
+
+
+class SharedConnector(aiohttp.TCPConnector):
+    """The connection pool every persona's client gets through `connector=`.
+
+    discord.py closes its session, and with it the session's connector, whenever a
+    client logs out. For the shared pool that close is a no-op; the host closes it
+    once with `close_shared()` when every persona has stopped.
+    """
+
+    async def close(self, **kwargs):
+        pass
+
+    async def close_shared(self):
+        await super().close()
+
+
+def load_personas(path: str) -> dict[str, dict]:
+    with open(path, encoding="utf-8") as f:
+        personas = json.load(f)
+    for name, cfg in personas.items():
+        if not cfg.get("prompt") or not cfg.get("token"):
+            raise ValueError(f"❌ Persona {name!r} needs both a prompt and a token.")
+    return personas
+
+
+class ChildHost:
+    def __init__(self, config_path: str, model, pool: GenerationPool, cache: ResponseCache, reload_interval: float = 5.0,
+                 retry_max: float = 300.0):
+        self.config_path = config_path
+        self.model = model
+        self.pool = pool
+        self.cache = cache
+        self.reload_interval = reload_interval
+        self.retry_max = retry_max
+        self.connector = None
+        self.personas: dict[str, dict] = {}
+        self.clients: dict[str, ChildBot] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+        # name -> (failures in a row, loop time of the next attempt) for personas that stopped on their own
+        self.retries: dict[str, tuple[int, float]] = {}
+        self._mtime = None
+
+    async def _run_client(self, name: str, client: ChildBot, token: str):
+        try:
+            await client.start(token)
+        except Exception as e:
+            print(f"[ERROR] Persona {name} stopped: {e}")
+        if self.clients.get(name) is not client:
+            return  # removed by the host
+        # A persona that got as far as ready starts its backoff over
+        failures = 1 if client.is_ready() else self.retries.get(name, (0, 0))[0] + 1
+        delay = min(self.retry_max, self.reload_interval * 2 ** (failures - 1))
+        self.retries[name] = (failures, asyncio.get_running_loop().time() + delay)
+        print(f"🔁 Retrying persona {name} in {delay:.0f}s")
+
+    def _start(self, name: str, cfg: dict):
+        client = ChildBot(cfg["prompt"], self.model, self.pool, self.cache, connector=self.connector)
+        self.personas[name] = cfg
+        self.clients[name] = client
+        self.tasks[name] = asyncio.create_task(self._run_client(name, client, cfg["token"]))
+
+    async def add(self, name: str, cfg: dict):
+        self._start(name, cfg)
+        print(f"➕ Started persona {name}")
+
+    async def remove(self, name: str):
+        client = self.clients.pop(name)
+        task = self.tasks.pop(name)
+        self.personas.pop(name)
+        self.retries.pop(name, None)
+        await client.close()
+        await asyncio.gather(task, return_exceptions=True)
+        print(f"➖ Stopped persona {name}")
+
+    async def retry(self):
+        """Restart personas that stopped on their own once their backoff has passed."""
+        now = asyncio.get_running_loop().time()
+        for name, (failures, at) in list(self.retries.items()):
+            if at > now or name not in self.clients:
+                continue
+            # Keep the failure count; the next stop waits twice as long
+            self.retries[name] = (failures, float("inf"))
+            client = self.clients.pop(name)
+            await client.close()
+            await asyncio.gather(self.tasks.pop(name), return_exceptions=True)
+            self._start(name, self.personas[name])
+            print(f"🔁 Restarted persona {name} (attempt {failures + 1})")
+
+    async def reload(self):
+        await self.reload_config()
+        await self.retry()
+
+    async def reload_config(self):
+        try:
+            mtime = os.stat(self.config_path).st_mtime
+            if mtime == self._mtime:
+                return
+            wanted = load_personas(self.config_path)
+        except (OSError, ValueError) as e:
+            # Keep the running personas on a broken or half-written file.
+            print(f"[ERROR] Could not load {self.config_path}: {e}")
+            return
+        self._mtime = mtime
+        for name in list(self.personas):
+            if name not in wanted or wanted[name] != self.personas[name]:
+                await self.remove(name)
+        for name, cfg in wanted.items():
+            if name not in self.personas:
+                await self.add(name, cfg)
+
+    async def run(self):
+        self.connector = SharedConnector(limit=0)
+        try:
+            while True:
+                await self.reload()
+                await asyncio.sleep(self.reload_interval)
+        finally:
+            for name in list(self.clients):
+                await self.remove(name)
+            await self.connector.close_shared()
+
+
+def main():
+    if len(sys.argv) < 2:
+        raise ValueError("❌ Usage: python child_host.py personas.json")
+    model = create_model(os.getenv("GEMINI_API_KEY"))
+    host = ChildHost(
+        sys.argv[1],
+        model,
+        GenerationPool.from_env(),
+        ResponseCache.from_env(),
+        reload_interval=float(os.getenv("HOST_RELOAD_INTERVAL", "5")),
+        retry_max=float(os.getenv("HOST_RETRY_MAX", "300")),
+    )
+    asyncio.run(host.run())
+
+
+if __name__ == "__main__":
+    main()
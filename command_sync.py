@@ -0,0 +1,51 @@
+"""Skip slash-command uploads when the definitions have not changed.
+
+on_ready fires again after every gateway reconnect, and tree.sync re-uploads
+every command on a rate-limited route. Instead we hash the exact payload
+tree.sync would send and keep the last synced hash per application and guild
+in COMMAND_HASH_PATH; the upload only happens when that hash changes.
+"""
+import os
+import json
+import hashlib
+
+COMMAND_HASH_PATH = os.getenv("COMMAND_HASH_PATH", "command_hashes.json")
+
+
+def command_fingerprint(tree, guild=None) -> str:
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _key(tree, guild) -> str:
+    return f"{tree.client.application_id}:{guild.id if guild is not None else 'global'}"
+
+
+def _load(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(path: str, hashes: dict):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+async def sync_commands(tree, guild=None, path: str = COMMAND_HASH_PATH, force: bool = False) -> bool:
+    """Sync the tree for `guild` (None: global) unless the stored fingerprint matches. Returns whether it synced."""
+    fingerprint = command_fingerprint(tree, guild)
+    hashes = _load(path)
+    key = _key(tree, guild)
+    if not force and hashes.get(key) == fingerprint:
+        return False
+    await tree.sync(guild=guild)
+    hashes = _load(path)  # other launcher workers may have written meanwhile
+    hashes[key] = fingerprint
+    _save(path, hashes)
+    return True
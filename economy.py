@@ -0,0 +1,178 @@
+import asyncio
+import contextlib
+from storage import WriteConflict
+
+
+class InsufficientFunds(Exception):
+    def __init__(self, user_id: int, balance: int, needed: int):
+        super().__init__(f"user {user_id} has {balance} oil, needs {needed}")
+        self.user_id = user_id
+        self.balance = balance
+        self.needed = needed
+
+
+class Ledger:
+    """Serialized oil/XP mutations on a UserStore.
+
+    Every operation holds the lock of each user it touches, taken in user-id
+    order so transfers cannot deadlock. Locks exist only while someone holds or
+    waits for them, so unrelated users never contend and idle users cost
+    nothing. Funds in escrow (an open blackjack bet) are already debited, so
+    they cannot be spent twice; escrows still open at shutdown are refunded by
+    `refund_all`.
+
+    When the store is shared with other processes (`store.shared`), every
+    transaction is committed to SQLite before it returns, as relative updates the
+    database checks against the stored balance. A balance another process spent
+    in the meantime raises InsufficientFunds from the transaction.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._locks: dict[int, list] = {}  # user_id -> [lock, holders + waiters]
+        self.escrows: set["Escrow"] = set()
+
+        self.transactions = 0
+        self.contended = 0
+        self.rejected = 0
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, *user_ids: int):
+        """Lock the given users and yield their records, in the order given."""
+        waiting, held = [], []
+        try:
+            for uid in sorted(set(user_ids)):
+                entry = self._locks.get(uid)
+                if entry is None:
+                    entry = self._locks[uid] = [asyncio.Lock(), 0]
+                entry[1] += 1
+                waiting.append(uid)
+                if entry[0].locked():
+                    self.contended += 1
+                await entry[0].acquire()
+                held.append(uid)
+            self.transactions += 1
+            yield await self.store.fetch(*user_ids)
+            if self.store.shared:
+                try:
+                    await self.store.commit(user_ids)
+                except WriteConflict as e:
+                    if e.needed is None:
+                        raise
+                    self.rejected += 1
+                    raise InsufficientFunds(e.user_id, e.balance, e.needed) from e
+        finally:
+            for uid in held:
+                self._locks[uid][0].release()
+            for uid in waiting:
+                entry = self._locks[uid]
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[uid]
+
+    def _take(self, rec, amount: int):
+        if rec["oil"] < amount:
+            self.rejected += 1
+            raise InsufficientFunds(rec.user_id, rec["oil"], amount)
+        rec["oil"] -= amount
+
+    async def balance(self, user_id: int) -> int:
+        async with self.transaction(user_id) as (rec,):
+            return rec["oil"]
+
+    async def debit(self, user_id: int, amount: int) -> int:
+        """Remove `amount` oil, or raise InsufficientFunds. Returns the new balance."""
+        async with self.transaction(user_id) as (rec,):
+            self._take(rec, amount)
+            return rec["oil"]
+
+    async def debit_up_to(self, user_id: int, amount: int) -> int:
+        """Remove up to `amount` oil, stopping at zero. Returns how much was taken."""
+        while True:
+            try:
+                async with self.transaction(user_id) as (rec,):
+                    taken = min(amount, rec["oil"])
+                    rec["oil"] -= taken
+                    return taken
+            except InsufficientFunds:
+                # Another process spent part of it first; retry against the re-read balance
+                continue
+
+    async def credit(self, user_id: int, amount: int = 0, xp: int = 0) -> int:
+        """Add oil and/or XP. Returns the new balance."""
+        async with self.transaction(user_id) as (rec,):
+            if amount:
+                rec["oil"] += amount
+            if xp:
+                rec["xp"] += xp
+            return rec["oil"]
+
+    async def transfer(self, from_id: int, to_id: int, amount: int):
+        async with self.transaction(from_id, to_id) as (src, dst):
+            self._take(src, amount)
+            dst["oil"] += amount
+
+    async def wager(self, user_id: int, stake: int, payout: int) -> int:
+        """Settle a one-shot bet: requires `stake` to be covered, then applies the net `payout`."""
+        async with self.transaction(user_id) as (rec,):
+            self._take(rec, stake)
+            rec["oil"] += stake + payout
+            return rec["oil"]
+
+    async def escrow(self, user_id: int, amount: int) -> "Escrow":
+        """Debit `amount` into a held stake, settled later with `Escrow.settle`."""
+        async with self.transaction(user_id) as (rec,):
+            self._take(rec, amount)
+            # Stored with the debit, so a restart knows which stakes are still held (store.held)
+            self.store.hold(rec, amount)
+        escrow = Escrow(self, user_id, amount)
+        self.escrows.add(escrow)
+        return escrow
+
+    def restore_escrow(self, user_id: int, amount: int) -> "Escrow":
+        """Re-open a stake still held in the store (a bet carried over a restart)."""
+        escrow = Escrow(self, user_id, amount)
+        self.escrows.add(escrow)
+        return escrow
+
+    def held(self) -> int:
+        return sum(e.amount for e in self.escrows)
+
+    async def refund_all(self):
+        for escrow in list(self.escrows):
+            await escrow.refund()
+
+    def stats(self) -> dict:
+        return {
+            "transactions": self.transactions,
+            "contended": self.contended,
+            "rejected": self.rejected,
+            "locked_users": len(self._locks),
+            "escrows": len(self.escrows),
+            "held": self.held(),
+        }
+
+
+class Escrow:
+    __slots__ = ("ledger", "user_id", "amount", "settled")
+
+    def __init__(self, ledger: Ledger, user_id: int, amount: int):
+        self.ledger = ledger
+        self.user_id = user_id
+        self.amount = amount
+        self.settled = False
+
+    async def settle(self, payout: int) -> int:
+        """Return the stake plus the net `payout` (-amount loses it all). Only the first call counts."""
+        if self.settled:
+            return 0
+        self.settled = True
+        self.ledger.escrows.discard(self)
+        returned = max(0, self.amount + payout)
+        async with self.ledger.transaction(self.user_id) as (rec,):
+            self.ledger.store.hold(rec, -self.amount)
+            rec["oil"] += returned
+        return returned
+
+    async def refund(self) -> int:
+        return await self.settle(0)
@@ -0,0 +1,47 @@
+import os
+import discord
+
+
+def lean_intents() -> discord.Intents:
+    """Only what the manager bot's events and commands use.
+
+    guilds: guild/role/channel events and the guild cache
+    members: on_member_join (privileged)
+    guild_messages + message_content: on_message talk mode and length limits (privileged)
+    """
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.members = True
+    intents.guild_messages = True
+    intents.message_content = True
+    return intents
+
+
+def gateway_options_from_env() -> dict:
+    """Client keyword arguments for the gateway/cache mode chosen by LEAN_GATEWAY.
+
+    The default keeps Intents.all() with full member caching and startup chunking.
+    LEAN_GATEWAY=1 requests lean_intents(), caches no members and skips chunking, so
+    memory and ready time no longer grow with guild size. Code that needs a member
+    object fetches it on demand: level role syncs through resolve_member, mass
+    timeouts through guild.fetch_member.
+    """
+    if os.getenv("LEAN_GATEWAY", "0") == "0":
+        return {"intents": discord.Intents.all()}
+    return {
+        "intents": lean_intents(),
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+        "max_messages": None,
+    }
+
+
+async def resolve_member(guild: discord.Guild, user_id: int):
+    """Cached member if there is one, otherwise fetched over REST; None if not in the guild."""
+    member = guild.get_member(user_id)
+    if member is not None:
+        return member
+    try:
+        return await guild.fetch_member(user_id)
+    except discord.NotFound:
+        return None
@@ -0,0 +1,161 @@
+import os
+import asyncio
+import threading
+from collections import deque
+
+
+class PoolBusy(Exception):
+    """Raised by GenerationPool.submit when the queue (or the channel's share of it) is full."""
+
+
+async def generate_text(model, prompt: str) -> str:
+    """Run one generation without blocking the event loop.
+
+    Uses the model's native async API when it has one, otherwise runs the blocking
+    `generate_content` on a worker thread.
+    """
+    if hasattr(model, "generate_content_async"):
+        response = await model.generate_content_async(prompt)
+    else:
+        response = await asyncio.to_thread(model.generate_content, prompt)
+    return response.text
+
+
+async def stream_text(model, prompt: str):
+    """Yield the text of each streamed chunk as the model produces it.
+
+    Blocking stream iterators are drained on a worker thread and handed back to the
+    loop through a queue; closing the generator early stops the thread after the
+    chunk it is waiting on.
+    """
+    if hasattr(model, "generate_content_async"):
+        response = await model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            yield chunk.text
+        return
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for chunk in model.generate_content(prompt, stream=True):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+    await producer
+
+
+class GenerationPool:
+    """Bounded, per-channel fair queue of LLM jobs served by a fixed set of workers.
+
+    Each channel has its own FIFO, and workers take one job at a time from channels in
+    round-robin order. A channel that posts a burst therefore cannot starve the others.
+    `submit` fails fast with PoolBusy once `max_pending` jobs are queued overall or
+    `per_channel` are queued for one channel. Every job runs under `timeout`.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 64, per_channel: int = 4, timeout: float = 60.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.per_channel = per_channel
+        self.timeout = timeout
+
+        self._queues: dict[int, deque] = {}
+        self._rotation: deque[int] = deque()
+        self._available = asyncio.Semaphore(0)
+        self._pending = 0
+        self._tasks = []
+
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            workers=int(os.getenv("LLM_WORKERS", "4")),
+            max_pending=int(os.getenv("LLM_MAX_PENDING", "64")),
+            per_channel=int(os.getenv("LLM_PER_CHANNEL", "4")),
+            timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, channel_id: int, job) -> asyncio.Future:
+        """Queue `job` (a no-arg coroutine function) for `channel_id` and return a future for its result."""
+        queue = self._queues.get(channel_id)
+        if self._pending >= self.max_pending or (queue is not None and len(queue) >= self.per_channel):
+            self.rejected += 1
+            raise PoolBusy()
+        future = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self._queues[channel_id] = deque()
+            self._rotation.append(channel_id)
+        queue.append((job, future))
+        self._pending += 1
+        self._available.release()
+        return future
+
+    def _next(self):
+        channel_id = self._rotation.popleft()
+        queue = self._queues[channel_id]
+        item = queue.popleft()
+        if queue:
+            self._rotation.append(channel_id)
+        else:
+            del self._queues[channel_id]
+        self._pending -= 1
+        return item
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            job, future = self._next()
+            if future.cancelled():
+                continue
+            try:
+                result = await asyncio.wait_for(job(), timeout=self.timeout)
+            except asyncio.TimeoutError as e:
+                self.timeouts += 1
+                if not future.done():
+                    future.set_exception(e)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.completed += 1
+                if not future.done():
+                    future.set_result(result)
+
+    def start(self):
+        """Start the worker tasks on the running event loop."""
+        if not self._tasks:
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -1,17 +1,94 @@
-from flask import Flask
-from threading import Thread
+"""Health, readiness and metrics server, running on the bot's own event loop.
+
+    /         "Bot is running!" (kept for existing uptime pingers)
+    /healthz  liveness: 200 while the event loop keeps ticking
+    /readyz   readiness: 200 only when every shard is connected and loop lag is low
+    /metrics  Prometheus text (see metrics.py)
+
+A blocked loop cannot answer HTTP at all, so liveness is also enforced by a
+watchdog thread: if the loop has not ticked for WATCHDOG_TIMEOUT seconds it
+prints the loop thread's stack and exits the process, letting the platform
+restart us instead of keeping a zombie around.
+"""
 import os
+import sys
+import json
+import time
+import threading
+import traceback
+from aiohttp import web
+
+READY_MAX_LAG = float(os.getenv("READY_MAX_LAG", "1.0"))
+WATCHDOG_TIMEOUT = float(os.getenv("WATCHDOG_TIMEOUT", "90"))
+
+
+def _json(data: dict, ok: bool) -> web.Response:
+    return web.Response(text=json.dumps(data), status=200 if ok else 503, content_type="application/json")
+
+
+def readiness(bot, metrics) -> dict:
+    shards = {}
+    for shard_id, shard in sorted(getattr(bot, "shards", {}).items()):
+        latency = shard.latency
+        shards[shard_id] = {
+            "connected": not shard.is_closed(),
+            "latency_ms": round(latency * 1000, 1) if latency == latency and latency != float("inf") else None,
+        }
+    lag = metrics.loop_lag_last
+    return {
+        "ready": bot.is_ready() and not bot.is_closed(),
+        "shards": shards,
+        "loop_lag_ms": round(lag * 1000, 1),
+        "ok": bot.is_ready() and not bot.is_closed()
+              and all(s["connected"] and s["latency_ms"] is not None for s in shards.values())
+              and lag < READY_MAX_LAG,
+    }
+
+
+class Watchdog(threading.Thread):
+    def __init__(self, metrics, timeout: float, loop_thread_id: int):
+        super().__init__(name="loop-watchdog", daemon=True)
+        self.metrics = metrics
+        self.timeout = timeout
+        self.loop_thread_id = loop_thread_id
+
+    def run(self):
+        while True:
+            time.sleep(min(5.0, self.timeout / 4))
+            stalled = time.monotonic() - self.metrics.last_tick
+            if stalled > self.timeout:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "(no frame)"
+                print(f"[ERROR] Event loop blocked for {stalled:.0f}s, exiting so we get restarted. Loop thread:\n{stack}",
+                      flush=True)
+                os._exit(70)
+
+
+async def keep_alive(bot, metrics, port: int = None):
+    """Start the server on the running loop, plus the watchdog thread. Returns the aiohttp runner."""
+    async def home(request):
+        return web.Response(text="Bot is running!")
+
+    async def healthz(request):
+        stalled = time.monotonic() - metrics.last_tick
+        return _json({"alive": stalled < WATCHDOG_TIMEOUT, "last_tick_s": round(stalled, 2)}, stalled < WATCHDOG_TIMEOUT)
 
-app = Flask('')
+    async def readyz(request):
+        state = readiness(bot, metrics)
+        return _json(state, state["ok"])
 
-@app.route('/')
-def home():
-    return "Bot is running!"
+    async def metrics_endpoint(request):
+        return web.Response(body=metrics.render().encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
 
-def run():
-    port = int(os.environ.get("PORT", 8080))
-    app.run(host='0.0.0.0', port=port)
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
+    app.router.add_get("/metrics", metrics_endpoint)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port or int(os.getenv("PORT", "8080"))).start()
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+    if WATCHDOG_TIMEOUT > 0:
+        Watchdog(metrics, WATCHDOG_TIMEOUT, threading.get_ident()).start()
+    return runner
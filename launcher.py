@@ -0,0 +1,168 @@
+"""Run the manager bot as several worker processes, each owning a range of shards.
+
+    python launcher.py --workers 4 [--shards 16]
+
+Without --shards the recommended shard count is fetched from Discord. Shards are
+split into contiguous ranges, one per worker; each worker is `main.py` with
+SHARD_COUNT/SHARD_IDS set. Crashed workers are restarted with backoff, and every
+worker writes per-shard health (latency, closed, guild count) to SHARD_STATUS_DIR,
+which the launcher prints as a summary.
+
+Where shared state lives when workers are separate processes:
+
+* Guild-scoped state (length_limits, the role index) stays in the worker that owns
+  the guild's shard. Discord routes every event for a guild to exactly one shard,
+  so no coordination is needed.
+* The economy (user_data) is user-scoped and SQLite is its single source of truth.
+  With more than one worker the launcher runs the store in shared mode
+  (ECONOMY_CACHE_SIZE=0): each command re-reads the user's row, and every ledger
+  transaction commits before it returns, as relative updates (`oil = oil + ?`)
+  that only apply while the stored balance covers them. Two workers handling the
+  same user therefore cannot lose each other's writes or spend the same oil
+  twice; the loser of such a race gets InsufficientFunds. Other writes flush
+  within ECONOMY_FLUSH_INTERVAL=0.05s. Leaderboards re-read SQLite every
+  ECONOMY_INDEX_REFRESH seconds to pick up other workers' writes.
+* Everything else stays per worker: cooldowns, blackjack/trivia sessions, talk
+  mode, the gambling toggle, and reminders (one REMINDER_DB_PATH file per worker).
+  A blackjack game started in a guild on worker 0 therefore cannot be continued
+  from a guild on worker 1. The runtime state that survives restarts is per worker
+  too (STATE_DIR/worker-N); after a change of shard layout a worker refunds the
+  restored games, and drops the length limits, of guilds it no longer owns.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def recommended_shards(token: str) -> int:
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "DiscordBot (launcher, 1.0)"},
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)["shards"]
+
+
+def split_shards(shard_count: int, workers: int) -> list[range]:
+    """Contiguous, as-even-as-possible shard ranges, one per worker."""
+    workers = min(workers, shard_count)
+    base, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        size = base + (1 if i < extra else 0)
+        ranges.append(range(start, start + size))
+        start += size
+    return ranges
+
+
+class Worker:
+    def __init__(self, worker_id: int, shards: range, shard_count: int, status_dir: str, shared_economy: bool):
+        self.worker_id = worker_id
+        self.shards = shards
+        self.status_path = os.path.join(status_dir, f"worker-{worker_id}.json")
+        self.env = dict(
+            os.environ,
+            SHARD_COUNT=str(shard_count),
+            SHARD_IDS=f"{shards.start}-{shards.stop - 1}",
+            WORKER_ID=str(worker_id),
+            SHARD_STATUS_PATH=self.status_path,
+        )
+        if shared_economy:
+            base, ext = os.path.splitext(os.getenv("REMINDER_DB_PATH", "reminders.sqlite3"))
+            self.env.update(
+                ECONOMY_CACHE_SIZE="0",
+                ECONOMY_FLUSH_INTERVAL="0.05",
+                ECONOMY_INDEX_REFRESH=os.getenv("ECONOMY_INDEX_REFRESH", "30"),
+                REMINDER_DB_PATH=f"{base}-{worker_id}{ext}",
+                STATE_DIR=os.path.join(os.getenv("STATE_DIR", "state"), f"worker-{worker_id}"),
+            )
+            if os.getenv("PORT"):
+                # One keep-alive/metrics server per worker: PORT, PORT+1, ...
+                self.env["PORT"] = str(int(os.environ["PORT"]) + worker_id)
+        self.proc = None
+        self.restarts = 0
+        self.next_start = 0.0
+
+    def start(self):
+        self.proc = subprocess.Popen([sys.executable, os.path.join(HERE, "main.py")], env=self.env)
+        print(f"🚀 Worker {self.worker_id} (shards {self.shards.start}-{self.shards.stop - 1}) pid {self.proc.pid}")
+
+    def check(self):
+        if self.proc is not None and self.proc.poll() is None:
+            return
+        if self.proc is not None:
+            print(f"[ERROR] Worker {self.worker_id} exited with {self.proc.returncode}")
+            self.proc = None
+            self.restarts += 1
+            self.next_start = time.time() + min(60, 2 ** self.restarts)
+        if time.time() >= self.next_start:
+            self.start()
+
+    def status(self):
+        try:
+            with open(self.status_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+def print_health(workers: list[Worker], stale_after: float):
+    now = time.time()
+    for w in workers:
+        status = w.status()
+        if status is None or now - status["updated"] > stale_after:
+            print(f"  worker {w.worker_id}: no recent health report (restarts: {w.restarts})")
+            continue
+        for shard in status["shards"]:
+            state = "closed" if shard["closed"] else "ratelimited" if shard["ratelimited"] else "ok"
+            print(f"  worker {w.worker_id} shard {shard['id']:>3}: {state:<11} "
+                  f"latency {shard['latency_ms']} ms, {shard['guilds']} guilds")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process shard launcher for the manager bot")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SHARD_WORKERS", "1")))
+    parser.add_argument("--shards", type=int, default=None, help="total shard count (default: Discord's recommendation)")
+    parser.add_argument("--status-dir", default=os.getenv("SHARD_STATUS_DIR", "shard_status"))
+    parser.add_argument("--health-interval", type=float, default=60.0)
+    args = parser.parse_args()
+
+    shard_count = args.shards or recommended_shards(os.environ["DISCORD_MANAGER_TOKEN"])
+    os.makedirs(args.status_dir, exist_ok=True)
+    ranges = split_shards(shard_count, args.workers)
+    workers = [Worker(i, r, shard_count, args.status_dir, len(ranges) > 1) for i, r in enumerate(ranges)]
+    print(f"✅ {shard_count} shards across {len(workers)} worker(s)")
+
+    last_health = time.time()
+    try:
+        while True:
+            for w in workers:
+                w.check()
+            if time.time() - last_health >= args.health_interval:
+                print("📊 Shard health:")
+                print_health(workers, stale_after=args.health_interval)
+                last_health = time.time()
+            time.sleep(2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for w in workers:
+            w.stop()
+
+
+if __name__ == "__main__":
+    main()
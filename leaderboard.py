@@ -0,0 +1,49 @@
+from itertools import islice
+from sortedcontainers import SortedList
+
+
+class RankIndex:
+    """Order-statistics index over one score per user.
+
+    Entries are kept as `(-score, user_id)` in a SortedList so the highest score
+    comes first and ties break by user id. Updates, rank lookups and top-N
+    queries are all O(log n) (plus N for the slice).
+    """
+
+    def __init__(self, scores=()):
+        self._scores = dict(scores)
+        self._order = SortedList((-score, uid) for uid, score in self._scores.items())
+
+    def update(self, user_id: int, score: int):
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._order.remove((-old, user_id))
+        self._order.add((-score, user_id))
+        self._scores[user_id] = score
+
+    def remove(self, user_id: int):
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._order.remove((-old, user_id))
+
+    def top(self, n: int = 10) -> list[tuple[int, int]]:
+        """Return `(user_id, score)` for the `n` highest scores."""
+        return [(uid, -neg) for neg, uid in islice(self._order, n)]
+
+    def rank(self, user_id: int):
+        """1-based rank of `user_id`, or None if it is not indexed."""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._order.index((-score, user_id)) + 1
+
+    def score(self, user_id: int):
+        return self._scores.get(user_id)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._scores
@@ -1,18 +1,59 @@
+import io
 import os
+import math
 import random
 import time
+import struct
+import signal
 import asyncio
 import functools
 import discord
 from discord.ext import commands
 from discord import app_commands
-from typing import Callable, Coroutine, Any
+from typing import Callable, Coroutine, Any, Literal
 from datetime import datetime, timedelta
+from storage import UserStore
+from leaderboard import RankIndex
+from ttlstore import ExpiringDict
+from roles import RoleIndex
+from scheduler import ReminderScheduler
+from sharding import shard_options_from_env, owns_guild_from_env, shard_health, report_health
+from gateway import gateway_options_from_env, resolve_member
+import moderation
+from moderation import BulkModerator, parse_user_ids
+from purge import purge, parse_date, message_filter
+from blackjack import BlackjackGame, card_name
+from economy import Ledger, InsufficientFunds
+from payouts import GAMBLE_WIN_CHANCE, SLOT_SYMBOLS, SLOT_REELS, gamble_payout, slots_payout, blackjack_payout
+from rest import RestScheduler, bucket, INTERACTIVE, MODERATION, BACKGROUND, PRIORITY_NAMES, WAIT_BUCKETS
+from metrics import Metrics
+from keep_alive import keep_alive
+from command_sync import sync_commands
+from profiler import SamplingProfiler
+import runtime_state
+from runtime_state import RuntimeState, IdSet
 
 # -------- CONFIG & GLOBALS --------
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Intents/member caching come from LEAN_GATEWAY (see gateway.py)
+# Shards come from SHARD_COUNT/SHARD_IDS (set by launcher.py), otherwise Discord's recommendation
+class ManagerBot(commands.AutoShardedBot):
+    async def close(self):
+        # bot.close() runs on Ctrl-C, SIGTERM (see setup_hook) and logout alike, so the
+        # stores are saved here rather than after bot.run() returns
+        try:
+            await super().close()
+        finally:
+            if not self.stores_closed:
+                self.stores_closed = True
+                await close_stores()
+
+bot = ManagerBot(command_prefix="!", **gateway_options_from_env(), **shard_options_from_env())
+bot.stores_closed = False
+owns_guild = owns_guild_from_env()
 tree = bot.tree
+# Slash command latency/errors, loop lag and gateway events, served at /metrics by keep_alive.py
+metrics = Metrics()
+metrics.instrument(bot)
 
 DISCORD_MANAGER_TOKEN = os.getenv("DISCORD_MANAGER_TOKEN")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -23,11 +64,19 @@ TEST_GUILD = discord.Object(id=TEST_GUILD_ID)
 start_time = time.time()
 
 # User data stores
-user_data = {}
+# Economy records live in SQLite behind a write-behind cache (see storage.py)
+user_data = UserStore.from_env()
+# Rankings are maintained incrementally on every oil/xp write
+oil_ranking = RankIndex()
+xp_ranking = RankIndex()
+user_data.attach_index("oil", oil_ranking)
+user_data.attach_index("xp", xp_ranking)
 gambling_enabled = True
-gambling_cooldowns = {}
+# Cooldowns expire on their own once they no longer block anything
+gambling_cooldowns = ExpiringDict(default_ttl=5)
 
-talk_enabled_users = set()
+# Restored straight from the state snapshot's mapped key array (see runtime_state.IdSet)
+talk_enabled_users = IdSet()
 length_limits = {}
 
 level_roles = [
@@ -39,6 +88,13 @@ level_roles = [
     (25, "Murder Drone"),
 ]
 
+LEVEL_ROLE_NAMES = {name for _, name in level_roles}
+role_index = RoleIndex()
+
+# Ad-hoc REST calls (role syncs, talk mode, length limits) go through one priority queue (see rest.py);
+# discord.py still enforces the rate limits underneath
+rest = RestScheduler.from_env()
+
 OIL_GOD_ROLE_NAME = "Oil God"
 
 shop_items = {
@@ -49,37 +105,46 @@ shop_items = {
     "electrician_circuit": {"price": 1200, "xp": 15, "desc": "A spare circuit from Electrician."},
     "solver_brain_chip": {"price": 3000, "xp": 40, "desc": "A brain chip from The Solver."},
 }
+user_data.register_items(shop_items)
+
+# Every oil/XP change goes through the ledger, which serializes each user's mutations (see economy.py)
+ledger = Ledger(user_data)
+
+# Settings, open games and trivia survive restarts as snapshots + deltas (see runtime_state.py; STATE_SNAPSHOTS=0 disables)
+runtime = RuntimeState.from_env()
 
 # -------- UTILITIES --------
 
-def get_user_data(user_id: int):
-    if user_id not in user_data:
-        user_data[user_id] = {
-            "oil": 1000,
-            "xp": 0,
-            "level": 0,
-            "inventory": {},
-            "blackjack": None,  # for blackjack game state
-            "slots_cooldown": 0,
-            "roulette_cooldown": 0,
-        }
-    return user_data[user_id]
-
-def update_oil_balance(user_id: int, amount: int):
-    ud = get_user_data(user_id)
-    ud["oil"] += amount
-    if ud["oil"] < 0:
-        ud["oil"] = 0
-
-def get_balance(user_id: int) -> int:
-    ud = get_user_data(user_id)
+async def get_user_data(user_id: int):
+    (ud,) = await user_data.fetch(user_id)
+    return ud
+
+async def get_balance(user_id: int) -> int:
+    ud = await get_user_data(user_id)
     return ud["oil"]
 
 def xp_to_next_level(level: int) -> int:
     return 100 + level * 50
 
-async def update_roles(member: discord.Member):
-    ud = get_user_data(member.id)
+def xp_for_levels(level: int, levels: int) -> int:
+    # Sum of xp_to_next_level over `levels` levels starting at `level` (an arithmetic series)
+    return levels * (100 + 50 * level) + 25 * levels * (levels - 1)
+
+def levels_gained(level: int, xp: int) -> int:
+    # Largest k with xp_for_levels(level, k) <= xp: 25k² + bk <= xp with b = 75 + 50*level,
+    # i.e. (50k + b)² <= b² + 100*xp, solved exactly with an integer square root
+    b = 75 + 50 * level
+    return (math.isqrt(b * b + 100 * xp) - b) // 50
+
+def apply_level_ups(ud) -> bool:
+    gained = levels_gained(ud["level"], ud["xp"])
+    if gained:
+        ud["xp"] -= xp_for_levels(ud["level"], gained)
+        ud["level"] += gained
+    return gained > 0
+
+async def sync_level_role(member: discord.Member):
+    ud = await get_user_data(member.id)
     level = ud["level"]
     role_name = None
     for lvl_req, name in reversed(level_roles):
@@ -90,40 +155,71 @@ async def update_roles(member: discord.Member):
         role_name = level_roles[0][1]
 
     guild = member.guild
-    new_role = discord.utils.get(guild.roles, name=role_name)
+    new_role = role_index.get(guild, role_name)
     if new_role is None:
         new_role = await guild.create_role(name=role_name, reason="Level role auto-created")
+        role_index.add(new_role)
+
+    # Queued syncs run later than they were submitted, so start from the cached member's current roles
+    cached = guild.get_member(member.id)
+    if cached is None:
+        # Not cached (LEAN_GATEWAY): the role list may be stale, so only level roles are touched
+        stale = [r for r in member.roles if r.name in LEVEL_ROLE_NAMES and r != new_role]
+        if stale:
+            await member.remove_roles(*stale, reason="Level role update")
+        if new_role not in member.roles:
+            await member.add_roles(new_role, reason="Level role update")
+        return
+    # Drop every other level role and add the new one in a single member edit
+    current = cached.roles[1:]  # skip @everyone
+    desired = [r for r in current if r.name not in LEVEL_ROLE_NAMES or r == new_role]
+    if new_role not in desired:
+        desired.append(new_role)
+    if len(desired) != len(current) or new_role not in current:
+        await cached.edit(roles=desired, reason="Level role update")
+
+def update_roles(member: discord.Member) -> asyncio.Future:
+    return queue_role_sync(member.guild, member.id, member)
+
+def queue_role_sync(guild: discord.Guild, user_id: int, member: discord.Member = None) -> asyncio.Future:
+    # Queued behind interactive traffic; level-ups that land before it runs collapse into one edit.
+    # Without a member (uncached under LEAN_GATEWAY) the job fetches it when it runs.
+    async def job():
+        target = member if member is not None else await resolve_member(guild, user_id)
+        if target is not None:
+            await sync_level_role(target)
+    return rest.submit(
+        bucket("PATCH", "/guilds/members", guild.id),
+        job,
+        priority=BACKGROUND,
+        key=("level_role", guild.id, user_id),
+    )
 
-    # Remove all level roles except new_role
-    roles_to_remove = [
-        discord.utils.get(guild.roles, name=r[1])
-        for r in level_roles
-        if discord.utils.get(guild.roles, name=r[1]) in member.roles and r[1] != role_name
-    ]
-    for r in roles_to_remove:
-        await member.remove_roles(r)
-
-    # Add the new role if missing
-    if new_role not in member.roles:
-        await member.add_roles(new_role)
-
-def try_level_up(user_id: int, member: discord.Member):
-    ud = get_user_data(user_id)
-    leveled_up = False
-    while ud["xp"] >= xp_to_next_level(ud["level"]):
-        ud["xp"] -= xp_to_next_level(ud["level"])
-        ud["level"] += 1
-        leveled_up = True
-    if leveled_up:
-        asyncio.create_task(update_roles(member))
+async def grant(guild: discord.Guild, user_ids: list[int], oil: int = 0, xp: int = 0) -> tuple[list[int], int]:
+    """Credit every user in one ledger transaction; returns (users who leveled up, role updates queued)."""
+    leveled = []
+    async with ledger.transaction(*user_ids) as records:
+        for ud in records:
+            if oil:
+                ud["oil"] += oil
+            if xp:
+                ud["xp"] += xp
+                if apply_level_ups(ud):
+                    leveled.append(ud.user_id)
+    # One queued role sync per leveled member; the guild's member bucket runs them back to back,
+    # and members who already had one pending are coalesced into it. Members that are not cached
+    # are fetched by the job itself, so the grant never waits on REST.
+    for user_id in leveled:
+        queue_role_sync(guild, user_id, guild.get_member(user_id))
+    return leveled, len(leveled)
 
 def check_cooldown(user_id: int, cd_seconds=5, cd_name="default") -> bool:
     now = time.time()
     last = gambling_cooldowns.get((user_id, cd_name), 0)
     return (now - last) > cd_seconds
 
-def update_cooldown(user_id: int, cd_name="default"):
-    gambling_cooldowns[(user_id, cd_name)] = time.time()
+def update_cooldown(user_id: int, cd_name="default", cd_seconds=5):
+    gambling_cooldowns.set((user_id, cd_name), time.time(), ttl=cd_seconds)
 
 def has_perms(interaction: discord.Interaction, perms: list[str]) -> bool:
     user_perms = interaction.user.guild_permissions
@@ -149,14 +245,16 @@ def requires_perms(perms: list[str]):
 def gambling_command(cd_name="default"):
     def decorator(func: Callable[[discord.Interaction, int], Coroutine[Any, Any, None]]):
         @functools.wraps(func)
-        async def wrapper(interaction: discord.Interaction, amount: int):
+        async def wrapper(interaction: discord.Interaction, **params):
+            # Slash options arrive by name, and each game names its single bet option itself
+            (amount,) = params.values()
             if not gambling_enabled:
                 await ephemeral_send(interaction, "❌ Gambling is currently disabled.")
                 return
             if amount <= 0:
                 await ephemeral_send(interaction, "❌ Amount must be positive.")
                 return
-            if get_balance(interaction.user.id) < amount:
+            if await get_balance(interaction.user.id) < amount:
                 await ephemeral_send(interaction, "❌ You don't have enough oil drops.")
                 return
             if not check_cooldown(interaction.user.id, 5, cd_name):
@@ -169,48 +267,116 @@ def gambling_command(cd_name="default"):
 
 # -------- EVENTS --------
 
+async def close_stores():
+    # Each store is closed even if an earlier one fails; the economy flush writes out
+    # anything the background flusher has not persisted yet
+    async def save_runtime_state():
+        if runtime.enabled:
+            # Open games keep their bets and carry over to the next start
+            runtime.close()
+        else:
+            # Bets of blackjack games still open at shutdown go back to their players
+            await ledger.refund_all()
+    for name, close in (("runtime state", save_runtime_state), ("economy", user_data.close), ("reminders", reminders.close)):
+        try:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            print(f"[ERROR] Closing {name} failed: {e}")
+
+@bot.event
+async def setup_hook():
+    try:
+        # The launcher stops workers with SIGTERM; shut down cleanly instead of being killed
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+    except NotImplementedError:
+        pass  # Windows
+    user_data.start()
+    if runtime.enabled:
+        restored = runtime.load()
+        print(f"✅ Restored {restored} runtime state entries in {runtime.restore_ms:.1f} ms")
+    reopen_restored_bets()
+    if runtime.enabled:
+        runtime.start()
+    for store in (gambling_cooldowns, blackjack_games, active_trivia):
+        store.start()
+    reminders.start()
+    asyncio.create_task(metrics.watch_loop())
+    if os.getenv("PORT"):
+        # Health/readiness/metrics server on this loop (see keep_alive.py)
+        await keep_alive(bot, metrics)
+    if os.getenv("SHARD_STATUS_PATH"):
+        asyncio.create_task(report_health(bot, os.getenv("SHARD_STATUS_PATH"), os.getenv("WORKER_ID", "0")))
+    if os.getenv("ECONOMY_INDEX_REFRESH"):
+        asyncio.create_task(refresh_rankings(float(os.getenv("ECONOMY_INDEX_REFRESH"))))
+
+async def refresh_rankings(interval: float):
+    # Other launcher workers write to the same economy database
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await user_data.refresh_indexes()
+        except Exception as e:
+            print(f"[ERROR] Ranking refresh failed: {e}")
+
 @bot.event
 async def on_ready():
     print(f"✅ Manager bot logged in as {bot.user}")
-    await tree.sync(guild=TEST_GUILD)
-    print(f"✅ Slash commands synced to guild {TEST_GUILD_ID}")
+    # on_ready also fires after reconnects; only upload when the definitions changed
+    if await sync_commands(tree, TEST_GUILD):
+        print(f"✅ Slash commands synced to guild {TEST_GUILD_ID}")
+    else:
+        print(f"✅ Slash commands unchanged for guild {TEST_GUILD_ID}, sync skipped")
 
 @bot.event
 async def on_member_join(member: discord.Member):
-    guild = member.guild
-    role = discord.utils.get(guild.roles, name="Worker Drone")
-    if role is None:
-        role = await guild.create_role(name="Worker Drone", reason="Auto-created Worker Drone role")
-    await member.add_roles(role)
-    get_user_data(member.id)
-    update_oil_balance(member.id, 0)
+    # update_roles creates/assigns "Worker Drone" for new users in the same request
+    await get_user_data(member.id)
     await update_roles(member)
 
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    role_index.invalidate(role.guild.id)
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    role_index.invalidate(after.guild.id)
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    role_index.invalidate(role.guild.id)
+
 @bot.event
 async def on_message(message):
     if message.author.bot:
         return
+    channel_id = message.channel.id
+    delete = False
     if message.author.id in talk_enabled_users:
-        await message.channel.send(message.content)
-        try:
-            await message.delete()
-        except discord.Forbidden:
-            pass
+        rest.submit(bucket("POST", "/channels/messages", channel_id), lambda: message.channel.send(message.content), INTERACTIVE)
+        delete = True
     guild_id = message.guild.id if message.guild else None
     if guild_id in length_limits:
         limit_info = length_limits[guild_id]
         max_len = limit_info["max_len"]
         character = limit_info["character"]
         if len(message.content) > max_len:
-            await message.channel.send(
-                f"⚠️ Your message is too long! Please keep it under {max_len} characters and stay in character as **{character}**."
-            )
-            try:
-                await message.delete()
-            except discord.Forbidden:
-                pass
+            warning = f"⚠️ Your message is too long! Please keep it under {max_len} characters and stay in character as **{character}**."
+            rest.submit(bucket("POST", "/channels/messages", channel_id), lambda: message.channel.send(warning), INTERACTIVE)
+            delete = True
+    if delete:
+        # One delete per message, even when talk mode and the length limit both want it gone
+        rest.submit(bucket("DELETE", "/channels/messages", channel_id), lambda: delete_message(message), MODERATION)
     await bot.process_commands(message)
 
+async def delete_message(message: discord.Message):
+    try:
+        await message.delete()
+    except (discord.Forbidden, discord.NotFound):
+        # No permission, or someone else deleted it first
+        pass
+
 # -------- COMMANDS --------
 
 # --- Existing commands from your fixed base ---
@@ -235,6 +401,18 @@ async def invite(interaction: discord.Interaction):
     invite_url = f"https://discord.com/oauth2/authorize?client_id={client_id}&permissions={perms}&scope=bot%20applications.commands"
     await interaction.response.send_message(f"🔗 Invite me with: {invite_url}")
 
+# shards
+@tree.command(name="shards", description="Show shard health and latency", guild=TEST_GUILD)
+async def shards(interaction: discord.Interaction):
+    embed = discord.Embed(title="Shards", color=discord.Color.teal())
+    for shard in shard_health(bot):
+        state = "🔴 closed" if shard["closed"] else "🟠 rate limited" if shard["ratelimited"] else "🟢 ok"
+        embed.add_field(
+            name=f"Shard {shard['id']}" + (" (this guild)" if interaction.guild and interaction.guild.shard_id == shard["id"] else ""),
+            value=f"{state}\nLatency: {shard['latency_ms']} ms\nGuilds: {shard['guilds']}",
+        )
+    await interaction.response.send_message(embed=embed)
+
 # botinfo
 @tree.command(name="botinfo", description="Information about this bot", guild=TEST_GUILD)
 async def botinfo(interaction: discord.Interaction):
@@ -259,7 +437,7 @@ async def userinfo(interaction: discord.Interaction, user: discord.Member = None
     embed.add_field(name="Top Role", value=user.top_role.name)
     embed.add_field(name="Joined Server", value=user.joined_at.strftime("%Y-%m-%d %H:%M:%S") if user.joined_at else "N/A")
     embed.add_field(name="Account Created", value=user.created_at.strftime("%Y-%m-%d %H:%M:%S"))
-    ud = get_user_data(user.id)
+    ud = await get_user_data(user.id)
     embed.add_field(name="Level", value=ud["level"])
     embed.add_field(name="XP", value=ud["xp"])
     embed.add_field(name="Oil Drops", value=ud["oil"])
@@ -272,7 +450,7 @@ async def serverinfo(interaction: discord.Interaction):
     embed = discord.Embed(title=f"Server Info - {guild.name}", color=discord.Color.green())
     embed.set_thumbnail(url=guild.icon.url if guild.icon else discord.Embed.Empty)
     embed.add_field(name="ID", value=guild.id)
-    embed.add_field(name="Owner", value=str(guild.owner))
+    embed.add_field(name="Owner", value=str(guild.owner) if guild.owner else f"<@{guild.owner_id}>")
     embed.add_field(name="Members", value=guild.member_count)
     embed.add_field(name="Channels", value=len(guild.channels))
     embed.add_field(name="Created At", value=guild.created_at.strftime("%Y-%m-%d %H:%M:%S"))
@@ -288,18 +466,53 @@ async def avatar(interaction: discord.Interaction, user: discord.Member = None):
     await interaction.response.send_message(embed=embed)
 
 # clear
+# Most messages one /clear may delete, and most it may read looking for matches
+PURGE_MAX = int(os.getenv("PURGE_MAX", "10000"))
+PURGE_SCAN_LIMIT = int(os.getenv("PURGE_SCAN_LIMIT", "100000"))
+
 @tree.command(name="clear", description="Delete messages (admin only)", guild=TEST_GUILD)
-@app_commands.describe(amount="Number of messages to delete (1-100)")
+@app_commands.describe(
+    amount=f"Number of messages to delete (1-{PURGE_MAX})",
+    user="Only delete messages from this user",
+    contains="Only delete messages containing this text",
+    after="Only delete messages after this date (YYYY-MM-DD)",
+    before="Only delete messages before this date (YYYY-MM-DD)",
+)
 @requires_perms(['manage_messages'])
-async def clear(interaction: discord.Interaction, amount: int):
-    if amount < 1 or amount > 100:
-        await ephemeral_send(interaction, "❌ Amount must be between 1 and 100.")
+async def clear(interaction: discord.Interaction, amount: int, user: discord.User = None,
+                contains: str = None, after: str = None, before: str = None):
+    if amount < 1 or amount > PURGE_MAX:
+        await ephemeral_send(interaction, f"❌ Amount must be between 1 and {PURGE_MAX}.")
         return
     if not isinstance(interaction.channel, discord.TextChannel):
         await ephemeral_send(interaction, "❌ This command can only be used in text channels.")
         return
-    deleted = await interaction.channel.purge(limit=amount)
-    await interaction.response.send_message(f"🧹 Deleted {len(deleted)} messages.", ephemeral=True)
+    try:
+        after_date = parse_date(after) if after else None
+        before_date = parse_date(before) if before else None
+    except ValueError:
+        await ephemeral_send(interaction, "❌ Dates must look like 2025-01-31.")
+        return
+    # Ephemeral, so the progress message is not in the channel being purged
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    async def progress(report):
+        await interaction.edit_original_response(content=f"⏳ {report.progress()}")
+
+    try:
+        report = await purge(
+            interaction.channel,
+            amount,
+            check=message_filter(user.id if user else None, contains),
+            before=before_date,
+            after=after_date,
+            scan_limit=PURGE_SCAN_LIMIT,
+            progress=progress,
+        )
+    except discord.HTTPException as e:
+        await interaction.edit_original_response(content=f"❌ Failed to read channel history: {e}")
+        return
+    await interaction.edit_original_response(content=report.summary())
 
 # kick
 @tree.command(name="kick", description="Kick a user", guild=TEST_GUILD)
@@ -381,33 +594,29 @@ async def coinflip(interaction: discord.Interaction):
 @app_commands.describe(amount="Amount of oil drops to gamble")
 @gambling_command("gamble")
 async def gamble(interaction: discord.Interaction, amount: int):
-    win = random.choice([True, False])
-    ud = get_user_data(interaction.user.id)
-    if win:
-        gain = amount
-        update_oil_balance(interaction.user.id, gain)
-        await interaction.response.send_message(f"🎉 You won {gain} oil drops!")
+    payout = gamble_payout(random.random() < GAMBLE_WIN_CHANCE, amount)
+    try:
+        await ledger.wager(interaction.user.id, amount, payout)
+    except InsufficientFunds:
+        await ephemeral_send(interaction, "❌ You don't have enough oil drops.")
+        return
+    if payout > 0:
+        await interaction.response.send_message(f"🎉 You won {payout} oil drops!")
     else:
-        loss = amount
-        update_oil_balance(interaction.user.id, -loss)
-        await interaction.response.send_message(f"💥 You lost {loss} oil drops!")
+        await interaction.response.send_message(f"💥 You lost {-payout} oil drops!")
 
 # slots
 @tree.command(name="slots", description="Play the slot machine", guild=TEST_GUILD)
 @app_commands.describe(amount="Bet amount")
 @gambling_command("slots")
 async def slots(interaction: discord.Interaction, amount: int):
-    symbols = ["🍒", "🍋", "🍊", "🍉", "⭐", "7️⃣"]
-    result = [random.choice(symbols) for _ in range(3)]
-    ud = get_user_data(interaction.user.id)
-    payout = 0
-    if result.count(result[0]) == 3:
-        payout = amount * 5
-    elif len(set(result)) == 2:
-        payout = amount * 2
-    else:
-        payout = -amount
-    update_oil_balance(interaction.user.id, payout)
+    result = [random.choice(SLOT_SYMBOLS) for _ in range(SLOT_REELS)]
+    payout = slots_payout(result, amount)
+    try:
+        await ledger.wager(interaction.user.id, amount, payout)
+    except InsufficientFunds:
+        await ephemeral_send(interaction, "❌ You don't have enough oil drops.")
+        return
     embed = discord.Embed(title="Slots Machine", description=" | ".join(result))
     if payout > 0:
         embed.add_field(name="Result", value=f"🎉 You won {payout} oil drops!")
@@ -416,36 +625,16 @@ async def slots(interaction: discord.Interaction, amount: int):
     await interaction.response.send_message(embed=embed)
 
 # blackjack (simplified version)
-class BlackjackGame:
-    def __init__(self, user_id):
-        self.user_id = user_id
-        self.deck = [str(i) for i in range(2, 11)] + ["J", "Q", "K", "A"] * 4
-        random.shuffle(self.deck)
-        self.player_hand = []
-        self.dealer_hand = []
-        self.finished = False
-
-    def deal_card(self):
-        return self.deck.pop()
-
-    def hand_value(self, hand):
-        value = 0
-        aces = 0
-        for card in hand:
-            if card.isdigit():
-                value += int(card)
-            elif card in ["J", "Q", "K"]:
-                value += 10
-            else:  # Ace
-                aces += 1
-        for _ in range(aces):
-            if value + 11 <= 21:
-                value += 11
-            else:
-                value += 1
-        return value
-
-blackjack_games = {}
+# Abandoned games are dropped after BLACKJACK_TTL seconds without a /hit
+BLACKJACK_TTL = 600
+BLACKJACK_DECKS = int(os.getenv("BLACKJACK_DECKS", "6"))
+
+def refund_abandoned_game(user_id: int, entry):
+    # The bet was held in escrow when the game started; an abandoned game gives it back
+    asyncio.create_task(entry[1].refund())
+
+# user_id -> (BlackjackGame, Escrow holding the bet, guild id it was started in)
+blackjack_games = ExpiringDict(default_ttl=BLACKJACK_TTL, on_expire=refund_abandoned_game, on_change=runtime.tracker("blackjack"))
 
 @tree.command(name="blackjack", description="Start a blackjack game", guild=TEST_GUILD)
 @app_commands.describe(bet="Bet amount")
@@ -454,63 +643,55 @@ async def blackjack(interaction: discord.Interaction, bet: int):
     if interaction.user.id in blackjack_games:
         await ephemeral_send(interaction, "❌ You already have an active blackjack game.")
         return
-    ud = get_user_data(interaction.user.id)
-    if bet > ud["oil"]:
+    try:
+        stake = await ledger.escrow(interaction.user.id, bet)
+    except InsufficientFunds:
         await ephemeral_send(interaction, "❌ You don't have enough oil drops.")
         return
-    game = BlackjackGame(interaction.user.id)
-    blackjack_games[interaction.user.id] = {"game": game, "bet": bet}
-    # Deal initial cards
-    game.player_hand.append(game.deal_card())
-    game.player_hand.append(game.deal_card())
-    game.dealer_hand.append(game.deal_card())
-    game.dealer_hand.append(game.deal_card())
+    if interaction.user.id in blackjack_games:
+        # Another /blackjack started a game while this one was waiting for the ledger
+        await stake.refund()
+        await ephemeral_send(interaction, "❌ You already have an active blackjack game.")
+        return
+    game = BlackjackGame(interaction.user.id, bet, BLACKJACK_DECKS)
+    game.deal()
+    blackjack_games[interaction.user.id] = (game, stake, interaction.guild_id or 0)
     await interaction.response.send_message(
-        f"🃏 Blackjack started!\nYour hand: {game.player_hand} (Value: {game.hand_value(game.player_hand)})\n"
-        f"Dealer's visible card: {game.dealer_hand[0]}\nUse /hit or /stand to continue."
+        f"🃏 Blackjack started!\nYour hand: {game.player} (Value: {game.player.total})\n"
+        f"Dealer's visible card: {card_name(game.dealer.cards[0])}\nUse /hit or /stand to continue."
     )
 
 @tree.command(name="hit", description="Draw a card in blackjack", guild=TEST_GUILD)
 async def hit(interaction: discord.Interaction):
-    if interaction.user.id not in blackjack_games:
+    entry = blackjack_games.get(interaction.user.id)
+    if entry is None:
         await ephemeral_send(interaction, "❌ You have no active blackjack game.")
         return
-    game = blackjack_games[interaction.user.id]["game"]
-    bet = blackjack_games[interaction.user.id]["bet"]
-    card = game.deal_card()
-    game.player_hand.append(card)
-    val = game.hand_value(game.player_hand)
-    if val > 21:
-        update_oil_balance(interaction.user.id, -bet)
+    game, stake, _ = entry
+    card = game.hit()
+    val = game.player.total
+    if game.finished:
         del blackjack_games[interaction.user.id]
-        await interaction.response.send_message(f"🃏 You drew {card}. Your hand value is {val}. You busted and lost {bet} oil drops.")
+        await stake.settle(blackjack_payout(game.outcome(), game.bet))
+        await interaction.response.send_message(f"🃏 You drew {card_name(card)}. Your hand value is {val}. You busted and lost {game.bet} oil drops.")
     else:
-        await interaction.response.send_message(f"🃏 You drew {card}. Your hand: {game.player_hand} (Value: {val})")
+        blackjack_games.touch(interaction.user.id)
+        await interaction.response.send_message(f"🃏 You drew {card_name(card)}. Your hand: {game.player} (Value: {val})")
 
 @tree.command(name="stand", description="Stand in blackjack", guild=TEST_GUILD)
 async def stand(interaction: discord.Interaction):
-    if interaction.user.id not in blackjack_games:
+    entry = blackjack_games.pop(interaction.user.id, None)
+    if entry is None:
         await ephemeral_send(interaction, "❌ You have no active blackjack game.")
         return
-    game = blackjack_games[interaction.user.id]["game"]
-    bet = blackjack_games[interaction.user.id]["bet"]
-    player_val = game.hand_value(game.player_hand)
-    dealer_val = game.hand_value(game.dealer_hand)
-    while dealer_val < 17:
-        game.dealer_hand.append(game.deal_card())
-        dealer_val = game.hand_value(game.dealer_hand)
-    if dealer_val > 21 or player_val > dealer_val:
-        update_oil_balance(interaction.user.id, bet)
-        result = "won"
-    elif player_val == dealer_val:
-        result = "tied"
-    else:
-        update_oil_balance(interaction.user.id, -bet)
-        result = "lost"
-    del blackjack_games[interaction.user.id]
+    game, stake, _ = entry
+    game.stand()
+    outcome = game.outcome()
+    await stake.settle(blackjack_payout(outcome, game.bet))
+    result = "won" if outcome > 0 else "tied" if outcome == 0 else "lost"
     await interaction.response.send_message(
-        f"Dealer's hand: {game.dealer_hand} (Value: {dealer_val})\n"
-        f"Your hand: {game.player_hand} (Value: {player_val})\nYou {result} the blackjack game."
+        f"Dealer's hand: {game.dealer} (Value: {game.dealer.total})\n"
+        f"Your hand: {game.player} (Value: {game.player.total})\nYou {result} the blackjack game."
     )
 
 # trivia questions (small sample)
@@ -520,7 +701,9 @@ trivia_questions = [
     {"q": "What year did the Titanic sink?", "a": "1912"},
 ]
 
-active_trivia = {}
+# Unanswered questions are dropped after TRIVIA_TTL seconds
+TRIVIA_TTL = 300
+active_trivia = ExpiringDict(default_ttl=TRIVIA_TTL, on_change=runtime.tracker("trivia"))
 
 @tree.command(name="trivia", description="Start a trivia question", guild=TEST_GUILD)
 async def trivia(interaction: discord.Interaction):
@@ -539,9 +722,8 @@ async def answer(interaction: discord.Interaction, answer: str):
         return
     question = active_trivia[interaction.user.id]
     if answer.lower().strip() == question["a"]:
-        ud = get_user_data(interaction.user.id)
-        ud["xp"] += 10
         del active_trivia[interaction.user.id]
+        await ledger.credit(interaction.user.id, xp=10)
         await interaction.response.send_message("✅ Correct! You gained 10 XP.")
     else:
         await interaction.response.send_message("❌ Incorrect answer. Try again!")
@@ -585,7 +767,7 @@ async def joke(interaction: discord.Interaction):
 # oil balance
 @tree.command(name="balance", description="Check your oil drops balance", guild=TEST_GUILD)
 async def balance(interaction: discord.Interaction):
-    ud = get_user_data(interaction.user.id)
+    ud = await get_user_data(interaction.user.id)
     await interaction.response.send_message(f"💰 You have {ud['oil']} oil drops.")
 
 # give oil (admin)
@@ -596,8 +778,7 @@ async def giveoil(interaction: discord.Interaction, user: discord.Member, amount
     if amount <= 0:
         await ephemeral_send(interaction, "❌ Amount must be positive.")
         return
-    ud = get_user_data(user.id)
-    ud["oil"] += amount
+    await ledger.credit(user.id, amount)
     await interaction.response.send_message(f"✅ Gave {amount} oil drops to {user}.")
 
 # take oil (admin)
@@ -608,9 +789,8 @@ async def takeoil(interaction: discord.Interaction, user: discord.Member, amount
     if amount <= 0:
         await ephemeral_send(interaction, "❌ Amount must be positive.")
         return
-    ud = get_user_data(user.id)
-    ud["oil"] = max(0, ud["oil"] - amount)
-    await interaction.response.send_message(f"✅ Took {amount} oil drops from {user}.")
+    taken = await ledger.debit_up_to(user.id, amount)
+    await interaction.response.send_message(f"✅ Took {taken} oil drops from {user}.")
 
 # XP give (admin)
 @tree.command(name="givexp", description="Give XP to a user", guild=TEST_GUILD)
@@ -620,33 +800,72 @@ async def givexp(interaction: discord.Interaction, user: discord.Member, amount:
     if amount <= 0:
         await ephemeral_send(interaction, "❌ Amount must be positive.")
         return
-    ud = get_user_data(user.id)
-    ud["xp"] += amount
-    try_level_up(user.id, user)
+    await grant(interaction.guild, [user.id], xp=amount)
     await interaction.response.send_message(f"✅ Gave {amount} XP to {user}.")
 
+@tree.command(name="massgive", description="Give XP and/or oil to many users or a whole role (admin only)", guild=TEST_GUILD)
+@app_commands.describe(users="User mentions or IDs, separated by spaces or commas", role="Give to everyone with this role",
+                       xp="XP to give each user", oil="Oil drops to give each user")
+@requires_perms(['administrator'])
+async def massgive(interaction: discord.Interaction, users: str = None, role: discord.Role = None, xp: int = 0, oil: int = 0):
+    if xp < 0 or oil < 0 or not (xp or oil):
+        await ephemeral_send(interaction, "❌ Give a positive amount of XP and/or oil.")
+        return
+    user_ids, invalid = parse_user_ids(users or "")
+    if not user_ids and role is None:
+        await ephemeral_send(interaction, "❌ No valid users given.")
+        return
+    await interaction.response.defer(thinking=True)
+    if role is not None:
+        if interaction.guild.chunked:
+            holders = [m.id for m in role.members if not m.bot]
+        else:
+            # Members are not cached (LEAN_GATEWAY): list them over REST
+            holders = [m.id async for m in interaction.guild.fetch_members(limit=None) if role in m.roles and not m.bot]
+        user_ids = list(dict.fromkeys([*user_ids, *holders]))
+    if not user_ids:
+        await interaction.edit_original_response(content="❌ Nobody to give to.")
+        return
+    leveled, queued = await grant(interaction.guild, user_ids, oil=oil, xp=xp)
+    gifts = " and ".join(part for part in (f"{xp} XP" if xp else "", f"{oil} oil drops" if oil else "") if part)
+    text = f"✅ Gave {gifts} to {len(user_ids)} users. {len(leveled)} leveled up, {queued} role updates queued."
+    if invalid:
+        text += f"\n⚠️ Skipped {len(invalid)} invalid entries."
+    await interaction.edit_original_response(content=text)
+
 # XP leaderboard
 @tree.command(name="xpleaderboard", description="Show top XP holders", guild=TEST_GUILD)
 async def xpleaderboard(interaction: discord.Interaction):
-    sorted_users = sorted(user_data.items(), key=lambda kv: kv[1]["xp"], reverse=True)[:10]
+    top_users = xp_ranking.top(10)
     embed = discord.Embed(title="XP Leaderboard", color=discord.Color.gold())
-    for i, (user_id, data) in enumerate(sorted_users, 1):
+    for i, (user_id, xp) in enumerate(top_users, 1):
         user = bot.get_user(user_id)
         user_display = user.name if user else f"User ID {user_id}"
-        embed.add_field(name=f"#{i} - {user_display}", value=f"{data['xp']} XP", inline=False)
+        embed.add_field(name=f"#{i} - {user_display}", value=f"{xp} XP", inline=False)
     await interaction.response.send_message(embed=embed)
 
 # oil leaderboard
 @tree.command(name="leaderboard", description="Show the top oil holders", guild=TEST_GUILD)
 async def leaderboard(interaction: discord.Interaction):
-    sorted_users = sorted(user_data.items(), key=lambda kv: kv[1]["oil"], reverse=True)[:10]
+    top_users = oil_ranking.top(10)
     embed = discord.Embed(title="Oil Drops Leaderboard", color=discord.Color.orange())
-    for i, (user_id, data) in enumerate(sorted_users, 1):
+    for i, (user_id, oil) in enumerate(top_users, 1):
         user = bot.get_user(user_id)
         user_display = user.name if user else f"User ID {user_id}"
-        embed.add_field(name=f"#{i} - {user_display}", value=f"{data['oil']} oil drops", inline=False)
+        embed.add_field(name=f"#{i} - {user_display}", value=f"{oil} oil drops", inline=False)
     await interaction.response.send_message(embed=embed)
 
+# rank
+@tree.command(name="rank", description="Show your oil and XP leaderboard rank", guild=TEST_GUILD)
+@app_commands.describe(user="User to look up")
+async def rank(interaction: discord.Interaction, user: discord.Member = None):
+    user = user or interaction.user
+    ud = await get_user_data(user.id)
+    await interaction.response.send_message(
+        f"🏆 {user}: #{oil_ranking.rank(user.id)} of {len(oil_ranking)} by oil ({ud['oil']} oil drops), "
+        f"#{xp_ranking.rank(user.id)} by XP ({ud['xp']} XP)"
+    )
+
 # shop (your existing shop command, included here)
 
 @tree.command(name="shop", description="Show the item shop", guild=TEST_GUILD)
@@ -663,20 +882,25 @@ async def buy(interaction: discord.Interaction, item_key: str):
     if not item:
         await ephemeral_send(interaction, "❌ Item not found.")
         return
-    ud = get_user_data(interaction.user.id)
-    if ud["oil"] < item["price"]:
+    try:
+        async with ledger.transaction(interaction.user.id) as (ud,):
+            if ud["oil"] < item["price"]:
+                raise InsufficientFunds(interaction.user.id, ud["oil"], item["price"])
+            ud["oil"] -= item["price"]
+            ud["xp"] += item["xp"]
+            inventory = ud["inventory"]
+            inventory[item_key] = inventory.get(item_key, 0) + 1
+            leveled = apply_level_ups(ud)
+    except InsufficientFunds:
         await ephemeral_send(interaction, "❌ You don't have enough oil drops to buy this item.")
         return
-    ud["oil"] -= item["price"]
-    ud["xp"] += item["xp"]
-    inventory = ud["inventory"]
-    inventory[item_key] = inventory.get(item_key, 0) + 1
-    try_level_up(interaction.user.id, interaction.user)
+    if leveled:
+        update_roles(interaction.user)
     await interaction.response.send_message(f"✅ Bought {item_key}. You gained {item['xp']} XP.")
 
 @tree.command(name="inventory", description="Show your inventory", guild=TEST_GUILD)
 async def inventory(interaction: discord.Interaction):
-    ud = get_user_data(interaction.user.id)
+    ud = await get_user_data(interaction.user.id)
     inv = ud.get("inventory", {})
     if not inv:
         await interaction.response.send_message("🛒 Your inventory is empty.")
@@ -692,9 +916,11 @@ async def inventory(interaction: discord.Interaction):
 async def talk(interaction: discord.Interaction):
     if interaction.user.id in talk_enabled_users:
         talk_enabled_users.remove(interaction.user.id)
+        runtime.changed("talk", interaction.user.id)
         await interaction.response.send_message("🗣️ Talk mode disabled.")
     else:
         talk_enabled_users.add(interaction.user.id)
+        runtime.changed("talk", interaction.user.id)
         await interaction.response.send_message("🗣️ Talk mode enabled.")
 
 # Length limit commands
@@ -707,6 +933,7 @@ async def setlengthlimit(interaction: discord.Interaction, max_length: int, char
         await ephemeral_send(interaction, "❌ Max length must be positive.")
         return
     length_limits[interaction.guild.id] = {"max_len": max_length, "character": character}
+    runtime.changed("length_limits", interaction.guild.id)
     await interaction.response.send_message(f"✅ Length limit set to {max_length} characters with character '{character}'.")
 
 @tree.command(name="clearlengthlimit", description="Clear message length limit for the server", guild=TEST_GUILD)
@@ -714,6 +941,7 @@ async def setlengthlimit(interaction: discord.Interaction, max_length: int, char
 async def clearlengthlimit(interaction: discord.Interaction):
     if interaction.guild.id in length_limits:
         del length_limits[interaction.guild.id]
+        runtime.changed("length_limits", interaction.guild.id)
         await interaction.response.send_message("✅ Length limit cleared.")
     else:
         await ephemeral_send(interaction, "❌ No length limit set.")
@@ -725,16 +953,92 @@ async def clearlengthlimit(interaction: discord.Interaction):
 async def togglegambling(interaction: discord.Interaction):
     global gambling_enabled
     gambling_enabled = not gambling_enabled
+    runtime.changed("flags")
     await interaction.response.send_message(f"Gambling enabled: {gambling_enabled}")
 
+# In-memory store occupancy
+
+@tree.command(name="storestats", description="Show in-memory store sizes and evictions", guild=TEST_GUILD)
+@requires_perms(['administrator'])
+async def storestats(interaction: discord.Interaction):
+    embed = discord.Embed(title="Store Stats", color=discord.Color.dark_grey())
+    for name, store in (("Cooldowns", gambling_cooldowns), ("Blackjack", blackjack_games), ("Trivia", active_trivia)):
+        st = store.stats()
+        embed.add_field(
+            name=name,
+            value=f"Size: {st['size']}\nEvicted: {st['evictions']}\nExpired on access: {st['expired_on_access']}",
+        )
+    st = user_data.stats()
+    embed.add_field(name="Economy cache", value=f"Cached: {st['cached']}\nDirty: {st['dirty']}\nEvicted: {st['evictions']}")
+    st = ledger.stats()
+    embed.add_field(name="Ledger", value=f"Transactions: {st['transactions']}\nContended: {st['contended']}\nOpen bets: {st['escrows']} ({st['held']} oil)")
+    st = runtime.stats()
+    embed.add_field(name="Runtime state", value=f"Generation: {st['generation']}\nPending: {st['dirty']}\nRestored: {st['restored']} in {st['restore_ms']} ms")
+    st = rest.stats()
+    waits = "\n".join(
+        f"{name}: {depth} queued, wait {st['wait_avg_ms'][name]}/{st['wait_max_ms'][name]} ms avg/max"
+        for name, depth in st["depth"].items()
+    )
+    embed.add_field(
+        name="REST queue",
+        value=f"In flight: {st['in_flight']}\nCoalesced: {st['coalesced']}\nFailed: {st['failed']}\n{waits}",
+        inline=False,
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # Reload commands
 
 @tree.command(name="reload", description="Reload slash commands", guild=TEST_GUILD)
 @requires_perms(['administrator'])
 async def reload_commands(interaction: discord.Interaction):
-    await tree.sync(guild=TEST_GUILD)
+    await sync_commands(tree, TEST_GUILD, force=True)
     await interaction.response.send_message("🔄 Slash commands reloaded.")
 
+# Sampling profiler (see profiler.py); no sampler thread exists until an admin starts one
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "600"))  # followups need the interaction token (15 min)
+active_profile: SamplingProfiler | None = None
+
+async def finish_profile(profile: SamplingProfiler) -> tuple[str, str]:
+    global active_profile
+    if active_profile is profile:
+        active_profile = None
+    await asyncio.to_thread(profile.stop)
+    path = await asyncio.to_thread(profile.write, PROFILE_DIR)
+    return path, profile.summary()
+
+def profile_report(path: str, summary: str) -> dict:
+    return {"content": f"🔬 Profile written to `{path}`\n```\n{summary}\n```", "file": discord.File(path)}
+
+async def stop_profile_later(interaction: discord.Interaction, profile: SamplingProfiler, seconds: int):
+    await asyncio.sleep(seconds)
+    if active_profile is profile:
+        path, summary = await finish_profile(profile)
+        await interaction.followup.send(**profile_report(path, summary), ephemeral=True)
+
+@tree.command(name="profile", description="Sample where the bot spends its time (admin only)", guild=TEST_GUILD)
+@app_commands.describe(action="Start or stop sampling", seconds="Stop automatically after this many seconds", interval_ms="Milliseconds between samples")
+@requires_perms(['administrator'])
+async def profile_command(interaction: discord.Interaction, action: Literal["start", "stop"], seconds: int = 60, interval_ms: int = 10):
+    global active_profile
+    if action == "start":
+        if active_profile is not None:
+            await ephemeral_send(interaction, "❌ A profile is already running. Stop it first.")
+            return
+        seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+        active_profile = SamplingProfiler(tree, guilds=(None, TEST_GUILD), interval=max(1, interval_ms) / 1000)
+        active_profile.start()
+        asyncio.create_task(stop_profile_later(interaction, active_profile, seconds))
+        await ephemeral_send(interaction, f"🔬 Profiling for up to {seconds}s, one sample every {max(1, interval_ms)} ms.")
+        return
+    if active_profile is None:
+        await ephemeral_send(interaction, "❌ No profile is running.")
+        return
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    path, summary = await finish_profile(active_profile)
+    await interaction.followup.send(**profile_report(path, summary), ephemeral=True)
+
 # --- Extra commands start here: (more fun, utility, moderation, gambling, and economy) ---
 
 # -------------- FUN COMMANDS --------------
@@ -793,34 +1097,66 @@ async def warn(interaction: discord.Interaction, user: discord.Member, reason: s
     # This is a placeholder, you'd store warnings in a database or dict
     await interaction.response.send_message(f"⚠️ {user} has been warned for: {reason}")
 
+# Bulk actions run concurrently under a per-guild, per-action rate budget (see moderation.py)
+moderator = BulkModerator.from_env()
+
+async def run_bulk(interaction: discord.Interaction, name: str, action, users: str, reason: str = None):
+    user_ids, invalid = parse_user_ids(users)
+    if not user_ids:
+        await ephemeral_send(interaction, "❌ No valid user mentions or IDs given.")
+        return
+    await interaction.response.defer(thinking=True)
+
+    async def progress(report):
+        await interaction.edit_original_response(content=f"⏳ {report.progress()}")
+
+    report = await moderator.run(interaction.guild, name, action, user_ids, reason=reason, invalid=invalid, progress=progress)
+    text = report.render()
+    if len(text) <= 2000:
+        await interaction.edit_original_response(content=text, allowed_mentions=discord.AllowedMentions.none())
+    else:
+        details = discord.File(io.BytesIO(report.details().encode()), filename=f"{name}-report.txt")
+        await interaction.edit_original_response(content=report.summary(), attachments=[details])
+
 @tree.command(name="masskick", description="Kick multiple users (admin only)", guild=TEST_GUILD)
 @app_commands.describe(users="Users to kick (mention or ID separated by spaces)", reason="Reason for kick")
 @requires_perms(['kick_members'])
 async def masskick(interaction: discord.Interaction, users: str, reason: str = None):
-    user_ids = [int(u.strip("<@!>")) for u in users.split()]
-    kicked = []
-    failed = []
-    for uid in user_ids:
-        member = interaction.guild.get_member(uid)
-        if member:
-            try:
-                await member.kick(reason=reason)
-                kicked.append(str(member))
-            except:
-                failed.append(str(member))
-    await interaction.response.send_message(f"Kicked: {', '.join(kicked)}\nFailed: {', '.join(failed)}")
+    await run_bulk(interaction, "kick", moderation.kick, users, reason)
+
+@tree.command(name="massban", description="Ban multiple users (admin only)", guild=TEST_GUILD)
+@app_commands.describe(users="Users to ban (mention or ID separated by spaces)", reason="Reason for ban")
+@requires_perms(['ban_members'])
+async def massban(interaction: discord.Interaction, users: str, reason: str = None):
+    await run_bulk(interaction, "ban", moderation.ban, users, reason)
+
+@tree.command(name="masstimeout", description="Timeout multiple users (admin only)", guild=TEST_GUILD)
+@app_commands.describe(users="Users to timeout (mention or ID separated by spaces)", duration="Duration in seconds", reason="Reason for timeout")
+@requires_perms(['moderate_members'])
+async def masstimeout(interaction: discord.Interaction, users: str, duration: int, reason: str = None):
+    if duration < 1 or duration > 28 * 24 * 3600:
+        await ephemeral_send(interaction, "❌ Duration must be between 1 second and 28 days.")
+        return
+    until = discord.utils.utcnow() + timedelta(seconds=duration)
+    await run_bulk(interaction, "timeout", moderation.timeout(until), users, reason)
 
 # -------------- UTILITY COMMANDS --------------
 
+async def deliver_reminder(user_id: int, message: str):
+    user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+    await user.send(f"⏰ Reminder: {message}")
+
+# Pending reminders are persisted and survive restarts (see scheduler.py)
+reminders = ReminderScheduler.from_env(deliver_reminder)
+
 @tree.command(name="remindme", description="Set a reminder", guild=TEST_GUILD)
 @app_commands.describe(seconds="Seconds to wait", message="Reminder message")
 async def remindme(interaction: discord.Interaction, seconds: int, message: str):
+    if seconds < 0:
+        await ephemeral_send(interaction, "❌ Seconds must not be negative.")
+        return
+    await reminders.schedule(interaction.user.id, message, seconds)
     await interaction.response.send_message(f"⏰ Reminder set for {seconds} seconds from now.")
-    await asyncio.sleep(seconds)
-    try:
-        await interaction.user.send(f"⏰ Reminder: {message}")
-    except:
-        pass
 
 @tree.command(name="pingall", description="Ping everyone in the server (admin only)", guild=TEST_GUILD)
 @requires_perms(['administrator'])
@@ -861,7 +1197,7 @@ async def describeimage(interaction: discord.Interaction, url: str):
 @app_commands.describe(user="User to give role", role_name="Role name")
 @requires_perms(['manage_roles'])
 async def giverole(interaction: discord.Interaction, user: discord.Member, role_name: str):
-    role = discord.utils.get(interaction.guild.roles, name=role_name)
+    role = role_index.get(interaction.guild, role_name)
     if not role:
         await ephemeral_send(interaction, f"❌ Role '{role_name}' not found.")
         return
@@ -875,7 +1211,7 @@ async def giverole(interaction: discord.Interaction, user: discord.Member, role_
 @app_commands.describe(user="User to remove role from", role_name="Role name")
 @requires_perms(['manage_roles'])
 async def removerole(interaction: discord.Interaction, user: discord.Member, role_name: str):
-    role = discord.utils.get(interaction.guild.roles, name=role_name)
+    role = role_index.get(interaction.guild, role_name)
     if not role:
         await ephemeral_send(interaction, f"❌ Role '{role_name}' not found.")
         return
@@ -895,5 +1231,105 @@ async def sayinembed(interaction: discord.Interaction, message: str):
 
 # -------------- END OF COMMANDS --------------
 
-# Run bot
-bot.run(DISCORD_MANAGER_TOKEN)
+# -------- METRICS --------
+# Read only when /metrics is scraped
+
+metrics.gauge(
+    "bot_gateway_latency_seconds", "Gateway heartbeat latency per shard.",
+    lambda: [({"shard": shard_id}, latency) for shard_id, latency in bot.latencies if latency == latency and latency != float("inf")],
+)
+metrics.gauge(
+    "bot_store_entries", "Entries in the in-memory stores.",
+    lambda: [
+        ({"store": "user_data_cached"}, user_data.stats()["cached"]),
+        ({"store": "user_data_dirty"}, user_data.stats()["dirty"]),
+        ({"store": "users"}, len(oil_ranking)),
+        ({"store": "blackjack_games"}, len(blackjack_games)),
+        ({"store": "gambling_cooldowns"}, len(gambling_cooldowns)),
+        ({"store": "active_trivia"}, len(active_trivia)),
+        ({"store": "reminders"}, len(reminders)),
+        ({"store": "open_bets"}, len(ledger.escrows)),
+    ],
+)
+metrics.gauge(
+    "bot_rest_queue_depth", "Outbound REST calls waiting in the scheduler.",
+    lambda: [({"priority": PRIORITY_NAMES[p]}, n) for p, n in rest.depth.items()],
+)
+metrics.gauge("bot_rest_in_flight", "Outbound REST calls running.", lambda: rest.stats()["in_flight"])
+metrics.histogram(
+    "bot_rest_wait_seconds", "Time outbound REST calls spent queued.",
+    lambda: [
+        ({"priority": PRIORITY_NAMES[p]}, WAIT_BUCKETS[:-1], rest.wait_histogram[p], rest.wait_sum[p], rest.wait_count[p])
+        for p in PRIORITY_NAMES
+    ],
+)
+
+# -------- RUNTIME STATE --------
+# Encodings of what runtime_state.py persists; wall-clock expiry keeps TTLs running across restarts
+
+GAME_RECORD = struct.Struct("<qqQdHBBB22s22s")  # bet, stake, guild, expires_at, shoe size, finished, #player, #dealer, cards
+TRIVIA_RECORD = struct.Struct("<Hd")  # question index, expires_at
+
+def pack_game(user_id: int, entry, expires_at: float) -> bytes:
+    game, stake, guild_id = entry
+    return GAME_RECORD.pack(game.bet, stake.amount, guild_id, expires_at, game.shoe_size, game.finished,
+                            len(game.player.cards), len(game.dealer.cards), bytes(game.player.cards), bytes(game.dealer.cards))
+
+def unpack_game(user_id: int, data):
+    bet, amount, guild_id, expires_at, shoe_size, finished, n_player, n_dealer, player, dealer = GAME_RECORD.unpack(data)
+    game = BlackjackGame.restore(user_id, bet, shoe_size, player[:n_player], dealer[:n_dealer], bool(finished))
+    # Holds the stake amount until reopen_restored_bets; games that expired while we were down get a second
+    # to be reopened and then expire (and refund) normally
+    return (game, amount, guild_id), max(expires_at, time.time() + 1)
+
+def reopen_restored_bets():
+    # A later delta record can replace or delete a game, so escrows are only reopened once loading is done.
+    # Which stakes are held is decided by the economy database, where they are written with their debit;
+    # the runtime state is flushed separately, so after a crash it can hold a game whose debit never
+    # landed or whose payout already did (dropped), and miss a game whose stake is held (refunded).
+    unclaimed = dict(user_data.held)
+    for user_id, (game, amount, guild_id) in list(blackjack_games.items()):
+        if unclaimed.pop(user_id, None) != amount:
+            del blackjack_games[user_id]
+            continue
+        stake = ledger.restore_escrow(user_id, amount)
+        # Games from guilds now on another worker's shards (the shard layout changed) cannot be continued
+        # here; this worker's state directory is the only copy, so their bets are refunded once, here.
+        if guild_id and not owns_guild(guild_id):
+            del blackjack_games[user_id]
+            asyncio.create_task(stake.refund())
+        else:
+            blackjack_games.set(user_id, (game, stake, guild_id), ttl=blackjack_games.ttl(user_id))
+    for user_id, amount in unclaimed.items():
+        asyncio.create_task(ledger.restore_escrow(user_id, amount).refund())
+    # Length limits of guilds this worker no longer owns are dropped too
+    for guild_id in [g for g in length_limits if not owns_guild(g)]:
+        del length_limits[guild_id]
+        runtime.changed("length_limits", guild_id)
+
+def unpack_trivia(user_id: int, data):
+    index, expires_at = TRIVIA_RECORD.unpack(data)
+    return (trivia_questions[index], expires_at) if index < len(trivia_questions) else None
+
+def set_flags(data):
+    global gambling_enabled
+    gambling_enabled = bool(data[0])
+
+runtime.register("flags", runtime_state.Flags(lambda: bytes([gambling_enabled]), set_flags))
+runtime.register("talk", runtime_state.KeySet(talk_enabled_users))
+runtime.register("length_limits", runtime_state.Mapping(
+    length_limits,
+    lambda limit: struct.pack("<Q", limit["max_len"]) + limit["character"].encode(),
+    lambda data: {"max_len": struct.unpack_from("<Q", data)[0], "character": bytes(data[8:]).decode()},
+))
+runtime.register("blackjack", runtime_state.Expiring(blackjack_games, pack_game, unpack_game, GAME_RECORD.size))
+runtime.register("trivia", runtime_state.Expiring(
+    active_trivia,
+    lambda user_id, question, expires_at: TRIVIA_RECORD.pack(trivia_questions.index(question), expires_at),
+    unpack_trivia,
+    TRIVIA_RECORD.size,
+))
+
+# Run bot (importing main only registers the commands; benchmarks/bench_load.py relies on that)
+if __name__ == "__main__":
+    bot.run(DISCORD_MANAGER_TOKEN)
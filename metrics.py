@@ -0,0 +1,159 @@
+"""Prometheus text-format metrics for the manager bot.
+
+Hot-path cost is one perf_counter() and a bisect per slash command; everything
+else (store sizes, gateway latency, REST queue figures) is read from callbacks
+only when /metrics is scraped.
+"""
+import time
+import asyncio
+import bisect
+
+COMMAND_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self.command_latency: dict[str, Histogram] = {}
+        self.command_errors: dict[str, int] = {}
+        self.loop_lag = Histogram(LAG_BUCKETS)
+        self.loop_lag_last = 0.0
+        self.last_tick = time.monotonic()  # read by the keep_alive watchdog thread
+        self.gateway_events: dict[tuple[str, int], int] = {}  # (event, shard_id) -> count
+        self._gauges: list[tuple[str, str, object]] = []
+        self._histograms: list[tuple[str, str, object]] = []
+
+    # --- Collection ---
+
+    def observe_command(self, name: str, seconds: float, error: bool = False):
+        histogram = self.command_latency.get(name)
+        if histogram is None:
+            histogram = self.command_latency[name] = Histogram(COMMAND_BUCKETS)
+        histogram.observe(seconds)
+        if error:
+            self.command_errors[name] = self.command_errors.get(name, 0) + 1
+
+    def gateway_event(self, event: str, shard_id: int):
+        key = (event, shard_id)
+        self.gateway_events[key] = self.gateway_events.get(key, 0) + 1
+
+    def gauge(self, name: str, help: str, read):
+        """`read()` returns a number, or a list of (labels dict, number) pairs."""
+        self._gauges.append((name, help, read))
+
+    def histogram(self, name: str, help: str, read):
+        """`read()` returns a list of (labels, bounds, per-bucket counts incl. +Inf, sum, count)."""
+        self._histograms.append((name, help, read))
+
+    async def watch_loop(self, interval: float = 0.25):
+        """Measure how late the event loop wakes a sleeping task."""
+        while True:
+            t = time.perf_counter()
+            self.last_tick = time.monotonic()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - t - interval)
+            self.loop_lag.observe(lag)
+            self.loop_lag_last = lag
+
+    # --- Instrumentation ---
+
+    def instrument(self, bot):
+        """Time every slash command through the tree's check/completion/error hooks."""
+        tree = bot.tree
+        check = tree.interaction_check
+        on_error = tree.on_error
+
+        async def interaction_check(interaction):
+            interaction.extras["metrics_start"] = time.perf_counter()
+            return await check(interaction)
+
+        async def on_app_command_completion(interaction, command):
+            start = interaction.extras.get("metrics_start")
+            if start is not None:
+                self.observe_command(command.qualified_name, time.perf_counter() - start)
+
+        async def error_hook(interaction, error):
+            start = interaction.extras.get("metrics_start")
+            if start is not None and interaction.command is not None:
+                self.observe_command(interaction.command.qualified_name, time.perf_counter() - start, error=True)
+            await on_error(interaction, error)
+
+        tree.interaction_check = interaction_check
+        tree.on_error = error_hook
+        bot.add_listener(on_app_command_completion, "on_app_command_completion")
+        for event in ("connect", "disconnect", "resumed"):
+            bot.add_listener(self._gateway_listener(event), f"on_shard_{event}")
+
+    def _gateway_listener(self, event: str):
+        async def listener(shard_id: int):
+            self.gateway_event(event, shard_id)
+        return listener
+
+    # --- Exposition ---
+
+    def _render_histogram(self, out: list, name: str, labels: dict, bounds, counts, total: float, count: int):
+        cumulative = 0
+        for bound, n in zip((*bounds, "+Inf"), counts):
+            cumulative += n
+            out.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+        out.append(f"{name}_sum{_labels(labels)} {total}")
+        out.append(f"{name}_count{_labels(labels)} {count}")
+
+    def render(self) -> str:
+        out = [
+            "# HELP bot_command_duration_seconds Slash command handling time.",
+            "# TYPE bot_command_duration_seconds histogram",
+        ]
+        for name, h in sorted(self.command_latency.items()):
+            self._render_histogram(out, "bot_command_duration_seconds", {"command": name}, h.bounds, h.counts, h.sum, h.count)
+        out += ["# HELP bot_command_errors_total Slash commands that raised.", "# TYPE bot_command_errors_total counter"]
+        for name, n in sorted(self.command_errors.items()):
+            out.append(f"bot_command_errors_total{_labels({'command': name})} {n}")
+
+        out += ["# HELP bot_event_loop_lag_seconds How late the event loop ran a due timer.",
+                "# TYPE bot_event_loop_lag_seconds histogram"]
+        h = self.loop_lag
+        self._render_histogram(out, "bot_event_loop_lag_seconds", {}, h.bounds, h.counts, h.sum, h.count)
+        out += ["# TYPE bot_event_loop_lag_last_seconds gauge", f"bot_event_loop_lag_last_seconds {self.loop_lag_last}"]
+
+        out += ["# HELP bot_gateway_events_total Shard connects, disconnects and resumes.",
+                "# TYPE bot_gateway_events_total counter"]
+        for (event, shard_id), n in sorted(self.gateway_events.items()):
+            out.append(f"bot_gateway_events_total{_labels({'event': event, 'shard': shard_id})} {n}")
+
+        for name, help, read in self._histograms:
+            out += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+            for labels, bounds, counts, total, count in read():
+                self._render_histogram(out, name, labels, bounds, counts, total, count)
+
+        for name, help, read in self._gauges:
+            out += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            value = read()
+            for labels, v in (value if isinstance(value, list) else [({}, value)]):
+                out.append(f"{name}{_labels(labels)} {v}")
+        return "\n".join(out) + "\n"
@@ -0,0 +1,174 @@
+import os
+import re
+import time
+import asyncio
+from datetime import datetime
+import discord
+
+_USER_TOKEN = re.compile(r"^(?:<@!?(\d+)>|(\d+))$")
+
+
+def parse_user_ids(text: str) -> tuple[list[int], list[str]]:
+    """Mentions/IDs separated by spaces or commas -> (unique IDs in order, tokens that were neither)."""
+    ids, invalid, seen = [], [], set()
+    for token in text.replace(",", " ").split():
+        match = _USER_TOKEN.match(token)
+        if match is None:
+            invalid.append(token)
+            continue
+        uid = int(match.group(1) or match.group(2))
+        if uid not in seen:
+            seen.add(uid)
+            ids.append(uid)
+    return ids, invalid
+
+
+class RateBudget:
+    """Token bucket: at most `rate` requests per second, bursting up to `burst`. Waiters are served in order."""
+
+    def __init__(self, rate: float, burst: int = None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# --- Actions: kick/ban only need the user id, so uncached members (LEAN_GATEWAY) cost no extra fetch ---
+
+async def kick(guild: discord.Guild, user_id: int, reason: str = None):
+    await guild.kick(discord.Object(user_id), reason=reason)
+
+
+async def ban(guild: discord.Guild, user_id: int, reason: str = None):
+    await guild.ban(discord.Object(user_id), reason=reason, delete_message_seconds=0)
+
+
+def timeout(until: datetime):
+    async def action(guild: discord.Guild, user_id: int, reason: str = None):
+        # Member.timeout needs the member: free when cached, one fetch otherwise (NotFound if they left)
+        member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+        await member.timeout(until, reason=reason)
+    return action
+
+
+def describe_error(e: Exception) -> str:
+    if isinstance(e, discord.NotFound):
+        return "not in this server"
+    if isinstance(e, discord.Forbidden):
+        return "missing permissions or role is too high"
+    if isinstance(e, discord.HTTPException):
+        return f"HTTP {e.status}: {e.text or 'error'}"
+    return str(e) or type(e).__name__
+
+
+class BulkReport:
+    def __init__(self, action: str, user_ids: list[int], invalid: list[str] = ()):
+        self.action = action
+        self.user_ids = user_ids
+        self.invalid = list(invalid)
+        self.succeeded: list[int] = []
+        self.failed: dict[int, str] = {}
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def done(self) -> int:
+        return len(self.succeeded) + len(self.failed)
+
+    def progress(self) -> str:
+        return f"{self.action}: {self.done}/{len(self.user_ids)} done ({len(self.failed)} failed)"
+
+    def summary(self) -> str:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        text = f"✅ {self.action}: {len(self.succeeded)} succeeded, {len(self.failed)} failed in {elapsed:.1f}s"
+        if self.invalid:
+            text += f"\n⚠️ Ignored {len(self.invalid)} invalid entries: {' '.join(self.invalid)}"
+        return text
+
+    def details(self) -> str:
+        lines = [f"{uid}\tok" for uid in self.succeeded]
+        lines += [f"{uid}\tfailed: {reason}" for uid, reason in self.failed.items()]
+        return "\n".join(lines)
+
+    def render(self) -> str:
+        lines = [self.summary()]
+        if self.succeeded:
+            lines.append("Done: " + ", ".join(f"<@{uid}>" for uid in self.succeeded))
+        for uid, reason in self.failed.items():
+            lines.append(f"❌ <@{uid}>: {reason}")
+        return "\n".join(lines)
+
+
+class BulkModerator:
+    """Runs one moderation action against many users concurrently.
+
+    Requests for the same action in the same guild share a RateBudget, which keeps
+    them under Discord's per-route limit instead of running into 429s (which also
+    count against the invalid-request limit). `progress(report)` is awaited every
+    `progress_interval` seconds while the run is in flight.
+    """
+
+    def __init__(self, concurrency: int = 8, rate: float = 5.0, burst: int = None):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.budgets: dict[tuple[str, int], RateBudget] = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            concurrency=int(os.getenv("MOD_CONCURRENCY", "8")),
+            rate=float(os.getenv("MOD_RATE", "5")),
+            burst=int(os.getenv("MOD_BURST", "0")) or None,
+        )
+
+    def budget(self, action: str, guild_id: int) -> RateBudget:
+        key = (action, guild_id)
+        if key not in self.budgets:
+            self.budgets[key] = RateBudget(self.rate, self.burst)
+        return self.budgets[key]
+
+    async def run(self, guild: discord.Guild, name: str, action, user_ids: list[int], reason: str = None,
+                  invalid: list[str] = (), progress=None, progress_interval: float = 2.0) -> BulkReport:
+        report = BulkReport(name, user_ids, invalid)
+        budget = self.budget(name, guild.id)
+        pending = iter(user_ids)
+
+        async def worker():
+            for uid in pending:
+                await budget.acquire()
+                try:
+                    await action(guild, uid, reason)
+                    report.succeeded.append(uid)
+                except Exception as e:
+                    report.failed[uid] = describe_error(e)
+
+        async def report_progress():
+            while True:
+                await asyncio.sleep(progress_interval)
+                try:
+                    await progress(report)
+                except Exception as e:
+                    print(f"[ERROR] Bulk {name} progress update failed: {e}")
+
+        reporter = asyncio.create_task(report_progress()) if progress is not None else None
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(user_ids)))))
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            report.finished = time.monotonic()
+        return report
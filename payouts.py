@@ -0,0 +1,30 @@
+"""Payout rules for the gambling commands, as multiples of the bet.
+
+main.py settles every round through these functions and simulate.py builds its
+vectorized lookups from the same tables, so a rule change shows up in both.
+"""
+
+# gamble: a coin flip, even money
+GAMBLE_WIN_CHANCE = 0.5
+GAMBLE_PAYOUTS = {True: 1, False: -1}
+
+# slots: three reels; keyed by how many reels show the most common symbol
+SLOT_SYMBOLS = ("🍒", "🍋", "🍊", "🍉", "⭐", "7️⃣")
+SLOT_REELS = 3
+SLOT_PAYOUTS = {3: 5, 2: 2, 1: -1}
+
+# blackjack: keyed by BlackjackGame.outcome() (+1 win, 0 push, -1 loss); no 3:2 for naturals
+BLACKJACK_PAYOUTS = {1: 1, 0: 0, -1: -1}
+
+
+def gamble_payout(won: bool, bet: int) -> int:
+    return GAMBLE_PAYOUTS[won] * bet
+
+
+def slots_payout(reels: list[str], bet: int) -> int:
+    matches = max(reels.count(symbol) for symbol in reels)
+    return SLOT_PAYOUTS[matches] * bet
+
+
+def blackjack_payout(outcome: int, bet: int) -> int:
+    return BLACKJACK_PAYOUTS[outcome] * bet
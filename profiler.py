@@ -0,0 +1,134 @@
+"""On-demand sampling profiler for the manager bot's event loop.
+
+Nothing is installed while it is off. When started, a daemon thread reads the
+event loop thread's current stack every `interval` seconds through
+sys._current_frames() and counts it under the slash command that is running:
+the innermost frame whose code object belongs to a command callback (unwrapped
+through requires_perms/gambling_command), or, when only a shared decorator
+wrapper is on the stack, the function that wrapper closes over. Samples taken
+while the loop waits in the selector are filed under "(idle)". Results are
+written as collapsed stacks ("root;frame;frame count"), the input format of
+flamegraph.pl and speedscope.
+"""
+import os
+import sys
+import time
+import inspect
+import threading
+from collections import Counter
+
+IDLE = "(idle)"
+NO_COMMAND = "(no command)"
+
+
+def command_codes(tree, guilds=(None,)) -> tuple[dict, set]:
+    """Map each command callback's code object to its name, plus the codes of wrappers shared by several commands."""
+    owners: dict = {}
+    for guild in guilds:
+        for command in tree.walk_commands(guild=guild):
+            func = getattr(command, "callback", None)  # groups have none
+            while func is not None:
+                owners.setdefault(func.__code__, set()).add(command.qualified_name)
+                func = getattr(func, "__wrapped__", None)
+    codes = {code: names.pop() for code, names in owners.items() if len(names) == 1}
+    wrappers = {code for code, names in owners.items() if len(names) > 1}
+    return codes, wrappers
+
+
+class SamplingProfiler:
+    def __init__(self, tree, guilds=(None,), interval: float = 0.01, max_depth: int = 128):
+        self.tree = tree
+        self.guilds = guilds
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.by_command: Counter = Counter()
+        self.samples = 0
+        self.started = None
+        self.stopped = None
+        self._labels: dict = {}
+        self._codes: dict = {}
+        self._wrappers: set = set()
+        self._thread = None
+        self._stop = threading.Event()
+        self._target = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Call from the event loop thread; that is the thread being sampled."""
+        self._codes, self._wrappers = command_codes(self.tree, self.guilds)
+        self._target = threading.get_ident()
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped = time.time()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self._sample(frame)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _command(self, frame):
+        wrapper = None
+        depth = 0
+        while frame is not None and depth < self.max_depth:
+            name = self._codes.get(frame.f_code)
+            if name is not None:
+                return name
+            if wrapper is None and frame.f_code in self._wrappers:
+                wrapper = frame
+            frame = frame.f_back
+            depth += 1
+        if wrapper is not None:
+            func = wrapper.f_locals.get("func")
+            if func is not None:
+                return self._codes.get(inspect.unwrap(func).__code__)
+        return None
+
+    def _sample(self, frame):
+        innermost = frame.f_code
+        if innermost.co_name in ("select", "poll") and innermost.co_filename.endswith("selectors.py"):
+            command = IDLE
+        else:
+            command = self._command(frame) or NO_COMMAND
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.append(command)
+        stack.reverse()
+        self.stacks[";".join(stack)] += 1
+        self.by_command[command] += 1
+        self.samples += 1
+
+    def write(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime("profile-%Y%m%d-%H%M%S.collapsed", time.localtime(self.started)))
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def summary(self, top: int = 10) -> str:
+        elapsed = (self.stopped or time.time()) - self.started
+        lines = [f"{self.samples} samples over {elapsed:.0f}s every {self.interval * 1000:.0f} ms"]
+        busy = self.samples - self.by_command[IDLE]
+        lines.append(f"Loop busy: {busy / self.samples:.1%}" if self.samples else "Loop busy: n/a")
+        for command, count in self.by_command.most_common(top):
+            lines.append(f"{command}: {count} ({count / self.samples:.1%})")
+        return "\n".join(lines)
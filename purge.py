@@ -0,0 +1,131 @@
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+import discord
+
+BULK_BATCH = 100
+# Discord rejects bulk deletes of messages older than 14 days; keep a margin for clock skew.
+BULK_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+
+def parse_date(text: str) -> datetime:
+    """YYYY-MM-DD (UTC) -> aware datetime; raises ValueError on anything else."""
+    return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def message_filter(user_id: int = None, contains: str = None):
+    needle = contains.lower() if contains else None
+
+    def check(message: discord.Message) -> bool:
+        if user_id is not None and message.author.id != user_id:
+            return False
+        if needle is not None and needle not in message.content.lower():
+            return False
+        return True
+    return check
+
+
+class PurgeReport:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.scanned = 0
+        self.bulk_deleted = 0
+        self.single_deleted = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def deleted(self) -> int:
+        return self.bulk_deleted + self.single_deleted
+
+    def progress(self) -> str:
+        return f"Deleted {self.deleted}/{self.limit} (scanned {self.scanned})"
+
+    def summary(self) -> str:
+        elapsed = (self.finished or time.monotonic()) - self.started
+        text = (f"🧹 Deleted {self.deleted} messages in {elapsed:.1f}s "
+                f"({self.bulk_deleted} in bulk, {self.single_deleted} individually; scanned {self.scanned})")
+        if self.failed:
+            text += f"\n⚠️ {self.failed} messages could not be deleted."
+        return text
+
+
+async def purge(channel, limit: int, check=None, before: datetime = None, after: datetime = None,
+                scan_limit: int = None, progress=None, progress_interval: float = 2.0) -> PurgeReport:
+    """Delete up to `limit` messages matching `check`, newest first.
+
+    History is read lazily, one page at a time, by a producer that hands batches
+    of at most 100 to the deleting consumer through a queue of two, so memory
+    stays flat however many messages are purged. Messages younger than 14 days go
+    through bulk delete; older ones are deleted one by one. `scan_limit` bounds how
+    many messages are read when filters match rarely.
+    """
+    report = PurgeReport(limit)
+    cutoff = discord.utils.time_snowflake(discord.utils.utcnow() - BULK_MAX_AGE)
+    batches: asyncio.Queue = asyncio.Queue(maxsize=2)
+
+    async def produce():
+        matched = 0
+        batch, bulk = [], True
+        try:
+            async for message in channel.history(limit=scan_limit, before=before, after=after, oldest_first=False):
+                report.scanned += 1
+                if check is not None and not check(message):
+                    continue
+                young = message.id > cutoff
+                # History is newest first, so once a message is too old for bulk delete, the rest are too.
+                if batch and (young != bulk or len(batch) == BULK_BATCH):
+                    await batches.put((bulk, batch))
+                    batch = []
+                bulk = young
+                batch.append(message)
+                matched += 1
+                if matched >= limit:
+                    break
+            if batch:
+                await batches.put((bulk, batch))
+        except Exception:
+            # Let the consumer finish what it has; the error is re-raised from `await producer`.
+            await batches.put(None)
+            raise
+        await batches.put(None)
+
+    async def consume():
+        while (item := await batches.get()) is not None:
+            bulk, batch = item
+            if bulk and len(batch) > 1:
+                try:
+                    await channel.delete_messages(batch)
+                    report.bulk_deleted += len(batch)
+                    continue
+                except discord.HTTPException as e:
+                    print(f"[ERROR] Bulk delete of {len(batch)} messages failed, deleting one by one: {e}")
+            for message in batch:
+                try:
+                    await message.delete()
+                    report.single_deleted += 1
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException:
+                    report.failed += 1
+
+    async def report_progress():
+        while True:
+            await asyncio.sleep(progress_interval)
+            try:
+                await progress(report)
+            except Exception as e:
+                print(f"[ERROR] Purge progress update failed: {e}")
+
+    reporter = asyncio.create_task(report_progress()) if progress is not None else None
+    producer = asyncio.create_task(produce())
+    try:
+        await consume()
+        await producer
+    finally:
+        producer.cancel()
+        if reporter is not None:
+            reporter.cancel()
+        report.finished = time.monotonic()
+    return report
@@ -0,0 +1,153 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def cache_key(prompt_base: str, content: str) -> str:
+    """Key for a persona prompt + user message, ignoring case and whitespace differences."""
+    normalized = _WHITESPACE.sub(" ", content).strip().lower()
+    return hashlib.sha256(f"{prompt_base}\0{normalized}".encode()).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of LLM replies with single-flight generation.
+
+    Lookups check memory first, then the optional SQLite tier at `path`. `fetch`
+    makes concurrent requests for the same key share one upstream call: the first
+    caller runs `produce()`, and the rest await its result.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600.0, path: str = None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, text TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.getenv("LLM_CACHE_SIZE", "1000")),
+            ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+            path=os.getenv("LLM_CACHE_PATH") or None,
+        )
+
+    # --- Tiers ---
+
+    def _get_memory(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _put_memory(self, key: str, text: str, expires: float):
+        self._entries[key] = (text, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_disk(self, key: str):
+        with self._db_lock:
+            row = self._db.execute("SELECT text, expires FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] <= self._clock():
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+        return row
+
+    def _put_disk(self, key: str, text: str, expires: float):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, text, expires) VALUES (?, ?, ?)", (key, text, expires)
+            )
+
+    async def get(self, key: str):
+        text = self._get_memory(key)
+        if text is not None:
+            self.hits += 1
+            return text
+        if self._db is not None:
+            row = await asyncio.to_thread(self._get_disk, key)
+            if row is not None:
+                self.disk_hits += 1
+                self._put_memory(key, *row)
+                return row[0]
+        return None
+
+    async def put(self, key: str, text: str):
+        expires = self._clock() + self.ttl
+        self._put_memory(key, text, expires)
+        if self._db is not None:
+            await asyncio.to_thread(self._put_disk, key, text, expires)
+
+    # --- Single-flight ---
+
+    async def fetch(self, key: str, produce) -> tuple[str, bool]:
+        """Return `(text, produced)`; `produced` is True only for the caller that ran `produce()`."""
+        text = await self.get(key)
+        if text is not None:
+            return text, False
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight), False
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            text = await produce()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Followers will see the exception; make sure it is not also reported as unretrieved.
+            future.exception()
+            raise
+        else:
+            future.set_result(text)
+            await self.put(key, text)
+            return text, True
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
@@ -0,0 +1,211 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+
+# Priority classes, most urgent first
+INTERACTIVE = 0   # replies a user is looking at (talk echo, warnings)
+MODERATION = 1    # deletes and other enforcement
+BACKGROUND = 2    # role syncs and other housekeeping
+PRIORITY_NAMES = {INTERACTIVE: "interactive", MODERATION: "moderation", BACKGROUND: "background"}
+
+# Upper bounds (seconds) of the queue wait-time histogram
+WAIT_BUCKETS = (0.005, 0.025, 0.1, 0.5, 1.0, 5.0, 30.0, float("inf"))
+
+
+def bucket(method: str, route: str, major: int) -> str:
+    """Queue key shaped like a Discord route and major parameter (channel, guild or webhook).
+
+    Only used to group calls; it is not matched against the X-RateLimit-Bucket ids Discord sends.
+    """
+    return f"{method} {route}:{major}"
+
+
+class _Job:
+    __slots__ = ("bucket", "call", "priority", "key", "future", "submitted", "started")
+
+    def __init__(self, bucket, call, priority, key, future, submitted):
+        self.bucket = bucket
+        self.call = call
+        self.priority = priority
+        self.key = key
+        self.future = future
+        self.submitted = submitted
+        self.started = False
+
+
+class RestScheduler:
+    """Central queue for the bot's ad-hoc outbound REST calls.
+
+    Each rate-limit bucket drains its own priority queue one request at a time,
+    so calls on one route never race each other into 429s, while different
+    buckets proceed in parallel up to `concurrency` requests in flight. Free
+    slots go to the most urgent waiting bucket first. Jobs submitted with the
+    same `key` while one is still queued collapse into a single request running
+    the latest `call` (keeping the earliest submit time and the most urgent
+    priority), which is how repeated role edits for one member become one edit.
+
+    It is a priority and coalescing queue only and keeps no rate-limit budget of
+    its own: buckets are the local keys from `bucket()`, and the real limits are
+    enforced by discord.py's HTTP client underneath, which reads Discord's
+    X-RateLimit headers, waits out exhausted buckets and retries 429s. A call
+    sleeping there holds its bucket and its slot here, so `concurrency` also caps
+    how many calls can be parked on a rate limit at once.
+    """
+
+    def __init__(self, concurrency: int = 16, clock=time.monotonic):
+        self.concurrency = concurrency
+        self._clock = clock
+        self._seq = itertools.count()
+        self._queues: dict[str, list] = {}
+        self._drainers: dict[str, asyncio.Task] = {}
+        self._pending: dict = {}
+        self._free = concurrency
+        self._waiters: list = []
+
+        self.depth = {p: 0 for p in PRIORITY_NAMES}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.wait_count = {p: 0 for p in PRIORITY_NAMES}
+        self.wait_sum = {p: 0.0 for p in PRIORITY_NAMES}
+        self.wait_max = {p: 0.0 for p in PRIORITY_NAMES}
+        self.wait_histogram = {p: [0] * len(WAIT_BUCKETS) for p in PRIORITY_NAMES}
+
+    @classmethod
+    def from_env(cls):
+        return cls(concurrency=int(os.getenv("REST_CONCURRENCY", "16")))
+
+    def submit(self, bucket: str, call, priority: int = BACKGROUND, key=None) -> asyncio.Future:
+        """Queue `call()` (a coroutine function) on `bucket`; the future resolves with its result."""
+        self.submitted += 1
+        job = self._pending.get(key) if key is not None else None
+        if job is not None:
+            self.coalesced += 1
+            job.call = call
+            if priority < job.priority:
+                self.depth[job.priority] -= 1
+                self.depth[priority] += 1
+                job.priority = priority
+                # The old heap entry is skipped once the job has started.
+                heapq.heappush(self._queues[job.bucket], (priority, next(self._seq), job))
+            return job.future
+
+        job = _Job(bucket, call, priority, key, asyncio.get_running_loop().create_future(), self._clock())
+        if key is not None:
+            self._pending[key] = job
+        self.depth[priority] += 1
+        heapq.heappush(self._queues.setdefault(bucket, []), (priority, next(self._seq), job))
+        if bucket not in self._drainers:
+            self._drainers[bucket] = asyncio.create_task(self._drain(bucket))
+        return job.future
+
+    # --- Global slots, granted by priority ---
+
+    async def _acquire(self, priority: int):
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        granted = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), granted))
+        try:
+            await granted
+        except asyncio.CancelledError:
+            if granted.done() and not granted.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        while self._waiters:
+            granted = heapq.heappop(self._waiters)[2]
+            if not granted.done():
+                granted.set_result(None)
+                return
+        self._free += 1
+
+    # --- Per-bucket drain ---
+
+    def _next(self, queue: list):
+        while queue:
+            job = heapq.heappop(queue)[2]
+            if not job.started:
+                return job
+        return None
+
+    def _record_wait(self, priority: int, wait: float):
+        self.wait_count[priority] += 1
+        self.wait_sum[priority] += wait
+        self.wait_max[priority] = max(self.wait_max[priority], wait)
+        histogram = self.wait_histogram[priority]
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if wait <= bound:
+                histogram[i] += 1
+                break
+
+    async def _drain(self, bucket: str):
+        queue = self._queues[bucket]
+        try:
+            while queue:
+                await self._acquire(queue[0][0])
+                try:
+                    job = self._next(queue)
+                    if job is None:
+                        break
+                    job.started = True
+                    if job.key is not None:
+                        del self._pending[job.key]
+                    self.depth[job.priority] -= 1
+                    self._record_wait(job.priority, self._clock() - job.submitted)
+                    try:
+                        result = await job.call()
+                    except asyncio.CancelledError:
+                        job.future.cancel()
+                        raise
+                    except Exception as e:
+                        self.failed += 1
+                        print(f"[ERROR] REST call on {bucket} failed: {e}")
+                        job.future.set_exception(e)
+                        # Fire-and-forget callers never await the future; don't warn about it.
+                        job.future.exception()
+                    else:
+                        self.completed += 1
+                        job.future.set_result(result)
+                finally:
+                    self._release()
+        finally:
+            del self._drainers[bucket]
+            if not queue:
+                del self._queues[bucket]
+
+    def queued(self) -> int:
+        return sum(self.depth.values())
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queued(),
+            "in_flight": self.concurrency - self._free,
+            "buckets": len(self._queues),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "depth": {PRIORITY_NAMES[p]: n for p, n in self.depth.items()},
+            "wait_avg_ms": {
+                PRIORITY_NAMES[p]: round(self.wait_sum[p] / self.wait_count[p] * 1000, 1) if self.wait_count[p] else 0.0
+                for p in PRIORITY_NAMES
+            },
+            "wait_max_ms": {PRIORITY_NAMES[p]: round(self.wait_max[p] * 1000, 1) for p in PRIORITY_NAMES},
+        }
+
+    async def close(self):
+        tasks = list(self._drainers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for queue in self._queues.values():
+            for _, _, job in queue:
+                job.future.cancel()
+        self._queues.clear()
+        self._pending.clear()
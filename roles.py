@@ -0,0 +1,31 @@
+import discord
+
+
+class RoleIndex:
+    """Per-guild `name -> Role` lookup, built lazily and dropped on role changes.
+
+    Replaces repeated `discord.utils.get(guild.roles, name=...)` scans. Like
+    `utils.get`, the first role (lowest position) wins when names collide.
+    Call `invalidate` from the guild role create/update/delete events.
+    """
+
+    def __init__(self):
+        self._guilds: dict[int, dict[str, discord.Role]] = {}
+
+    def get(self, guild: discord.Guild, name: str):
+        index = self._guilds.get(guild.id)
+        if index is None:
+            index = {}
+            for role in guild.roles:
+                index.setdefault(role.name, role)
+            self._guilds[guild.id] = index
+        return index.get(name)
+
+    def add(self, role: discord.Role):
+        """Record a role we just created, before its gateway event arrives."""
+        index = self._guilds.get(role.guild.id)
+        if index is not None:
+            index.setdefault(role.name, role)
+
+    def invalidate(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
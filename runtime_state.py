@@ -0,0 +1,526 @@
+"""Warm restarts: binary snapshots plus a delta log of the bot's in-memory state.
+
+State is split into named sections keyed by a u64 (user or guild id). Changes
+are only marked (`changed(section, key)`); every `flush_interval` the current
+value of each marked key is appended to the delta log, and once the log grows
+past `compact_bytes` (or `snapshot_interval` has passed) everything is written
+as a new snapshot and the log starts over.
+
+Snapshot layout (little-endian):
+
+    header   magic "BOTSTAT1", version u32, generation u64, written_at f64
+    section  name 16s, count u32, width u32 (0xFFFFFFFF: length-prefixed), size u64
+             keys    count * u64
+             values  fixed width: count * width bytes
+                     length-prefixed: count * u32 lengths, then the bytes
+
+Delta log: header magic "BOTDELT1", generation u64, then records
+(section index u8, op u8, key u64, length u32, value). The log only applies
+to the snapshot with the same generation. Snapshots are written to a temp file
+and renamed into place. Loading maps the file: id sets are used in place (see
+IdSet), other sections are decoded into their Python objects.
+"""
+import os
+import sys
+import mmap
+import array
+import time
+import bisect
+import struct
+import asyncio
+
+SNAPSHOT_MAGIC = b"BOTSTAT1"
+DELTA_MAGIC = b"BOTDELT1"
+VERSION = 1
+VARIABLE = 0xFFFFFFFF
+
+_HEADER = struct.Struct("<8sIQd")
+_SECTION = struct.Struct("<16sIIQ")
+_DELTA_HEADER = struct.Struct("<8sQ")
+_RECORD = struct.Struct("<BBQI")
+SET, DELETE = 1, 0
+
+
+class Section:
+    """One piece of state. Subclasses define how a key's value becomes bytes and back."""
+
+    width = None  # bytes per value; None for variable-length values
+
+    def keys(self):
+        raise NotImplementedError
+
+    def encode(self, key: int):
+        """Bytes for the key's current value, or None if it no longer exists."""
+        raise NotImplementedError
+
+    def restore(self, key: int, value: bytes):
+        raise NotImplementedError
+
+    def discard(self, key: int):
+        raise NotImplementedError
+
+    def items(self) -> tuple[list, list]:
+        """Every key with its encoded value."""
+        keys, values = [], []
+        for key in self.keys():
+            value = self.encode(key)
+            if value is not None:
+                keys.append(key)
+                values.append(value)
+        return keys, values
+
+    def restore_many(self, keys, values):
+        """`values` is a memoryview of count * width bytes (fixed width) or a list of memoryviews."""
+        if self.width is None:
+            for key, value in zip(keys, values):
+                self.restore(key, value)
+        else:
+            width = self.width
+            for i, key in enumerate(keys):
+                self.restore(key, values[i * width:(i + 1) * width])
+
+
+class IdSet:
+    """Set of u64 ids whose bulk can stay in the sorted, memory-mapped key array of the last snapshot.
+
+    Changes since then live in two small in-memory sets; lookups check those and
+    then binary-search the array, so restoring millions of ids costs nothing.
+    """
+
+    __slots__ = ("_base", "_added", "_removed")
+
+    def __init__(self, ids=()):
+        self._base = ()
+        self._added = set(ids)
+        self._removed = set()
+
+    def attach(self, sorted_ids):
+        self._base = sorted_ids
+        self._added.clear()
+        self._removed.clear()
+
+    def _in_base(self, key) -> bool:
+        base = self._base
+        i = bisect.bisect_left(base, key)
+        return i < len(base) and base[i] == key
+
+    def __contains__(self, key) -> bool:
+        return key in self._added or (key not in self._removed and self._in_base(key))
+
+    def add(self, key):
+        if self._in_base(key):
+            self._removed.discard(key)
+        else:
+            self._added.add(key)
+
+    def discard(self, key):
+        if key in self._added:
+            self._added.discard(key)
+        elif self._in_base(key):
+            self._removed.add(key)
+
+    def remove(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.discard(key)
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return len(self._base) - len(self._removed) + len(self._added)
+
+    def sorted_ids(self) -> list:
+        ids = self._base.tolist() if isinstance(self._base, memoryview) else list(self._base)
+        if self._removed:
+            removed = self._removed
+            ids = [key for key in ids if key not in removed]
+        if self._added:
+            ids += self._added
+            ids.sort()  # two sorted runs, merged in linear time
+        return ids
+
+    def __iter__(self):
+        removed = self._removed
+        yield from (key for key in self._base if key not in removed)
+        yield from self._added
+
+
+class KeySet(Section):
+    """An IdSet (talk mode users)."""
+
+    width = 0
+
+    def __init__(self, data: IdSet):
+        self.data = data
+
+    def keys(self):
+        return self.data
+
+    def encode(self, key):
+        return b"" if key in self.data else None
+
+    def restore(self, key, value):
+        self.data.add(key)
+
+    def discard(self, key):
+        self.data.discard(key)
+
+    def items(self):
+        return self.data.sorted_ids(), []
+
+    def restore_many(self, keys, values):
+        self.data.attach(keys)
+
+
+class Mapping(Section):
+    """A dict of id -> value, with `pack(value) -> bytes` and `unpack(bytes) -> value`."""
+
+    def __init__(self, data: dict, pack, unpack, width: int = None):
+        self.data = data
+        self.pack = pack
+        self.unpack = unpack
+        self.width = width
+
+    def keys(self):
+        return self.data
+
+    def encode(self, key):
+        value = self.data.get(key)
+        return None if value is None else self.pack(value)
+
+    def restore(self, key, value):
+        self.data[key] = self.unpack(value)
+
+    def discard(self, key):
+        self.data.pop(key, None)
+
+
+class Flags(Section):
+    """Scalar settings under key 0, as `pack() -> bytes` / `unpack(bytes)`."""
+
+    def __init__(self, pack, unpack):
+        self.pack = pack
+        self.unpack = unpack
+
+    def keys(self):
+        return (0,)
+
+    def encode(self, key):
+        return self.pack()
+
+    def restore(self, key, value):
+        self.unpack(value)
+
+    def discard(self, key):
+        pass
+
+
+class Expiring(Section):
+    """An ExpiringDict. `pack(key, value, expires_at)` and `unpack(key, bytes) -> (value, expires_at)` use
+    wall-clock expiry so TTLs keep running across the restart. `unpack` may return None to drop an entry."""
+
+    def __init__(self, data, pack, unpack, width: int = None):
+        self.data = data
+        self.pack = pack
+        self.unpack = unpack
+        self.width = width
+
+    def keys(self):
+        return list(self.data)
+
+    def encode(self, key):
+        ttl = self.data.ttl(key)
+        return None if ttl is None else self.pack(key, self.data[key], time.time() + ttl)
+
+    def restore(self, key, value):
+        entry = self.unpack(key, value)
+        if entry is not None:
+            self.data.set(key, entry[0], ttl=entry[1] - time.time())
+
+    def discard(self, key):
+        self.data.pop(key, None)
+
+
+class RuntimeState:
+    """Sections registered by the bot, persisted under `directory` (None disables everything)."""
+
+    def __init__(self, directory: str = None, flush_interval: float = 1.0, snapshot_interval: float = 600.0,
+                 compact_bytes: int = 1 << 20):
+        self.enabled = directory is not None
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory or "", "state.snap")
+        self.delta_path = os.path.join(directory or "", "state.delta")
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.compact_bytes = compact_bytes
+        self.sections: dict[str, Section] = {}
+        self._dirty: dict[str, set] = {}
+        self._restoring = False
+        self._delta = None
+        self._delta_ok = False  # the log on disk belongs to the current generation
+        self._task = None
+        self._mapping = None
+        self.generation = 0
+        self.last_snapshot = time.monotonic()
+
+        self.snapshots = 0
+        self.deltas = 0
+        self.restored = 0
+        self.restore_ms = 0.0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("STATE_DIR", "state") if os.getenv("STATE_SNAPSHOTS", "1") != "0" else None,
+            flush_interval=float(os.getenv("STATE_FLUSH_INTERVAL", "1.0")),
+            snapshot_interval=float(os.getenv("STATE_SNAPSHOT_INTERVAL", "600")),
+            compact_bytes=int(os.getenv("STATE_COMPACT_BYTES", str(1 << 20))),
+        )
+
+    def register(self, name: str, section: Section) -> Section:
+        assert len(name.encode()) <= 16 and len(self.sections) < 256
+        self.sections[name] = section
+        self._dirty[name] = set()
+        return section
+
+    def changed(self, name: str, key: int = 0):
+        if self.enabled and not self._restoring:
+            self._dirty[name].add(key)
+
+    def tracker(self, name: str):
+        """`on_change` callback for an ExpiringDict."""
+        return lambda key: self.changed(name, key)
+
+    # --- Writing ---
+
+    def _encode_snapshot(self, generation: int) -> list:
+        parts = [_HEADER.pack(SNAPSHOT_MAGIC, VERSION, generation, time.time())]
+        for name, section in self.sections.items():
+            keys, values = section.items()
+            key_bytes = _pack_u64s(keys)
+            if section.width is None:
+                body = [key_bytes, struct.pack(f"<{len(values)}I", *map(len, values)), *values]
+            else:
+                body = [key_bytes, *values]
+            size = sum(map(len, body))
+            parts.append(_SECTION.pack(name.encode(), len(keys), VARIABLE if section.width is None else section.width, size))
+            parts += body
+        return parts
+
+    def _write_snapshot(self, parts: list, generation: int):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.writelines(parts)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # A crash before the new log is in place leaves the old one, whose generation no longer matches.
+        self._new_delta(generation)
+
+    def _new_delta(self, generation: int):
+        names = [name.encode().ljust(16, b"\0") for name in self.sections]
+        tmp = self.delta_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_DELTA_HEADER.pack(DELTA_MAGIC, generation) + bytes([len(names)]) + b"".join(names))
+        os.replace(tmp, self.delta_path)
+        self._delta_ok = True
+
+    def _begin_snapshot(self) -> tuple[list, int]:
+        """Encode everything under the next generation; later changes go to that generation's log.
+
+        Nothing changes until encoding has succeeded, so a section that fails to encode
+        leaves the current generation, its log and the pending changes as they were.
+        """
+        parts = self._encode_snapshot(self.generation + 1)
+        for keys in self._dirty.values():
+            keys.clear()
+        self.generation += 1
+        self._close_delta()
+        self._delta_ok = False
+        self.snapshots += 1
+        self.last_snapshot = time.monotonic()
+        return parts, self.generation
+
+    def snapshot(self):
+        """Write every section as a new snapshot and start an empty delta log."""
+        self._write_snapshot(*self._begin_snapshot())
+
+    def _close_delta(self):
+        if self._delta is not None:
+            self._delta.close()
+            self._delta = None
+
+    def flush(self) -> int:
+        """Append the current value of every changed key to the delta log. Returns the record count."""
+        records = []
+        taken = {}
+        try:
+            for index, (name, section) in enumerate(self.sections.items()):
+                # Encoding can expire entries, which marks them again
+                dirty = taken[name] = self._dirty[name]
+                self._dirty[name] = set()
+                for key in dirty:
+                    value = section.encode(key)
+                    if value is None:
+                        records.append(_RECORD.pack(index, DELETE, key, 0))
+                    else:
+                        records += (_RECORD.pack(index, SET, key, len(value)), value)
+        except Exception:
+            # Nothing was written: keep every change pending for the next flush or snapshot
+            for name, dirty in taken.items():
+                self._dirty[name] |= dirty
+            raise
+        if records:
+            if self._delta is None:
+                if not self._delta_ok:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._new_delta(self.generation)
+                self._delta = open(self.delta_path, "ab")
+            self._delta.writelines(records)
+            self._delta.flush()
+            self.deltas += 1
+        return len(records)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+                if ((self._delta is not None and self._delta.tell() > self.compact_bytes)
+                        or time.monotonic() - self.last_snapshot > self.snapshot_interval):
+                    await asyncio.to_thread(self._write_snapshot, *self._begin_snapshot())
+            except Exception as e:
+                print(f"[ERROR] Runtime state flush failed: {e}")
+
+    def start(self):
+        """Start periodic flushing on the running event loop (after `load`)."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def close(self):
+        """Final snapshot at shutdown."""
+        if not self.enabled:
+            return
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            self.snapshot()
+        finally:
+            self._close_delta()
+
+    # --- Reading ---
+
+    def load(self) -> int:
+        """Restore every registered section from the snapshot and its delta log. Returns the entry count."""
+        if not self.enabled:
+            return 0
+        t0 = time.perf_counter()
+        self._restoring = True
+        try:
+            count = self._load_snapshot()
+            count += self._load_deltas()
+        finally:
+            self._restoring = False
+        self.restored = count
+        self.restore_ms = (time.perf_counter() - t0) * 1000
+        return count
+
+    def _load_snapshot(self) -> int:
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < _HEADER.size:
+                    return 0
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return 0
+        # Sections may keep views into the mapping (IdSet), so it stays open; renaming a newer
+        # snapshot over the file later does not invalidate it.
+        self._mapping = mapping
+        return self._parse_snapshot(memoryview(mapping))
+
+    def _parse_snapshot(self, view: memoryview) -> int:
+        magic, version, generation, _ = _HEADER.unpack_from(view, 0)
+        if magic != SNAPSHOT_MAGIC or version != VERSION:
+            print(f"[ERROR] Ignoring {self.snapshot_path}: not a version {VERSION} snapshot")
+            return 0
+        self.generation = generation
+        offset = _HEADER.size
+        total = 0
+        while offset < len(view):
+            raw_name, count, width, size = _SECTION.unpack_from(view, offset)
+            offset += _SECTION.size
+            section = self.sections.get(raw_name.rstrip(b"\0").decode())
+            if section is not None:
+                keys = _u64s(view[offset:offset + 8 * count], count)
+                body = view[offset + 8 * count:offset + size]
+                if width == VARIABLE:
+                    lengths = struct.unpack_from(f"<{count}I", body, 0)
+                    values, pos = [], 4 * count
+                    for n in lengths:
+                        values.append(body[pos:pos + n])
+                        pos += n
+                else:
+                    values = body
+                section.restore_many(keys, values)
+                total += count
+            offset += size
+        return total
+
+    def _load_deltas(self) -> int:
+        try:
+            with open(self.delta_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        if len(data) < _DELTA_HEADER.size + 1:
+            return 0
+        magic, generation = _DELTA_HEADER.unpack_from(data, 0)
+        if magic != DELTA_MAGIC or generation != self.generation:
+            return 0
+        self._delta_ok = True
+        offset = _DELTA_HEADER.size
+        names = [data[offset + 1 + 16 * i:offset + 17 + 16 * i].rstrip(b"\0").decode() for i in range(data[offset])]
+        offset += 1 + 16 * len(names)
+        applied = 0
+        # A record cut short by a crash ends the log
+        while offset + _RECORD.size <= len(data):
+            index, op, key, length = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            if offset + length > len(data):
+                break
+            section = self.sections.get(names[index]) if index < len(names) else None
+            if section is not None:
+                if op == SET:
+                    section.restore(key, memoryview(data)[offset:offset + length])
+                else:
+                    section.discard(key)
+                applied += 1
+            offset += length
+        return applied
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation,
+            "snapshots": self.snapshots,
+            "deltas": self.deltas,
+            "dirty": sum(map(len, self._dirty.values())),
+            "restored": self.restored,
+            "restore_ms": round(self.restore_ms, 1),
+        }
+
+
+def _pack_u64s(keys: list) -> bytes:
+    packed = array.array("Q", keys)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _u64s(view: memoryview, count: int):
+    if sys.byteorder == "little":
+        return view.cast("B").cast("Q")
+    return struct.unpack(f"<{count}Q", view)
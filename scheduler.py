@@ -0,0 +1,140 @@
+import os
+import time
+import heapq
+import asyncio
+import sqlite3
+import threading
+
+
+class ReminderScheduler:
+    """Persistent reminders dispatched from a min-heap by one background task.
+
+    Pending reminders are rows in SQLite and `(due, id, user_id, message)` tuples in
+    a heap, so a pending reminder costs one tuple instead of a sleeping coroutine.
+    The dispatcher sleeps until the earliest due time (or until an earlier reminder
+    is scheduled), pops everything that is due, and delivers that batch through
+    `deliver(user_id, message)` with at most `concurrency` sends in flight. On
+    `start()` the heap is rebuilt from disk and overdue reminders go out at once.
+    Rows are deleted after delivery, so a crash in between means a resend, not a loss.
+    """
+
+    def __init__(self, path: str, deliver, concurrency: int = 20, clock=time.time):
+        self.path = path
+        self._deliver = deliver
+        self._clock = clock
+        self._heap: list[tuple[float, int, int, str]] = []
+        self._wake = asyncio.Event()
+        self._queue = asyncio.Queue()
+        self._done: list[int] = []
+        self.concurrency = concurrency
+        self._tasks = []
+        self._db_lock = threading.Lock()
+
+        self.delivered = 0
+        self.failed = 0
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reminders ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, due REAL NOT NULL, user_id INTEGER NOT NULL, message TEXT NOT NULL)"
+        )
+
+    @classmethod
+    def from_env(cls, deliver):
+        return cls(
+            os.getenv("REMINDER_DB_PATH", "reminders.sqlite3"),
+            deliver,
+            concurrency=int(os.getenv("REMINDER_CONCURRENCY", "20")),
+        )
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    # --- Persistence ---
+
+    def _insert(self, due: float, user_id: int, message: str) -> int:
+        with self._db_lock:
+            return self._db.execute(
+                "INSERT INTO reminders (due, user_id, message) VALUES (?, ?, ?)", (due, user_id, message)
+            ).lastrowid
+
+    def _delete(self, ids: list[int]):
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM reminders WHERE id = ?", [(i,) for i in ids])
+            self._db.execute("COMMIT")
+
+    def _load(self) -> list[tuple[float, int, int, str]]:
+        with self._db_lock:
+            return self._db.execute("SELECT due, id, user_id, message FROM reminders").fetchall()
+
+    # --- Scheduling ---
+
+    async def schedule(self, user_id: int, message: str, delay: float) -> float:
+        """Persist a reminder for `delay` seconds from now and return its due time."""
+        due = self._clock() + delay
+        rid = await asyncio.to_thread(self._insert, due, user_id, message)
+        heapq.heappush(self._heap, (due, rid, user_id, message))
+        if self._heap[0][1] == rid:
+            self._wake.set()
+        return due
+
+    async def _worker(self):
+        while True:
+            _, rid, user_id, message = await self._queue.get()
+            try:
+                await self._deliver(user_id, message)
+                self.delivered += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"[ERROR] Reminder for {user_id} failed: {e}")
+            self._done.append(rid)
+            if len(self._done) == 1:
+                # Let the dispatcher batch-delete delivered rows
+                self._wake.set()
+
+    async def _run(self):
+        while True:
+            if self._done:
+                done, self._done = self._done, []
+                await asyncio.to_thread(self._delete, done)
+            if not self._heap:
+                await self._wake.wait()
+                self._wake.clear()
+                continue
+            delay = self._heap[0][0] - self._clock()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            # Hand the whole due batch to the delivery pool in one go
+            now = self._clock()
+            while self._heap and self._heap[0][0] <= now:
+                self._queue.put_nowait(heapq.heappop(self._heap))
+
+    def start(self):
+        """Reload pending reminders from disk and start the dispatcher on the running loop."""
+        if self._tasks:
+            return
+        self._heap = self._load()
+        heapq.heapify(self._heap)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._run())]
+        self._tasks += [loop.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def close(self):
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+        self._tasks = []
+        # Delivered reminders whose delete did not land yet; anything else is resent on restart.
+        if self._done:
+            self._delete(self._done)
+            self._done = []
+        with self._db_lock:
+            self._db.close()
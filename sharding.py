@@ -0,0 +1,75 @@
+import os
+import json
+import time
+import asyncio
+import discord
+
+
+def parse_shard_ids(spec: str) -> list[int]:
+    """Parse "0-3,8,10-11" into [0, 1, 2, 3, 8, 10, 11]."""
+    ids = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            ids.extend(range(int(lo), int(hi) + 1))
+        else:
+            ids.append(int(part))
+    return ids
+
+
+def shard_options_from_env() -> dict:
+    """AutoShardedBot keyword arguments from SHARD_COUNT / SHARD_IDS (both unset = Discord's recommendation)."""
+    options = {}
+    if os.getenv("SHARD_COUNT"):
+        options["shard_count"] = int(os.getenv("SHARD_COUNT"))
+        if os.getenv("SHARD_IDS"):
+            options["shard_ids"] = parse_shard_ids(os.getenv("SHARD_IDS"))
+    return options
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """The shard Discord routes a guild's events to."""
+    return (guild_id >> 22) % shard_count
+
+
+def owns_guild_from_env():
+    """Predicate: is this guild on one of this process's shards (always true without SHARD_IDS)."""
+    options = shard_options_from_env()
+    if "shard_ids" not in options:
+        return lambda guild_id: True
+    shard_count, shard_ids = options["shard_count"], frozenset(options["shard_ids"])
+    return lambda guild_id: shard_for_guild(guild_id, shard_count) in shard_ids
+
+
+def shard_health(bot: discord.AutoShardedClient) -> list[dict]:
+    health = []
+    for shard_id, shard in sorted(bot.shards.items()):
+        latency = shard.latency
+        health.append({
+            "id": shard_id,
+            "latency_ms": None if latency != latency or latency == float("inf") else round(latency * 1000, 1),
+            "closed": shard.is_closed(),
+            "ratelimited": shard.is_ws_ratelimited(),
+            "guilds": sum(1 for g in bot.guilds if g.shard_id == shard_id),
+        })
+    return health
+
+
+async def report_health(bot: discord.AutoShardedClient, path: str, worker_id: str, interval: float = 15.0):
+    """Periodically write this worker's shard health to `path` for the launcher to aggregate."""
+    while True:
+        status = {
+            "worker": worker_id,
+            "pid": os.getpid(),
+            "ready": bot.is_ready(),
+            "shards": shard_health(bot),
+            "updated": time.time(),
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(status, f)
+        os.replace(tmp, path)
+        await asyncio.sleep(interval)
@@ -0,0 +1,166 @@
+"""Monte Carlo house-edge simulator for gamble, slots and blackjack.
+
+    python simulate.py [--rounds 20000000] [--bets 10,100,1000] [--bankroll 1000]
+
+Every game is simulated in batched NumPy from the tables in payouts.py and the
+card values/dealer rule in blackjack.py, so it measures the rules the commands
+actually settle with. Blackjack deals from a BLACKJACK_DECKS-deck shoe without
+replacement, with the player hitting below --stand-on (there is no double/split
+in the bot). For each game it prints the expected value and variance per unit
+bet, and, per bet size, the expected oil per round and the chance a player
+starting with --bankroll can no longer cover the bet within --horizon rounds.
+"""
+import os
+import time
+import argparse
+import numpy as np
+import blackjack
+import payouts
+
+
+def _lookup(table: dict) -> tuple[np.ndarray, int]:
+    """Dict with small int (or bool) keys -> (array indexed by key + offset, offset)."""
+    keys = [int(k) for k in table]
+    offset = -min(keys)
+    lut = np.zeros(max(keys) + offset + 1, dtype=np.int8)
+    for key, value in table.items():
+        lut[int(key) + offset] = value
+    return lut, offset
+
+
+def gamble_rounds(rng: np.random.Generator, n: int, **_) -> np.ndarray:
+    lut, offset = _lookup(payouts.GAMBLE_PAYOUTS)
+    won = rng.random(n) < payouts.GAMBLE_WIN_CHANCE
+    return lut[won.astype(np.int8) + offset]
+
+
+def slots_rounds(rng: np.random.Generator, n: int, **_) -> np.ndarray:
+    lut, offset = _lookup(payouts.SLOT_PAYOUTS)
+    reels = rng.integers(0, len(payouts.SLOT_SYMBOLS), size=(n, payouts.SLOT_REELS), dtype=np.int8)
+    # Count of the most common symbol on each row
+    matches = (reels[:, :, None] == reels[:, None, :]).sum(axis=2).max(axis=1)
+    return lut[matches + offset]
+
+
+# Blackjack card classes: ace, 2-9, then every ten-valued rank merged
+_CLASS_VALUES = np.array([blackjack.VALUES[0], *blackjack.VALUES[1:9], 10], dtype=np.int16)
+_CLASS_COUNTS = np.array([4] * 9 + [16], dtype=np.int16)
+assert _CLASS_COUNTS.sum() == 52 and set(blackjack.VALUES[9:]) == {10}
+
+
+class _Shoes:
+    """One multi-deck shoe per row, dealt without replacement."""
+
+    def __init__(self, rng: np.random.Generator, n: int, decks: int):
+        self.rng = rng
+        self.counts = np.tile(_CLASS_COUNTS * decks, (n, 1))
+        self.remaining = np.full(n, 52 * decks, dtype=np.int32)
+
+    def draw(self, rows: np.ndarray) -> np.ndarray:
+        """Deal one card to each of `rows` (row indices)."""
+        pick = (self.rng.random(len(rows)) * self.remaining[rows]).astype(np.int32)
+        card = (self.counts[rows].cumsum(axis=1) <= pick[:, None]).sum(axis=1)
+        self.counts[rows, card] -= 1
+        self.remaining[rows] -= 1
+        return card
+
+
+def _add(total: np.ndarray, soft: np.ndarray, rows: np.ndarray, card: np.ndarray):
+    t = total[rows] + _CLASS_VALUES[card]
+    s = soft[rows] + (card == 0)
+    while (demote := (t > 21) & (s > 0)).any():
+        t -= 10 * demote
+        s -= demote
+    total[rows] = t
+    soft[rows] = s
+
+
+def blackjack_rounds(rng: np.random.Generator, n: int, decks: int = 6, stand_on: int = 17, **_) -> np.ndarray:
+    lut, offset = _lookup(payouts.BLACKJACK_PAYOUTS)
+    shoes = _Shoes(rng, n, decks)
+    everyone = np.arange(n)
+    player, player_soft = np.zeros(n, dtype=np.int16), np.zeros(n, dtype=np.int16)
+    dealer, dealer_soft = np.zeros(n, dtype=np.int16), np.zeros(n, dtype=np.int16)
+    for total, soft in ((player, player_soft), (dealer, dealer_soft), (player, player_soft), (dealer, dealer_soft)):
+        _add(total, soft, everyone, shoes.draw(everyone))
+
+    hitting = np.flatnonzero(player < stand_on)
+    while len(hitting):
+        _add(player, player_soft, hitting, shoes.draw(hitting))
+        hitting = hitting[player[hitting] < stand_on]
+    # A busted player loses at once; the dealer only plays out the other rows.
+    drawing = np.flatnonzero((dealer < blackjack.DEALER_STANDS) & (player <= 21))
+    while len(drawing):
+        _add(dealer, dealer_soft, drawing, shoes.draw(drawing))
+        drawing = drawing[dealer[drawing] < blackjack.DEALER_STANDS]
+
+    # BlackjackGame.outcome()
+    outcome = np.where(player > 21, -1, np.where((dealer > 21) | (player > dealer), 1, np.where(player == dealer, 0, -1)))
+    return lut[outcome + offset]
+
+
+GAMES = {"gamble": gamble_rounds, "slots": slots_rounds, "blackjack": blackjack_rounds}
+
+
+def expected_value(game, rng, rounds: int, batch: int, **options) -> tuple[float, float]:
+    total = total_sq = 0.0
+    done = 0
+    while done < rounds:
+        n = min(batch, rounds - done)
+        result = game(rng, n, **options).astype(np.float64)
+        total += result.sum()
+        total_sq += np.square(result).sum()
+        done += n
+    mean = total / rounds
+    return mean, total_sq / rounds - mean * mean
+
+
+def risk_of_ruin(game, rng, bets: list[int], bankroll: int, players: int, horizon: int, batch: int, **options) -> dict[int, float]:
+    """Share of players who can no longer cover the bet within `horizon` rounds, per bet size."""
+    ruined = dict.fromkeys(bets, 0)
+    rows = max(1, batch // horizon)
+    done = 0
+    while done < players:
+        n = min(rows, players - done)
+        path = game(rng, n * horizon, **options).reshape(n, horizon).astype(np.int32).cumsum(axis=1)
+        # Lowest point of each player's path, counting the starting bankroll
+        lowest = np.minimum(path.min(axis=1), 0)
+        for bet in bets:
+            ruined[bet] += int((bankroll + bet * lowest < bet).sum())
+        done += n
+    return {bet: count / players for bet, count in ruined.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo house edge of the gambling commands")
+    parser.add_argument("--games", default=",".join(GAMES))
+    parser.add_argument("--rounds", type=int, default=20_000_000, help="rounds per game for EV/variance")
+    parser.add_argument("--bets", default="10,100,1000")
+    parser.add_argument("--bankroll", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=10_000, help="simulated players for risk of ruin")
+    parser.add_argument("--horizon", type=int, default=1000, help="rounds each simulated player plays")
+    parser.add_argument("--stand-on", type=int, default=17, help="blackjack player stands at this total")
+    parser.add_argument("--decks", type=int, default=int(os.getenv("BLACKJACK_DECKS", "6")))
+    parser.add_argument("--batch", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    bets = [int(b) for b in args.bets.split(",")]
+    options = {"decks": args.decks, "stand_on": args.stand_on}
+    for name in args.games.split(","):
+        game = GAMES[name]
+        t0 = time.perf_counter()
+        ev, variance = expected_value(game, rng, args.rounds, args.batch, **options)
+        ruin = risk_of_ruin(game, rng, bets, args.bankroll, args.players, args.horizon, args.batch, **options)
+        elapsed = time.perf_counter() - t0
+        stderr = (variance / args.rounds) ** 0.5
+        print(f"🎲 {name}: EV {ev:+.4f} ± {stderr:.4f} per unit bet (house edge {-ev:+.2%}), "
+              f"variance {variance:.4f}  [{args.rounds:,} + {args.players * args.horizon:,} rounds in {elapsed:.1f}s]")
+        for bet in bets:
+            print(f"   bet {bet:>6}: EV {ev * bet:+10.2f} oil/round, "
+                  f"risk of ruin from {args.bankroll} in {args.horizon} rounds {ruin[bet]:.2%}")
+
+
+if __name__ == "__main__":
+    main()
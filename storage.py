@@ -0,0 +1,651 @@
+import os
+import json
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# -------- CONFIG --------
+# synchronous=OFF  -> never fsync (fastest, may lose the last flushes on power loss)
+# synchronous=NORMAL -> fsync at WAL checkpoints (default, survives process crashes)
+# synchronous=FULL -> fsync on every flush transaction
+FSYNC_POLICIES = {"off": "OFF", "normal": "NORMAL", "full": "FULL"}
+
+DEFAULT_OIL = 1000
+
+
+FIELDS = ("oil", "xp", "level")
+
+
+class WriteConflict(Exception):
+    """A shared-mode write no longer applies to the stored row (another process changed it first).
+
+    `needed` is set when the stored balance cannot cover the oil taken, with the stored `balance`.
+    """
+
+    def __init__(self, user_id: int, balance: int = None, needed: int = None):
+        super().__init__(f"user {user_id} was changed by another process")
+        self.user_id = user_id
+        self.balance = balance
+        self.needed = needed
+
+
+class UserRecord:
+    """Compact economy record for one user.
+
+    oil/xp/level live in slots and the inventory is a sparse `{item_id: count}` dict
+    that is only allocated once the user owns something. Item ids are small ints
+    handed out by the owning store. `rec["oil"]`-style access is kept so commands
+    can treat a record like the old dict; every write marks the record dirty.
+    """
+
+    __slots__ = ("_store", "user_id", "oil", "xp", "level", "_inv", "_base")
+
+    def __init__(self, store, user_id: int, oil: int = DEFAULT_OIL, xp: int = 0, level: int = 0, inv=None):
+        self._store = store
+        self.user_id = user_id
+        self.oil = oil
+        self.xp = xp
+        self.level = level
+        self._inv = inv or None
+        self._base = None  # shared mode: (oil, xp, level, inventory json) as last read or written
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        if key == "inventory":
+            return InventoryView(self)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        if key == "inventory":
+            self._inv = {self._store.item_id(k): v for k, v in value.items() if v} or None
+        elif key in FIELDS:
+            setattr(self, key, value)
+            index = self._store.indexes.get(key)
+            if index is not None:
+                index.update(self.user_id, value)
+        else:
+            raise KeyError(key)
+        self._store.mark_dirty(self)
+
+    def keys(self):
+        return (*FIELDS, "inventory")
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys()
+
+    def to_dict(self) -> dict:
+        return {"oil": self.oil, "xp": self.xp, "level": self.level, "inventory": dict(InventoryView(self))}
+
+    def __repr__(self):
+        return f"UserRecord({self.user_id}, {self.to_dict()})"
+
+
+class InventoryView:
+    """Dict-like `{item_key: count}` view over a record's sparse item-id inventory."""
+
+    __slots__ = ("_rec",)
+
+    def __init__(self, rec: UserRecord):
+        self._rec = rec
+
+    def __getitem__(self, key):
+        inv = self._rec._inv
+        item_id = self._rec._store.item_ids.get(key)
+        if inv is None or item_id not in inv:
+            raise KeyError(key)
+        return inv[item_id]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, count: int):
+        rec = self._rec
+        item_id = rec._store.item_id(key)
+        if count:
+            if rec._inv is None:
+                rec._inv = {}
+            rec._inv[item_id] = count
+        elif rec._inv is not None:
+            rec._inv.pop(item_id, None)
+            if not rec._inv:
+                rec._inv = None
+        rec._store.mark_dirty(rec)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self[key] = 0
+
+    def __contains__(self, key) -> bool:
+        inv = self._rec._inv
+        return inv is not None and self._rec._store.item_ids.get(key) in inv
+
+    def __len__(self) -> int:
+        return len(self._rec._inv or ())
+
+    def __bool__(self) -> bool:
+        return self._rec._inv is not None
+
+    def items(self):
+        keys = self._rec._store.item_keys
+        return [(keys[item_id], count) for item_id, count in (self._rec._inv or {}).items()]
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        return list((self._rec._inv or {}).values())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __eq__(self, other):
+        return dict(self.items()) == other
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class UserStore:
+    """SQLite-backed user_data with an in-memory LRU cache and write-behind flushing.
+
+    Reads are always served from the cache (loading from SQLite on a miss). Mutations
+    only mark the record dirty; a background task flushes all dirty records in one
+    transaction every `flush_interval` seconds, so repeated writes to the same user
+    between flushes are coalesced into one row write. Clean records beyond
+    `cache_size` are evicted least-recently-used first; dirty and in-flight records
+    are pinned outside the LRU order until their flush lands, so eviction never has
+    to skip over them.
+
+    cache_size=0 is the shared mode used when several processes write the same
+    database (see launcher.py). Clean records are re-read on every access, each
+    record remembers the row it was read from (`_base`), and writes are relative
+    to it: `oil = oil + delta` only where the stored balance covers the delta,
+    xp and item counts likewise, and level-ups only if the stored level is still
+    the one they started from. `commit` writes a set of users through all or nothing
+    (the Ledger calls it at the end of every transaction); a background flush skips
+    rows that no longer apply and re-reads them instead.
+
+    `held` is the oil this worker (`worker`, one per launcher process) holds in
+    open escrows per user. It is written in the same transaction as the user's
+    row, so a stake is on disk exactly when its debit is.
+
+    Reads use their own connection, which WAL mode never makes wait on a writer, and
+    `fetch` does misses on a worker thread, so the event loop never waits on disk or
+    on another process's write lock. Writers give up after `busy_timeout` seconds
+    and the flush is retried.
+    """
+
+    def __init__(self, path: str, cache_size: int = 50_000, flush_interval: float = 2.0, fsync: str = "normal",
+                 busy_timeout: float = 1.0, worker: int = 0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}, expected one of {', '.join(FSYNC_POLICIES)}")
+        self.path = path
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.busy_timeout = busy_timeout
+        self.worker = worker
+        self.shared = cache_size == 0
+
+        # Clean records in LRU order
+        self._cache: OrderedDict[int, UserRecord] = OrderedDict()
+        # Records waiting for / being written by a flush, pinned outside the LRU until it lands
+        self._dirty: dict[int, UserRecord] = {}
+        self._inflight: dict[int, UserRecord] = {}
+        self._new: set[int] = set()
+        self._held_dirty: set[int] = set()
+        self._db_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._has_dirty = asyncio.Event()
+        self._flush_task = None
+        self._closed = False
+        # field name -> RankIndex kept in sync with every write to that field
+        self.indexes = {}
+        # Shop item keys <-> small int ids used by record inventories
+        self.item_ids: dict[str, int] = {}
+        self.item_keys: list[str] = []
+
+        self.flushes = 0
+        self.rows_written = 0
+        self.evictions = 0
+        self.conflicts = 0
+
+        self._db = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={FSYNC_POLICIES[fsync]}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "user_id INTEGER PRIMARY KEY, oil INTEGER NOT NULL, xp INTEGER NOT NULL, "
+            "level INTEGER NOT NULL, inventory TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS escrows ("
+            "worker INTEGER NOT NULL, user_id INTEGER NOT NULL, amount INTEGER NOT NULL, "
+            "PRIMARY KEY (worker, user_id))"
+        )
+        # user_id -> oil held in this worker's open escrows
+        self.held: dict[int, int] = dict(
+            self._db.execute("SELECT user_id, amount FROM escrows WHERE worker = ?", (worker,))
+        )
+        self._reader = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("ECONOMY_DB_PATH", "economy.sqlite3"),
+            cache_size=int(os.getenv("ECONOMY_CACHE_SIZE", "50000")),
+            flush_interval=float(os.getenv("ECONOMY_FLUSH_INTERVAL", "2.0")),
+            fsync=os.getenv("ECONOMY_FSYNC", "normal").lower(),
+            busy_timeout=float(os.getenv("ECONOMY_BUSY_TIMEOUT", "1.0")),
+            worker=int(os.getenv("WORKER_ID", "0")),
+        )
+
+    # --- Items ---
+
+    def item_id(self, key: str) -> int:
+        item_id = self.item_ids.get(key)
+        if item_id is None:
+            item_id = self.item_ids[key] = len(self.item_keys)
+            self.item_keys.append(key)
+        return item_id
+
+    def register_items(self, keys):
+        """Give `keys` (e.g. shop_items) the lowest item ids, in order."""
+        for key in keys:
+            self.item_id(key)
+
+    # --- Record access ---
+
+    def _new_record(self, user_id: int, oil=DEFAULT_OIL, xp=0, level=0, inventory=None) -> UserRecord:
+        inv = {self.item_id(k): v for k, v in inventory.items() if v} if inventory else None
+        return UserRecord(self, user_id, oil, xp, level, inv)
+
+    def _select(self, user_ids) -> dict[int, tuple]:
+        with self._read_lock:
+            return {
+                uid: row
+                for uid in user_ids
+                for row in self._reader.execute(
+                    "SELECT oil, xp, level, inventory FROM users WHERE user_id = ?", (uid,)
+                )
+            }
+
+    def _load(self, user_id: int):
+        return self._record(user_id, self._select((user_id,)).get(user_id))
+
+    def _record(self, user_id: int, row):
+        if row is None:
+            return None
+        oil, xp, level, inventory = row
+        rec = self._new_record(user_id, oil, xp, level, json.loads(inventory))
+        if self.shared:
+            rec._base = row
+        return rec
+
+    def _pinned(self, user_id: int):
+        return self._dirty.get(user_id) or self._inflight.get(user_id)
+
+    def _lookup(self, user_id: int):
+        rec = self._pinned(user_id)
+        if rec is not None:
+            return rec
+        # cache_size=0 (multi-process mode) caches nothing, so clean records are re-read
+        # and other writers' changes are seen.
+        rec = self._cache.get(user_id)
+        if rec is not None:
+            self._cache.move_to_end(user_id)
+        return rec
+
+    def get(self, user_id: int) -> UserRecord:
+        """Return the cached record for `user_id`, loading or creating it on a miss."""
+        rec = self._lookup(user_id)
+        if rec is None:
+            rec = self._admit(user_id, self._load(user_id))
+        return rec
+
+    async def fetch(self, *user_ids: int) -> list[UserRecord]:
+        """Like get() for each of `user_ids`, reading misses on a worker thread."""
+        missing = [uid for uid in user_ids if self._pinned(uid) is None and uid not in self._cache]
+        rows = await asyncio.to_thread(self._select, missing) if missing else {}
+        got = {}
+        for uid in user_ids:
+            if uid in got:
+                continue
+            # Another task may have loaded or changed the record while this one read
+            rec = self._lookup(uid)
+            if rec is None:
+                rec = self._admit(uid, self._record(uid, rows.get(uid)))
+            got[uid] = rec
+        return [got[uid] for uid in user_ids]
+
+    def _admit(self, user_id: int, rec):
+        """Cache a record just read from SQLite (None: create the user)."""
+        if rec is None:
+            rec = self._new_record(user_id)
+            if self.shared:
+                rec._base = (DEFAULT_OIL, 0, 0, "{}")
+            self._new.add(user_id)
+            self.mark_dirty(rec)
+            for field, index in self.indexes.items():
+                index.update(user_id, getattr(rec, field))
+            return rec
+        self._cache[user_id] = rec
+        self._evict()
+        return rec
+
+    def mark_dirty(self, rec: UserRecord):
+        # Pinned until its flush lands; it rejoins the LRU as the most recently used record
+        self._cache.pop(rec.user_id, None)
+        self._dirty[rec.user_id] = rec
+        self._has_dirty.set()
+
+    def hold(self, rec: UserRecord, amount: int):
+        """Add `amount` (negative: release) to the oil held for `rec`'s user; written with the record."""
+        held = self.held.get(rec.user_id, 0) + amount
+        if held:
+            self.held[rec.user_id] = held
+        else:
+            self.held.pop(rec.user_id, None)
+        self._held_dirty.add(rec.user_id)
+        self.mark_dirty(rec)
+
+    def _evict(self):
+        cache = self._cache
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, user_id: int) -> bool:
+        if user_id in self._cache or self._pinned(user_id) is not None:
+            return True
+        with self._read_lock:
+            return self._reader.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._read_lock:
+            stored = self._reader.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        # New users that have not been flushed yet are not in the table.
+        return stored + len(self._new)
+
+    def _rows(self, field: str) -> list[tuple[int, int]]:
+        with self._read_lock:
+            return self._reader.execute(f"SELECT user_id, {field} FROM users").fetchall()
+
+    def _seed(self, field: str, index, rows):
+        for uid, value in rows:
+            index.update(uid, value)
+        # Unflushed records are newer than their rows.
+        for pending in (self._inflight, self._dirty):
+            for uid, rec in pending.items():
+                index.update(uid, getattr(rec, field))
+
+    def attach_index(self, field: str, index):
+        """Seed `index` with every stored value of `field` and keep it updated on writes."""
+        if field not in ("oil", "xp", "level"):
+            raise ValueError(f"Cannot index {field!r}")
+        self._seed(field, index, self._rows(field))
+        self.indexes[field] = index
+
+    async def refresh_indexes(self):
+        """Re-read indexed fields from SQLite to pick up writes made by other processes."""
+        for field, index in self.indexes.items():
+            self._seed(field, index, await asyncio.to_thread(self._rows, field))
+
+    # --- Write-behind ---
+
+    def _inventory_json(self, rec: UserRecord) -> str:
+        inv = {self.item_keys[item_id]: count for item_id, count in rec._inv.items()} if rec._inv else {}
+        return json.dumps(inv)
+
+    def _take_dirty(self, user_ids=None) -> list[tuple]:
+        """Rows for every dirty record (or only `user_ids`), moved to in-flight."""
+        if user_ids is None:
+            taken = dict(self._dirty)
+        else:
+            taken = {uid: self._dirty[uid] for uid in user_ids if uid in self._dirty}
+        rows = []
+        for uid, rec in taken.items():
+            inv = self._inventory_json(rec)
+            held = None
+            if uid in self._held_dirty:
+                self._held_dirty.discard(uid)
+                held = self.held.get(uid, 0)
+            if self.shared:
+                oil, xp, level, base_inv = base = rec._base
+                items = []
+                if inv != base_inv:
+                    before, after = json.loads(base_inv), json.loads(inv)
+                    items = [(f'$."{key}"', after.get(key, 0) - before.get(key, 0))
+                             for key in after.keys() | before.keys() if after.get(key, 0) != before.get(key, 0)]
+                rows.append((uid, uid in self._new, rec.oil - oil, rec.xp - xp, rec.level - level, level, items, held, base))
+                # Later changes are relative to what this write leaves behind
+                rec._base = (rec.oil, rec.xp, rec.level, inv)
+            else:
+                rows.append((uid, rec.oil, rec.xp, rec.level, inv, held))
+            del self._dirty[uid]
+        self._inflight.update(taken)
+        if not self._dirty:
+            self._has_dirty.clear()
+        return rows
+
+    def _write(self, rows: list[tuple], atomic: bool = False) -> list[int]:
+        """Write `rows` in one transaction. Returns the users whose shared-mode rows no longer applied."""
+        if not rows:
+            return []
+        if self.shared:
+            return self._write_relative(rows, atomic)
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT INTO users (user_id, oil, xp, level, inventory) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET oil=excluded.oil, xp=excluded.xp, "
+                    "level=excluded.level, inventory=excluded.inventory",
+                    [row[:5] for row in rows],
+                )
+                self._write_held([(row[0], row[5]) for row in rows if row[5] is not None])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        self.flushes += 1
+        self.rows_written += len(rows)
+        return []
+
+    def _write_relative(self, rows: list[tuple], atomic: bool) -> list[int]:
+        # IMMEDIATE takes the write lock up front, so the checks and updates see no other writer
+        conflicts, held_rows = [], []
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for uid, new, d_oil, d_xp, d_level, base_level, items, held, _ in rows:
+                    if new:
+                        self._db.execute(
+                            "INSERT INTO users (user_id, oil, xp, level, inventory) VALUES (?, ?, 0, 0, '{}') "
+                            "ON CONFLICT(user_id) DO NOTHING",
+                            (uid, DEFAULT_OIL),
+                        )
+                    updated = self._db.execute(
+                        "UPDATE users SET oil = oil + ?, xp = xp + ?, level = level + ? "
+                        "WHERE user_id = ? AND oil + ? >= 0 AND (? = 0 OR level = ?)",
+                        (d_oil, d_xp, d_level, uid, d_oil, d_level, base_level),
+                    ).rowcount
+                    if updated:
+                        for path, delta in items:
+                            self._db.execute(
+                                "UPDATE users SET inventory = json_set(inventory, ?, "
+                                "coalesce(json_extract(inventory, ?), 0) + ?) WHERE user_id = ?",
+                                (path, path, delta, uid),
+                            )
+                        if held is not None:
+                            held_rows.append((uid, held))
+                        continue
+                    conflicts.append(uid)
+                    if atomic:
+                        oil = self._db.execute("SELECT oil FROM users WHERE user_id = ?", (uid,)).fetchone()[0]
+                        raise WriteConflict(uid, oil, -d_oil) if oil + d_oil < 0 else WriteConflict(uid)
+                self._write_held(held_rows)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        self.flushes += 1
+        self.rows_written += len(rows) - len(conflicts)
+        self.conflicts += len(conflicts)
+        return conflicts
+
+    def _write_held(self, rows: list[tuple[int, int]]):
+        self._db.executemany(
+            "INSERT INTO escrows (worker, user_id, amount) VALUES (?, ?, ?) "
+            "ON CONFLICT(worker, user_id) DO UPDATE SET amount=excluded.amount",
+            [(self.worker, uid, held) for uid, held in rows if held],
+        )
+        self._db.executemany(
+            "DELETE FROM escrows WHERE worker = ? AND user_id = ?",
+            [(self.worker, uid) for uid, held in rows if not held],
+        )
+
+    def _finish(self, rows: list[tuple], ok: bool):
+        for row in rows:
+            rec = self._inflight.pop(row[0])
+            if not ok and (row[-2] if self.shared else row[-1]) is not None:
+                self._held_dirty.add(row[0])
+            if ok:
+                self._new.discard(row[0])
+                if row[0] not in self._dirty:
+                    self._cache[row[0]] = rec
+            elif row[0] not in self._dirty:
+                if self.shared:
+                    rec._base = row[-1]
+                # Put the record back so the next flush retries it.
+                self.mark_dirty(rec)
+
+    def _reread(self, user_ids) -> tuple[dict, dict]:
+        rows = self._select(user_ids)
+        with self._read_lock:
+            held = {
+                uid: amount
+                for uid in user_ids
+                for (amount,) in self._reader.execute(
+                    "SELECT amount FROM escrows WHERE worker = ? AND user_id = ?", (self.worker, uid)
+                )
+            }
+        return rows, held
+
+    def _reload(self, user_ids, reread: tuple[dict, dict]):
+        """Drop local changes that did not apply and use the re-read stored rows instead."""
+        rows, held = reread
+        for uid in user_ids:
+            if uid in self._dirty:
+                # Changed again while the row was being read; its own flush settles it
+                continue
+            self._cache.pop(uid, None)
+            self._new.discard(uid)
+            self._held_dirty.discard(uid)
+            if uid in held:
+                self.held[uid] = held[uid]
+            else:
+                self.held.pop(uid, None)
+            rec = self._record(uid, rows.get(uid))
+            if rec is None:
+                continue
+            self._cache[uid] = rec
+            for field, index in self.indexes.items():
+                index.update(uid, getattr(rec, field))
+
+    def flush(self):
+        """Synchronously write every dirty record in one transaction."""
+        rows = self._take_dirty()
+        try:
+            conflicts = self._write(rows)
+        except Exception:
+            self._finish(rows, False)
+            raise
+        self._finish(rows, True)
+        self._reload(conflicts, self._reread(conflicts))
+        self._evict()
+
+    async def flush_async(self):
+        # Snapshot on the loop thread, write on a worker thread so commands never wait on disk.
+        # The lock keeps flushes in snapshot order so an older snapshot never lands last.
+        async with self._flush_lock:
+            rows = self._take_dirty()
+            try:
+                conflicts = await asyncio.to_thread(self._write, rows)
+            except Exception:
+                self._finish(rows, False)
+                raise
+            self._finish(rows, True)
+            if conflicts:
+                self._reload(conflicts, await asyncio.to_thread(self._reread, conflicts))
+            self._evict()
+
+    async def commit(self, user_ids):
+        """Shared mode: write these users' changes now, all or nothing; raises WriteConflict."""
+        async with self._flush_lock:
+            rows = self._take_dirty(user_ids)
+            try:
+                await asyncio.to_thread(self._write, rows, True)
+            except WriteConflict:
+                self.conflicts += 1
+                self._finish(rows, True)
+                uids = [row[0] for row in rows]
+                self._reload(uids, await asyncio.to_thread(self._reread, uids))
+                raise
+            except Exception:
+                self._finish(rows, False)
+                raise
+            self._finish(rows, True)
+            self._evict()
+
+    async def _flush_loop(self):
+        while not self._closed:
+            # Idle until something is dirty, then let writes accumulate for flush_interval.
+            await self._has_dirty.wait()
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_async()
+            except Exception as e:
+                print(f"[ERROR] Economy flush failed: {e}")
+
+    def start(self):
+        """Start the background flush task on the running event loop."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def close(self):
+        self._closed = True
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+        with self._read_lock:
+            self._reader.close()
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._cache) + len(self._dirty.keys() | self._inflight.keys()),
+            "dirty": len(self._dirty),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "evictions": self.evictions,
+            "conflicts": self.conflicts,
+        }
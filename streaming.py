@@ -0,0 +1,84 @@
+import time
+
+MESSAGE_LIMIT = 2000
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Split `text` into Discord-sized parts, preferring to break at a newline or space."""
+    parts = []
+    while len(text) > limit:
+        cut = _cut(text, limit)
+        parts.append(text[:cut])
+        text = text[cut:]
+    if text or not parts:
+        parts.append(text)
+    return parts
+
+
+def _cut(text: str, limit: int) -> int:
+    # Break on whitespace in the last 10% of the window if there is any.
+    for sep in ("\n", " "):
+        i = text.rfind(sep, limit - limit // 10, limit)
+        if i > 0:
+            return i + 1
+    return limit
+
+
+class StreamingReply:
+    """Posts streamed model output as it arrives, editing it in place.
+
+    The first chunk is sent right away. Later chunks are buffered, and the message
+    is edited at most once per `edit_interval` seconds (Discord allows about five
+    edits per five seconds per channel). Chunks that arrive while an edit is in
+    flight are folded into the next one. When the text passes the 2000-character
+    limit, the current message is finished and the overflow continues in a new
+    message.
+    """
+
+    def __init__(self, channel, edit_interval: float = 1.0, clock=time.monotonic):
+        self.channel = channel
+        self.edit_interval = edit_interval
+        self._clock = clock
+        self.messages = []
+        self._current = None   # message currently being grown, None until first sent
+        self._text = ""        # full text that message should show
+        self._shown = ""       # what Discord currently shows for it
+        self._last_edit = 0.0
+        self.edits = 0
+
+    async def _show(self):
+        if self._text == self._shown:
+            return
+        if self._current is None:
+            self._current = await self.channel.send(self._text)
+            self.messages.append(self._current)
+        else:
+            await self._current.edit(content=self._text)
+            self.edits += 1
+        self._shown = self._text
+        self._last_edit = self._clock()
+
+    async def _roll_over(self):
+        cut = _cut(self._text, MESSAGE_LIMIT)
+        self._text, overflow = self._text[:cut], self._text[cut:]
+        await self._show()
+        self._current = None
+        self._text, self._shown = overflow, ""
+
+    async def consume(self, chunks) -> str:
+        """Stream `chunks` (an async iterator of str) into the channel; returns the full text."""
+        full = []
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            full.append(chunk)
+            self._text += chunk
+            while len(self._text) > MESSAGE_LIMIT:
+                await self._roll_over()
+            if not self._text.strip():
+                continue
+            if self._current is None or self._clock() - self._last_edit >= self.edit_interval:
+                await self._show()
+        if self._text.strip():
+            await self._show()
+        return "".join(full)
@@ -0,0 +1,161 @@
+import time
+import asyncio
+
+
+class ExpiringDict:
+    """Dict whose entries expire after a TTL, swept by a hashed timing wheel.
+
+    Every key lives in exactly one wheel slot, chosen by its deadline tick, so
+    insert, delete and lookup are O(1). A background task advances the wheel
+    one tick at a time and only inspects the slot under the cursor; entries
+    whose deadline is more than one revolution away simply stay in the slot
+    until a later pass. Lookups also treat expired-but-unswept entries as
+    missing, so expiry is exact regardless of sweep timing. `on_expire(key, value)`
+    is called for every entry that expires (not for deletes or overwrites);
+    `on_change(key)` for every insert, overwrite, delete and expiry.
+    """
+
+    def __init__(self, default_ttl: float, tick: float = 1.0, slots: int = 512, clock=time.monotonic,
+                 on_expire=None, on_change=None):
+        self.default_ttl = default_ttl
+        self.on_expire = on_expire
+        self.on_change = on_change
+        self.tick = tick
+        self._clock = clock
+        self._data = {}  # key -> (value, deadline)
+        self._wheel = [set() for _ in range(slots)]
+        self._cursor = int(clock() / tick)
+        self._sweep_task = None
+
+        self.inserts = 0
+        self.evictions = 0
+        self.expired_on_access = 0
+
+    def _slot(self, deadline: float) -> set:
+        return self._wheel[int(deadline / self.tick) % len(self._wheel)]
+
+    # --- Mapping interface ---
+
+    def set(self, key, value, ttl: float = None):
+        old = self._data.get(key)
+        if old is not None:
+            self._slot(old[1]).discard(key)
+        deadline = self._clock() + (self.default_ttl if ttl is None else ttl)
+        self._data[key] = (value, deadline)
+        self._slot(deadline).add(key)
+        self.inserts += 1
+        if self.on_change is not None:
+            self.on_change(key)
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= self._clock():
+            self._remove(key, entry[1])
+            self.expired_on_access += 1
+            if self.on_expire is not None:
+                self.on_expire(key, entry[0])
+            return None
+        return entry
+
+    def __getitem__(self, key):
+        entry = self._live(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry[0]
+
+    def get(self, key, default=None):
+        entry = self._live(key)
+        return default if entry is None else entry[0]
+
+    def __contains__(self, key) -> bool:
+        return self._live(key) is not None
+
+    def __delitem__(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            raise KeyError(key)
+        self._remove(key, entry[1])
+
+    def pop(self, key, *default):
+        entry = self._live(key)
+        if entry is None:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        self._remove(key, entry[1])
+        return entry[0]
+
+    def touch(self, key, ttl: float = None):
+        """Restart the TTL of a live entry."""
+        entry = self._live(key)
+        if entry is None:
+            raise KeyError(key)
+        self.set(key, entry[0], ttl)
+
+    def ttl(self, key):
+        """Seconds a live entry has left, or None."""
+        entry = self._live(key)
+        return None if entry is None else entry[1] - self._clock()
+
+    def _remove(self, key, deadline: float):
+        del self._data[key]
+        self._slot(deadline).discard(key)
+        if self.on_change is not None:
+            self.on_change(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self):
+        now = self._clock()
+        return iter([key for key, (_, deadline) in self._data.items() if deadline > now])
+
+    def items(self):
+        now = self._clock()
+        return [(key, value) for key, (value, deadline) in self._data.items() if deadline > now]
+
+    # --- Eviction ---
+
+    def sweep(self) -> int:
+        """Advance the wheel to the current tick, evicting expired entries. Returns the eviction count."""
+        now = self._clock()
+        target = int(now / self.tick)
+        # Never walk more than one full revolution, that already covers every slot.
+        start = max(self._cursor, target - len(self._wheel) + 1)
+        evicted = 0
+        for t in range(start, target + 1):
+            slot = self._wheel[t % len(self._wheel)]
+            for key in [k for k in slot if self._data[k][1] <= now]:
+                value = self._data.pop(key)[0]
+                slot.discard(key)
+                evicted += 1
+                if self.on_change is not None:
+                    self.on_change(key)
+                if self.on_expire is not None:
+                    self.on_expire(key, value)
+        self._cursor = target
+        self.evictions += evicted
+        return evicted
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self.sweep()
+
+    def start(self):
+        """Start background eviction on the running event loop."""
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.get_running_loop().create_task(self._sweep_loop())
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "inserts": self.inserts,
+            "evictions": self.evictions,
+            "expired_on_access": self.expired_on_access,
+        }